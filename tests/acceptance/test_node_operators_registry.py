@@ -11,6 +11,7 @@ from utils.config import (
     CURATED_STAKING_MODULE_OPERATORS_ACTIVE_COUNT,
     CURATED_STAKING_MODULE_TYPE,
 )
+from utils.rpc_batch import rpc_batch
 
 
 @pytest.fixture(scope="module")
@@ -94,8 +95,14 @@ def test_nor_state(contract):
     assert summary["totalDepositedValidators"] >= 177397
     assert summary["depositableValidatorsCount"] > 0
 
+    with rpc_batch() as batch:
+        node_operators = [batch.call(contract.getNodeOperator, id, True) for id in range(node_operators_count)]
+        node_operators_summaries = [
+            batch.call(contract.getNodeOperatorSummary, id) for id in range(node_operators_count)
+        ]
+
     for id in range(node_operators_count):
-        node_operator = contract.getNodeOperator(id, True)
+        node_operator = node_operators[id].result()
 
         assert node_operator["active"] == True
         assert node_operator["name"] is not None
@@ -109,7 +116,7 @@ def test_nor_state(contract):
         assert node_operator["totalDepositedValidators"] <= node_operator["totalVettedValidators"]
         assert node_operator["totalVettedValidators"] <= node_operator["totalAddedValidators"]
 
-        node_operator_summary = contract.getNodeOperatorSummary(id)
+        node_operator_summary = node_operators_summaries[id].result()
         exited_node_operators = [12, 1]  # NO id 12 was added on vote 23-05-23, NO id 1 was added on vote 03-10-23
         if id in exited_node_operators:
             assert (
@@ -9,6 +9,7 @@ from brownie import chain, interface, web3
 from brownie.network import state
 from brownie.network.contract import Contract
 
+from utils.contract_name_cache import get_contract_name_cache
 from utils.evm_script import EMPTY_CALLSCRIPT
 
 from utils.config import contracts, network_name, MAINNET_VOTE_DURATION
@@ -16,6 +17,7 @@ from utils.config import contracts, network_name, MAINNET_VOTE_DURATION
 from utils.config import *
 from utils.txs.deploy import deploy_from_prepared_tx
 from utils.test.helpers import ETH
+from utils.test.oracle_report_helpers import reset_report_schedulers
 
 ENV_OMNIBUS_BYPASS_EVENTS_DECODING = "OMNIBUS_BYPASS_EVENTS_DECODING"
 ENV_PARSE_EVENTS_FROM_LOCAL_ABI = "PARSE_EVENTS_FROM_LOCAL_ABI"
@@ -27,6 +29,13 @@ def shared_setup(fn_isolation):
     pass
 
 
+@pytest.fixture(scope="function", autouse=True)
+def report_schedulers():
+    yield
+    # the frame configs cached by the report schedulers might be changed by the test and reverted after it
+    reset_report_schedulers()
+
+
 @pytest.fixture(scope="function")
 def deployer():
     return accounts[0]
@@ -186,6 +195,19 @@ def autodeploy_contract(accounts):
     address = deploy_from_prepared_tx(accounts[0], "./utils/txs/tx-deploy-voting_for_upgrade.json")
 
 
+@pytest.fixture(scope="session", autouse=True)
+def seed_contract_names():
+    # the contracts from the config are resolved by address without name() calls
+    names = {address: name for name, addresses in get_contract_address_mapping().items() for address in addresses}
+    # the Voting proxy emits the ScriptResult events of the "Service events" group, it's named after the
+    # implementation as brownie does for the proxies from the explorer, but it's not in the local ABI mapping
+    # to keep registering the implementation ABI for the implementation address only
+    voting = get_config_params().get("VOTING")
+    if voting is not None:
+        names[voting] = "Voting"
+    get_contract_name_cache().seed(names)
+
+
 @pytest.fixture(scope="session", autouse=True)
 def parse_events_from_local_abi():
     if os.getenv(ENV_OMNIBUS_BYPASS_EVENTS_DECODING):
@@ -196,35 +218,7 @@ def parse_events_from_local_abi():
 
     # Used if env variable PARSE_EVENTS_FROM_LOCAL_ABI is set
     # Needed to enable events checking if ABI from Etherscan not available for any reason
-    contract_address_mapping = {
-        "AccountingOracle": [ACCOUNTING_ORACLE, ACCOUNTING_ORACLE_IMPL],
-        "ACL": [ACL_IMPL],
-        "Burner": [BURNER],
-        "CallsScript": [ARAGON_CALLS_SCRIPT],
-        "DepositSecurityModule": [DEPOSIT_SECURITY_MODULE],
-        "EIP712StETH": [EIP712_STETH],
-        "HashConsensus": [
-            HASH_CONSENSUS_FOR_AO,
-            HASH_CONSENSUS_FOR_VEBO,
-        ],
-        "LegacyOracle": [LEGACY_ORACLE, LEGACY_ORACLE_IMPL],
-        "Lido": [LIDO, LIDO_IMPL],
-        "LidoLocator": [LIDO_LOCATOR],
-        "LidoExecutionLayerRewardsVault": [EXECUTION_LAYER_REWARDS_VAULT],
-        "Kernel": [ARAGON_KERNEL_IMPL],
-        "NodeOperatorsRegistry": [NODE_OPERATORS_REGISTRY, NODE_OPERATORS_REGISTRY_IMPL],
-        "OracleDaemonConfig": [ORACLE_DAEMON_CONFIG],
-        "OracleReportSanityChecker": [ORACLE_REPORT_SANITY_CHECKER],
-        "Repo": [ARAGON_COMMON_REPO_IMPL],
-        "StakingRouter": [STAKING_ROUTER, STAKING_ROUTER_IMPL],
-        "ValidatorsExitBusOracle": [
-            VALIDATORS_EXIT_BUS_ORACLE,
-            VALIDATORS_EXIT_BUS_ORACLE_IMPL,
-        ],
-        "Voting": [VOTING_IMPL],
-        "WithdrawalQueueERC721": [WITHDRAWAL_QUEUE, WITHDRAWAL_QUEUE_IMPL],
-        "WithdrawalVault": [WITHDRAWAL_VAULT, WITHDRAWAL_VAULT_IMPL],
-    }
+    contract_address_mapping = get_contract_address_mapping()
 
     interface_path_template = "interfaces/{}.json"
     for contract_name, addresses in contract_address_mapping.items():
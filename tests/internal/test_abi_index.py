@@ -0,0 +1,152 @@
+import json
+import os
+import sqlite3
+
+import pytest
+from avotes_parser.core.ABI.provider import ABIProviderEtherscanAPI
+from avotes_parser.core.ABI.storage import ABI, ABIKey
+from avotes_parser.core.ABI.utilities.exceptions import ABIEtherscanStatusCode
+from avotes_parser.core.ABI.utilities.processing import index_function_description
+
+import utils.abi_index
+from utils.abi_index import ABI_INDEX_SCHEMA_VERSION, ABI_REFETCH_INTERVAL, ABIProviderIndexed
+
+NET = "mainnet"
+ADDRESS = "0x" + "ab" * 20
+
+
+def _function(name):
+    return {"type": "function", "name": name, "inputs": [], "outputs": [], "stateMutability": "nonpayable"}
+
+
+def _selector(name):
+    (selector,) = index_function_description([_function(name)])
+    return selector
+
+
+def _write_interface(directory, name, functions):
+    path = os.path.join(directory, f"{name}.json")
+    with open(path, "w") as fp:
+        json.dump([_function(function) for function in functions], fp)
+    return path
+
+
+class _Etherscan:
+    """Stubbed Etherscan answering with the ABIs of the known addresses and recording the requests"""
+
+    def __init__(self):
+        self.abis = {}
+        self.requests = []
+
+    def get_abi(self, key):
+        self.requests.append(key.ContractAddress)
+        if key.ContractAddress not in self.abis:
+            raise ABIEtherscanStatusCode("0", "NOTOK", "Contract source code not verified")
+        raw = [_function(function) for function in self.abis[key.ContractAddress]]
+        return ABI(raw=raw, func_storage=index_function_description(raw))
+
+
+@pytest.fixture
+def etherscan(monkeypatch):
+    etherscan = _Etherscan()
+    monkeypatch.setattr(ABIProviderEtherscanAPI, "get_abi", lambda provider, key: etherscan.get_abi(key))
+    return etherscan
+
+
+@pytest.fixture
+def interfaces(tmp_path):
+    directory = tmp_path / "interfaces"
+    directory.mkdir()
+    return str(directory)
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    return str(tmp_path / "abi_index.sqlite3")
+
+
+def _provider(interfaces, index_path):
+    return ABIProviderIndexed("api-key", NET, interfaces, index_path)
+
+
+def _resolve(provider, function, address=ADDRESS):
+    return provider.get_abi(ABIKey(address, _selector(function)))
+
+
+def test_abi_index_reindexes_changed_interfaces(interfaces, index_path, etherscan, monkeypatch):
+    changed = _write_interface(interfaces, "Changed", ["foo"])
+    _write_interface(interfaces, "Unchanged", ["bar"])
+    removed = _write_interface(interfaces, "Removed", ["baz"])
+    _provider(interfaces, index_path)
+
+    _write_interface(interfaces, "Changed", ["foo", "qux"])
+    os.utime(changed, ns=(os.stat(changed).st_atime_ns, os.stat(changed).st_mtime_ns + 1))
+    os.remove(removed)
+    loaded = []
+    load = utils.abi_index.json.load
+    monkeypatch.setattr(utils.abi_index.json, "load", lambda fp: loaded.append(fp.name) or load(fp))
+
+    provider = _provider(interfaces, index_path)
+
+    # only the changed file is read again
+    assert loaded == [os.path.abspath(changed)]
+    assert _selector("qux") in _resolve(provider, "qux").func_storage
+    assert _selector("bar") in _resolve(provider, "bar").func_storage
+    with pytest.raises(utils.abi_index.ABIResolvingError):
+        _resolve(provider, "baz")
+
+
+def test_abi_index_schema_version_bump(interfaces, index_path, etherscan):
+    with sqlite3.connect(index_path) as db:
+        db.executescript(
+            """
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE addresses (net TEXT NOT NULL, address TEXT NOT NULL, abi_id INTEGER);
+            INSERT INTO meta (key, value) VALUES ('schema_version', '0');
+            INSERT INTO addresses (net, address, abi_id) VALUES ('mainnet', '0xabab', NULL);
+            """
+        )
+    etherscan.abis[ADDRESS] = ["foo"]
+
+    provider = _provider(interfaces, index_path)
+
+    assert _selector("foo") in _resolve(provider, "foo").func_storage
+    with sqlite3.connect(index_path) as db:
+        assert db.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone() == (
+            ABI_INDEX_SCHEMA_VERSION,
+        )
+        assert db.execute("SELECT address FROM addresses").fetchall() == [(ADDRESS,)]
+
+
+def test_abi_index_warm_run(interfaces, index_path, etherscan):
+    # the proxy ABI stored for the address lacks the implementation selector found in the local interfaces
+    _write_interface(interfaces, "Implementation", ["foo"])
+    etherscan.abis[ADDRESS] = ["proxyType"]
+    unverified = "0x" + "cd" * 20
+
+    cold = _provider(interfaces, index_path)
+    assert _selector("foo") in _resolve(cold, "foo").func_storage
+    assert _selector("foo") in _resolve(cold, "foo", unverified).func_storage
+    assert etherscan.requests == [ADDRESS, unverified]
+
+    warm = _provider(interfaces, index_path)
+    assert _selector("proxyType") in _resolve(warm, "proxyType").func_storage
+    assert _selector("foo") in _resolve(warm, "foo").func_storage
+    assert _selector("foo") in _resolve(warm, "foo", unverified).func_storage
+    assert etherscan.requests == [ADDRESS, unverified]
+
+
+def test_abi_index_refetches_upgraded_contract(interfaces, index_path, etherscan, monkeypatch):
+    etherscan.abis[ADDRESS] = ["foo"]
+    _resolve(_provider(interfaces, index_path), "foo")
+
+    # the contract is upgraded, the new selector is known neither to the stored ABI nor to the local interfaces
+    etherscan.abis[ADDRESS] = ["foo", "bar"]
+    assert _selector("bar") not in _resolve(_provider(interfaces, index_path), "bar").func_storage
+    assert etherscan.requests == [ADDRESS]
+
+    now = utils.abi_index.time.time()
+    monkeypatch.setattr(utils.abi_index.time, "time", lambda: now + ABI_REFETCH_INTERVAL + 1)
+    assert _selector("bar") in _resolve(_provider(interfaces, index_path), "bar").func_storage
+    assert _selector("bar") in _resolve(_provider(interfaces, index_path), "bar").func_storage
+    assert etherscan.requests == [ADDRESS, ADDRESS]
@@ -0,0 +1,130 @@
+import pytest
+from brownie.network.event import EventDict
+
+from utils.test.event_validators.common import (
+    EventsValidator,
+    _compile_events_chain,
+    validate_events_chain,
+    validate_events_groups,
+)
+from utils.test.event_validators.vote_items import VoteItemExpectation, validate_vote_items
+from utils.test.event_validators.voting import validate_change_objection_time_event, validate_change_vote_time_event
+
+
+def _legacy_validate_events_chain(tx_events, reference_events):
+    for ev in tx_events:
+        idx = next((reference_events.index(e) for e in reference_events if e == ev), len(reference_events))
+        assert idx != len(reference_events), f"{ev} not found in the remaining {reference_events} events chain"
+        reference_events = reference_events[idx + 1 :]
+
+
+def _assertion_message(validate, *args):
+    try:
+        validate(*args)
+    except AssertionError as e:
+        return str(e).splitlines()[0]
+    return None
+
+
+@pytest.mark.parametrize(
+    "tx_events,reference_events",
+    [
+        (["A", "B", "C"], ["A", "B", "C"]),
+        (["A", "B", "D"], ["A", "B", "C", "D"]),
+        (["A", "B", "D"], ["A", "B", "C"]),
+        (["A", "B", "A", "B"], ["A", "B"]),
+        (["A", "C", "B"], ["A", "B", "C"]),
+        (["A", "A", "B"], ["A", "B", "A", "B"]),
+        ([], []),
+        (["A"], []),
+    ],
+)
+def test_validate_events_chain_matches_legacy(tx_events, reference_events):
+    assert _assertion_message(validate_events_chain, tx_events, reference_events) == _assertion_message(
+        _legacy_validate_events_chain, tx_events, reference_events
+    )
+
+
+def _event(name, **fields):
+    return {
+        "name": name,
+        "address": "0x" + "11" * 20,
+        "decoded": True,
+        "data": [{"name": key, "type": "uint256", "value": value, "decoded": True} for key, value in fields.items()],
+    }
+
+
+def test_validate_events_groups_reports_all_mismatches():
+    validator = EventsValidator(
+        ["LogScriptCall", "NodeOperatorAdded", "ScriptResult"],
+        counts={"NodeOperatorAdded": 1},
+        fields={"NodeOperatorAdded": {"nodeOperatorId": 1, "stakingLimit": 0}},
+    )
+    valid = EventDict([_event("LogScriptCall"), _event("NodeOperatorAdded", nodeOperatorId=1, stakingLimit=0)])
+    invalid = EventDict(
+        [
+            _event("LogScriptCall"),
+            _event("NodeOperatorAdded", nodeOperatorId=2, stakingLimit=0),
+            _event("NodeOperatorAdded", nodeOperatorId=3),
+            _event("LogScriptCall"),
+        ]
+    )
+
+    validate_events_groups([valid, valid], [validator, validator])
+    assert validator.mismatches(invalid) == [
+        "NodeOperatorAdded not found in the remaining ['ScriptResult'] events chain",
+        "NodeOperatorAdded fired 2 times, expected 1",
+        "NodeOperatorAdded #0 nodeOperatorId: 2 != 1",
+    ]
+    with pytest.raises(AssertionError) as e:
+        validate_events_groups([valid, invalid], [validator, validator, validator])
+    assert str(e.value).splitlines() == [
+        "2 vote items, expected 3",
+        "Vote item #2: NodeOperatorAdded not found in the remaining ['ScriptResult'] events chain",
+        "Vote item #2: NodeOperatorAdded fired 2 times, expected 1",
+        "Vote item #2: NodeOperatorAdded #0 nodeOperatorId: 2 != 1",
+    ]
+
+
+def test_validate_events_chain_reuses_compiled_chain():
+    reference_events = ["LogScriptCall"] + [f"Event{i % 50}" for i in range(500)] + ["ScriptResult"]
+    tx_events = reference_events[::2]
+    _compile_events_chain.cache_clear()
+
+    for _ in range(3):
+        validate_events_chain(tx_events, list(reference_events))
+    EventsValidator(reference_events).validate(EventDict([_event(name) for name in tx_events]))
+
+    cache_info = _compile_events_chain.cache_info()
+    # compiled once, looked up by every validation and on the EventsValidator creation
+    assert (cache_info.misses, cache_info.hits) == (1, 4)
+
+
+def test_validate_vote_items_report():
+    vote_time = EventDict([_event("LogScriptCall"), _event("ChangeVoteTime", voteTime=100)])
+    objection_time = EventDict([_event("LogScriptCall"), _event("ChangeObjectionPhaseTime", objectionPhaseTime=10)])
+    groups = [vote_time, objection_time, vote_time]
+    expectations = [
+        VoteItemExpectation(1, validate_change_vote_time_event, (100,)),
+        VoteItemExpectation(2, validate_change_objection_time_event, (20,)),
+        VoteItemExpectation(2, EventsValidator(["LogScriptCall", "ChangeObjectionPhaseTime"])),
+        VoteItemExpectation(4, validate_change_vote_time_event, (100,)),
+    ]
+
+    report = validate_vote_items(groups, expectations)
+
+    assert [(check.item, check.validator, check.error is None) for check in report.checks] == [
+        (1, "validate_change_vote_time_event", True),
+        (2, "validate_change_objection_time_event", False),
+        (2, "EventsValidator", True),
+        (3, "-", False),
+        (4, "validate_change_vote_time_event", False),
+    ]
+    assert report.failed[0].error == "Wrong objectionPhaseTime"
+    with pytest.raises(AssertionError) as e:
+        report.assert_valid()
+    assert str(e.value).splitlines()[0] == "2/5 vote item checks passed"
+
+    validate_vote_items(
+        groups, [VoteItemExpectation(i, validate_change_vote_time_event, (100,)) for i in (1, 3)] + expectations[2:3]
+    ).assert_valid()
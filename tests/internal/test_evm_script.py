@@ -0,0 +1,244 @@
+import threading
+import eth_abi
+import pytest
+from eth_typing.evm import HexAddress
+from avotes_parser.core import parse_script
+from avotes_parser.core.ABI import ABILocalNotFound
+from avotes_parser.core.ABI.storage import ABI
+from avotes_parser.core.ABI.utilities.processing import index_function_description
+from avotes_parser.core.parsing import ParseStructureError
+from web3 import Web3
+
+import utils.evm_script
+from utils.evm_script import (
+    EVMScriptBuilder,
+    EVMScriptView,
+    encode_call_script,
+    create_executor_id,
+    strip_byte_prefix,
+    decode_evm_script,
+)
+
+NODE_OPERATORS_REGISTRY = "0x55032650b14df07b85bF18A3a3eC8E0Af2e028d5"
+# setNodeOperatorStakingLimit(uint256,uint64)
+SET_STAKING_LIMIT_SELECTOR = "ae962acf"
+AGENT = "0x3e40D73EB977Dc6a537aF587D48316feE66E9C8c"
+# forward(bytes)
+FORWARD_SELECTOR = "d948d468"
+
+
+def _legacy_encode_call_script(actions, spec_id=1) -> str:
+    result = create_executor_id(spec_id)
+    for to, calldata in actions:
+        addr_bytes = Web3.toBytes(hexstr=HexAddress(to)).hex()
+        calldata_bytes = strip_byte_prefix(calldata)
+        length = eth_abi.encode_single("int256", len(calldata_bytes) // 2).hex()
+        result += addr_bytes + length[56:] + calldata_bytes
+    return result
+
+
+def _staking_limits_actions(count: int):
+    return [
+        (NODE_OPERATORS_REGISTRY, f"0x{SET_STAKING_LIMIT_SELECTOR}{id:064x}{1000 + id:064x}") for id in range(count)
+    ]
+
+
+def _agent_forward(actions):
+    script = bytes.fromhex(encode_call_script(actions)[2:])
+    return (AGENT, f"0x{FORWARD_SELECTOR}" + eth_abi.encode(["bytes"], [script]).hex())
+
+
+def test_encode_call_script_empty():
+    assert encode_call_script([]) == "0x00000001"
+    assert EVMScriptBuilder().to_bytes() == bytes.fromhex("00000001")
+
+
+def test_encode_call_script_matches_legacy_encoding():
+    actions = _staking_limits_actions(3) + [(NODE_OPERATORS_REGISTRY, "0x")]
+    assert encode_call_script(actions) == _legacy_encode_call_script(actions)
+
+
+def test_evm_script_builder_incremental():
+    actions = _staking_limits_actions(5)
+    builder = EVMScriptBuilder()
+    for to, calldata in actions:
+        builder.add(to, bytes.fromhex(calldata[2:]))
+
+    assert len(builder) == 5
+    assert builder.to_hex() == encode_call_script(actions)
+    assert builder.to_bytes() == bytes.fromhex(encode_call_script(actions)[2:])
+
+
+def test_evm_script_builder_rejects_bad_address():
+    with pytest.raises(ValueError):
+        EVMScriptBuilder().add("0x1234", "0x")
+
+
+def test_evm_script_view_random_access():
+    actions = _staking_limits_actions(4)
+    script = EVMScriptView(encode_call_script(actions))
+
+    assert len(script) == 4
+    assert script.spec_id == "0x00000001"
+
+    index, address, selector, calldata = script[2]
+    assert index == 2
+    assert address == NODE_OPERATORS_REGISTRY.lower()
+    assert selector == f"0x{SET_STAKING_LIMIT_SELECTOR}"
+    assert isinstance(calldata, memoryview)
+    assert calldata.hex() == actions[2][1][10:]
+    assert script[-1][0] == 3
+
+
+def test_evm_script_view_iteration_matches_parse_script():
+    script = encode_call_script(_staking_limits_actions(10))
+    parsed = parse_script(script)
+
+    for (index, address, selector, calldata), call in zip(EVMScriptView(script), parsed.calls, strict=True):
+        assert address == call.address.lower()
+        assert selector == call.method_id
+        assert "0x" + calldata.hex() == call.encoded_call_data
+
+
+def test_evm_script_view_short_calldata():
+    actions = [(NODE_OPERATORS_REGISTRY, "0x"), (NODE_OPERATORS_REGISTRY, "0x1234")] + _staking_limits_actions(1)
+    script = EVMScriptView(encode_call_script(actions))
+
+    assert len(script) == 3
+    assert [(selector, calldata.hex()) for _, _, selector, calldata in script] == [
+        ("0x", ""),
+        ("0x", "1234"),
+        (f"0x{SET_STAKING_LIMIT_SELECTOR}", actions[2][1][10:]),
+    ]
+    assert EVMScriptBuilder().extend(
+        (address, "0x" + selector[2:] + calldata.hex()) for _, address, selector, calldata in script
+    ).to_hex() == encode_call_script(actions)
+
+
+def test_evm_script_view_malformed():
+    script = encode_call_script(_staking_limits_actions(1))
+    with pytest.raises(ParseStructureError):
+        EVMScriptView(script[:-2])
+
+
+class _UnresolvedABIStorage:
+    def __getitem__(self, key):
+        raise ABILocalNotFound(key.FunctionSignature)
+
+
+def test_decode_evm_script_repeated_calls(monkeypatch):
+    monkeypatch.setattr(utils.evm_script, "get_abi_cache", lambda *_: _UnresolvedABIStorage())
+    actions = _staking_limits_actions(3)
+
+    assert len(decode_evm_script(encode_call_script(actions), verbose=False)) == 3
+
+    with pytest.raises(RuntimeError, match="Previous is 2/4"):
+        decode_evm_script(encode_call_script(actions + [actions[1]]), verbose=False)
+
+
+def _function_abi(name, inputs):
+    return {
+        "name": name,
+        "type": "function",
+        "stateMutability": "nonpayable",
+        "inputs": [{"name": name, "type": type_} for name, type_ in inputs],
+        "outputs": [],
+    }
+
+
+class _ABIStorage:
+    """ABI storage knowing the agent and the node operators registry, which records the requested keys"""
+
+    ABIS = {
+        AGENT.lower(): [_function_abi("forward", [("_evmScript", "bytes")])],
+        NODE_OPERATORS_REGISTRY.lower(): [
+            _function_abi("setNodeOperatorStakingLimit", [("_id", "uint256"), ("_stakingLimit", "uint64")])
+        ],
+    }
+
+    def __init__(self):
+        self.requests = []
+
+    def __getitem__(self, key):
+        self.requests.append(key)
+        raw = self.ABIS[key.ContractAddress.lower()]
+        return ABI(raw=raw, func_storage=index_function_description(raw))
+
+
+def test_decode_evm_script_repeated_calls_across_nesting_levels(monkeypatch):
+    monkeypatch.setattr(utils.evm_script, "get_abi_cache", lambda *_: _ABIStorage())
+    (direct, *others) = _staking_limits_actions(3)
+
+    with pytest.raises(RuntimeError, match=r"Previous is 1/2:(.|\n)*Current is 2/2 -> 3/3\n"):
+        decode_evm_script(encode_call_script([direct, _agent_forward(others + [direct])]), verbose=False)
+
+    with pytest.raises(RuntimeError, match=r"Previous is 1/2 -> 1/1:(.|\n)*Current is 2/2\n"):
+        decode_evm_script(encode_call_script([_agent_forward([direct]), direct]), verbose=False)
+
+
+def test_decode_evm_script_distinct_large_calldata(monkeypatch):
+    monkeypatch.setattr(utils.evm_script, "get_abi_cache", lambda *_: _UnresolvedABIStorage())
+    calldata = f"0x{SET_STAKING_LIMIT_SELECTOR}" + "ab" * 100_000
+    # the calls differ only in the last calldata byte
+    actions = [(NODE_OPERATORS_REGISTRY, calldata + last_byte) for last_byte in ("00", "01")]
+
+    assert len(decode_evm_script(encode_call_script(actions), verbose=False)) == 2
+
+
+LDO = "0x5A98FcBEA516Cf06857215779Fd812CA3beF1B32"
+STETH = "0xae7ab96520DE3A18E5e111B5EaAb095312D7fE84"
+
+
+class _ProviderABIStorage(_ABIStorage):
+    """Caching ABI storage over a stubbed provider, whose fetches wait for each other on the barrier"""
+
+    ABIS = {
+        **_ABIStorage.ABIS,
+        LDO.lower(): [_function_abi("transfer", [("_to", "address"), ("_amount", "uint256")])],
+        STETH.lower(): [_function_abi("transfer", [("_to", "address"), ("_amount", "uint256")])],
+    }
+
+    def __init__(self, barrier=None):
+        super().__init__()
+        self.barrier = barrier
+        self.cache = {}
+
+    def __getitem__(self, key):
+        if (key.ContractAddress, key.FunctionSignature) not in self.cache:
+            if self.barrier is not None:
+                # fails unless the other key of the nesting level is fetched at the same time
+                self.barrier.wait()
+            self.cache[(key.ContractAddress, key.FunctionSignature)] = super().__getitem__(key)
+        return self.cache[(key.ContractAddress, key.FunctionSignature)]
+
+
+def _transfer(token, amount):
+    return (token, "0xa9059cbb" + eth_abi.encode(["address", "uint256"], [AGENT, amount]).hex())
+
+
+def test_decode_evm_script_batched(monkeypatch):
+    (direct, nested) = _staking_limits_actions(2)
+    # every nesting level calls two contracts whose ABIs aren't resolved yet
+    script = encode_call_script([direct, _agent_forward([_transfer(LDO, 1), _transfer(STETH, 2), nested])])
+
+    monkeypatch.setattr(utils.evm_script, "get_abi_cache", lambda *_: _ProviderABIStorage())
+    sequential = decode_evm_script(script, verbose=False)
+
+    storage = _ProviderABIStorage(threading.Barrier(2, timeout=5))
+    monkeypatch.setattr(utils.evm_script, "get_abi_cache", lambda *_: storage)
+    parsed = []
+    monkeypatch.setattr(utils.evm_script, "parse_script", lambda script: parsed.append(script) or parse_script(script))
+    batched = decode_evm_script(script, verbose=False, batched=True)
+
+    assert repr(batched) == repr(sequential)
+    assert len(batched) == 2 and len(batched[1].inputs[0].value) == 3
+    # each key is fetched once, each script is parsed once
+    assert sorted((key.ContractAddress.lower(), key.FunctionSignature) for key in storage.requests) == sorted(
+        [
+            (NODE_OPERATORS_REGISTRY.lower(), f"0x{SET_STAKING_LIMIT_SELECTOR}"),
+            (AGENT.lower(), f"0x{FORWARD_SELECTOR}"),
+            (LDO.lower(), "0xa9059cbb"),
+            (STETH.lower(), "0xa9059cbb"),
+        ]
+    )
+    assert len(parsed) == 2
@@ -0,0 +1,73 @@
+import itertools
+
+from hypothesis import given, settings, strategies as st
+
+from utils.test.extra_data import ExtraDataItem, ExtraDataService, ItemPayload, ItemType
+
+
+def _legacy_build_validators_payloads(validators, max_no_in_payload_count):
+    operator_validators = sorted(validators.items(), key=lambda x: x[0])
+    payloads = []
+    for module_id, operators_by_module in itertools.groupby(operator_validators, key=lambda x: x[0][0]):
+        operator_ids = []
+        vals_count = []
+        for (_, no_id), validators_count in list(operators_by_module)[:max_no_in_payload_count]:
+            operator_ids.append(no_id.to_bytes(8, byteorder="big"))
+            vals_count.append(validators_count.to_bytes(16, byteorder="big"))
+        payloads.append(
+            ItemPayload(
+                module_id=module_id.to_bytes(3, byteorder="big"),
+                node_ops_count=len(operator_ids).to_bytes(8, byteorder="big"),
+                node_operator_ids=b"".join(operator_ids),
+                vals_counts=b"".join(vals_count),
+            )
+        )
+    return payloads
+
+
+def _legacy_to_bytes(extra_data):
+    extra_data_bytes = b""
+    for item in extra_data:
+        extra_data_bytes += item.item_index
+        extra_data_bytes += item.item_type.value.to_bytes(2, byteorder="big")
+        extra_data_bytes += item.item_payload.module_id
+        extra_data_bytes += item.item_payload.node_ops_count
+        extra_data_bytes += item.item_payload.node_operator_ids
+        extra_data_bytes += item.item_payload.vals_counts
+    return extra_data_bytes
+
+
+def _legacy_encode(stuck_validators, exited_validators, max_items_count, max_no_in_payload_count):
+    extra_data = ExtraDataService.build_extra_data(
+        _legacy_build_validators_payloads(stuck_validators, max_no_in_payload_count),
+        _legacy_build_validators_payloads(exited_validators, max_no_in_payload_count),
+        max_items_count,
+    )
+    return _legacy_to_bytes(extra_data)
+
+
+validators_strategy = st.dictionaries(
+    st.tuples(st.integers(0, 2**24 - 1), st.integers(0, 2**64 - 1)),
+    st.integers(0, 2**128 - 1),
+    max_size=50,
+)
+
+
+@settings(max_examples=300, deadline=None)
+@given(validators_strategy, validators_strategy, st.integers(1, 20), st.integers(0, 20))
+def test_extra_data_encoding_matches_legacy(stuck, exited, max_items_count, max_no_in_payload_count):
+    for validators in (stuck, exited):
+        assert ExtraDataService.build_validators_payloads(
+            validators, max_no_in_payload_count
+        ) == _legacy_build_validators_payloads(validators, max_no_in_payload_count)
+
+    extra_data = ExtraDataService().collect(stuck, exited, max_items_count, max_no_in_payload_count)
+    assert extra_data.extra_data == _legacy_encode(stuck, exited, max_items_count, max_no_in_payload_count)
+
+
+def test_to_bytes_keeps_fields_as_is():
+    payload = ItemPayload(module_id=b"\x01", node_ops_count=b"", node_operator_ids=b"\x02\x03", vals_counts=b"\x04")
+    extra_data = [
+        ExtraDataItem(item_index=b"\x00" * 3, item_type=item_type, item_payload=payload) for item_type in ItemType
+    ]
+    assert ExtraDataService.to_bytes(extra_data) == _legacy_to_bytes(extra_data)
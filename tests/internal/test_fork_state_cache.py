@@ -0,0 +1,91 @@
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+import requests
+
+import utils.fork_state_cache
+from utils.fork_state_cache import MISSING, ForkStateCache, find_cached_block, make_handler, prune_cached_blocks
+
+CHAIN_ID = 1
+BLOCK = 17_000_000
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    requests_log = []
+
+    def upstream_request(session, upstream, payload):
+        requests_log.append(payload)
+        method, params = payload["method"], payload["params"]
+        if method == "eth_getBlockByNumber" and params[0] != hex(BLOCK):
+            # unknown block
+            return {"jsonrpc": "2.0", "id": payload["id"], "result": None}
+        if method == "eth_getBalance":
+            return {"jsonrpc": "2.0", "id": payload["id"], "result": "0x64"}
+        return {"jsonrpc": "2.0", "id": payload["id"], "error": {"code": -32601, "message": "not supported"}}
+
+    monkeypatch.setattr(utils.fork_state_cache, "_upstream_request", upstream_request)
+    return requests_log
+
+
+def _serve(cache: ForkStateCache):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(cache, "http://upstream"))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _run_session(cache_dir, requests_batch):
+    cache = ForkStateCache(cache_dir, CHAIN_ID, BLOCK)
+    server, url = _serve(cache)
+    try:
+        return requests.post(url, json=requests_batch, timeout=10).json()
+    finally:
+        server.shutdown()
+        cache.save()
+
+
+def test_fork_state_cache_record_replay(tmp_path, upstream):
+    batch = [
+        {"jsonrpc": "2.0", "id": 1, "method": "eth_getBalance", "params": ["0x" + "11" * 20, "latest"]},
+        {"jsonrpc": "2.0", "id": 2, "method": "eth_getBlockByNumber", "params": [hex(BLOCK + 1), False]},
+        {"jsonrpc": "2.0", "id": 3, "method": "eth_getCode", "params": ["0x" + "11" * 20, "latest"]},
+        {"jsonrpc": "2.0", "id": 4, "method": "eth_blockNumber", "params": []},
+    ]
+
+    recorded = _run_session(str(tmp_path), batch)
+    assert [response.get("result") for response in recorded] == ["0x64", None, None, hex(BLOCK)]
+    assert "error" in recorded[2]
+    # the moving block tags are pinned to the fork block
+    assert upstream[0]["params"] == ["0x" + "11" * 20, hex(BLOCK)]
+    assert len(upstream) == 3
+
+    replayed = _run_session(str(tmp_path), batch)
+    assert replayed[:2] == recorded[:2]
+    # only the failed request goes to the upstream again, the `null` result is replayed
+    assert [request["method"] for request in upstream[3:]] == ["eth_getCode"]
+
+
+def test_fork_state_cache_miss(tmp_path):
+    cache = ForkStateCache(str(tmp_path), CHAIN_ID, BLOCK)
+    key = ForkStateCache.key("eth_getBlockByNumber", ["0x1", False])
+
+    assert cache.get(key) is MISSING
+    cache.put(key, None)
+    assert cache.get(key) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_fork_state_cache_prune(tmp_path):
+    for chain_id, block in [(CHAIN_ID, BLOCK - 100), (CHAIN_ID, BLOCK - 10), (CHAIN_ID, BLOCK), (5, BLOCK - 100)]:
+        cache = ForkStateCache(str(tmp_path), chain_id, block)
+        cache.put(ForkStateCache.key("eth_chainId", []), hex(chain_id))
+        cache.save()
+
+    assert prune_cached_blocks(str(tmp_path), CHAIN_ID, BLOCK + 1, max_age=10) == [BLOCK - 100, BLOCK - 10]
+    assert find_cached_block(str(tmp_path), CHAIN_ID, BLOCK + 1, max_age=10) == BLOCK
+    # the other chains are kept
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        f"{CHAIN_ID}-{BLOCK}.json.gz",
+        f"5-{BLOCK - 100}.json.gz",
+    ]
@@ -0,0 +1,117 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from brownie.network.contract import ContractCall
+from eth_abi.abi import decode, encode
+
+import utils.node_operators
+import utils.rpc_batch
+from utils.node_operators import NodeOperatorsSnapshot, get_node_operators
+
+OPERATORS_COUNT = 7
+HEIGHT = 17_000_000
+REGISTRY = "0x55032650b14df07b85bF18A3a3eC8E0Af2e028d5"
+
+
+def _operator(id):
+    return (id % 2 == 0, f"operator {id}", "0x" + f"{id + 1:040x}", 100 + id, id, 200 + id, 50 + id)
+
+
+def _summary(id):
+    return (id % 3 == 0, id, 2 * id, 3 * id, 1_700_000_000 + id, id, 50 + id, 10 * id)
+
+
+class _Registry:
+    """NodeOperatorsRegistry with the real ABI of the read methods"""
+
+    def __init__(self, reverted_id=None):
+        with open("interfaces/NodeOperatorsRegistry.json") as fp:
+            abi = {entry["name"]: entry for entry in json.load(fp) if entry.get("type") == "function"}
+        self.address = REGISTRY
+        self.getNodeOperator = ContractCall(REGISTRY, abi["getNodeOperator"], "getNodeOperator", None)
+        self.getNodeOperatorSummary = ContractCall(
+            REGISTRY, abi["getNodeOperatorSummary"], "getNodeOperatorSummary", None
+        )
+        self.reverted_id = reverted_id
+        self.count_blocks = []
+
+    def getNodeOperatorsCount(self, block_identifier):
+        self.count_blocks.append(block_identifier)
+        return OPERATORS_COUNT
+
+    def eth_call(self, tx):
+        data = bytes.fromhex(tx["data"][2:])
+        for method, (types, result) in (
+            (self.getNodeOperator, (["uint256", "bool"], _operator)),
+            (self.getNodeOperatorSummary, (["uint256"], _summary)),
+        ):
+            if data[:4].hex() == method.signature[2:]:
+                (id, *_) = decode(types, data[4:])
+                if id == self.reverted_id:
+                    return None
+                output_types = [output["type"] for output in method.abi["outputs"]]
+                return "0x" + encode(output_types, list(result(id))).hex()
+        raise AssertionError(f"unexpected call {tx}")
+
+
+@pytest.fixture
+def node(monkeypatch):
+    """Stubbed HTTP node answering the JSON-RPC batches of eth_call for the registry"""
+    node = SimpleNamespace(registry=_Registry(), batches=[])
+
+    def make_post_request(endpoint_uri, data, **kwargs):
+        requests = json.loads(data)
+        node.batches.append([request["params"][1] for request in requests])
+        responses = []
+        for request in requests:
+            result = node.registry.eth_call(request["params"][0])
+            if result is None:
+                responses.append({"id": request["id"], "error": {"code": 3, "message": "execution reverted"}})
+            else:
+                responses.append({"id": request["id"], "result": result})
+        return json.dumps(responses).encode()
+
+    provider = SimpleNamespace(endpoint_uri="http://node", get_request_kwargs=lambda: {})
+    monkeypatch.setattr(utils.rpc_batch, "web3", SimpleNamespace(provider=provider))
+    monkeypatch.setattr(utils.rpc_batch, "make_post_request", make_post_request)
+    monkeypatch.setattr(utils.node_operators, "chain", SimpleNamespace(height=HEIGHT))
+    return node
+
+
+def test_node_operators_snapshot_chunked(node):
+    snapshot = NodeOperatorsSnapshot.read(node.registry, chunk_size=3)
+
+    assert snapshot.block == HEIGHT
+    assert len(snapshot) == OPERATORS_COUNT
+    for id in range(OPERATORS_COUNT):
+        assert tuple(snapshot.node_operator(id).values()) == _operator(id)
+        (is_target_limit_active, target, stuck, refunded, penalty_end, _, _, depositable) = _summary(id)
+        assert snapshot.is_target_limit_active[id] == is_target_limit_active
+        assert snapshot.target_validators_count[id] == target
+        assert snapshot.stuck_validators_count[id] == stuck
+        assert snapshot.refunded_validators_count[id] == refunded
+        assert snapshot.stuck_penalty_end_timestamp[id] == penalty_end
+        assert snapshot.depositable_validators_count[id] == depositable
+    assert snapshot.total_vetted[[0, 2]] == [100, 102]
+
+    # 2 * 7 calls in batches of 3, all of them pinned to the snapshot block
+    assert [len(batch) for batch in node.batches] == [3, 3, 3, 3, 2]
+    assert {block for batch in node.batches for block in batch} == {hex(HEIGHT)}
+    assert node.registry.count_blocks == [HEIGHT]
+
+
+def test_get_node_operators_pinned_to_chain_height(node):
+    node_operators = get_node_operators(node.registry)
+
+    assert [operator["index"] for operator in node_operators] == list(range(OPERATORS_COUNT))
+    assert node_operators[3]["name"] == "operator 3"
+    assert node.registry.count_blocks == [HEIGHT]
+    assert {block for batch in node.batches for block in batch} == {hex(HEIGHT)}
+
+
+def test_node_operators_snapshot_failed_call(node):
+    node.registry.reverted_id = 4
+
+    with pytest.raises(ValueError, match=rf"getNodeOperator\(4, True\) failed at block {HEIGHT}"):
+        NodeOperatorsSnapshot.read(node.registry, block=HEIGHT)
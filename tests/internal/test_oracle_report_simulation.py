@@ -0,0 +1,266 @@
+import pytest
+from hexbytes import HexBytes
+
+import utils.test.oracle_report_helpers as oracle_report_helpers
+from utils.test.helpers import ETH
+from utils.test.oracle_report_helpers import (
+    DEPOSIT_SIZE,
+    UNLIMITED_REBASE,
+    AccountingState,
+    simulate_report_offline,
+)
+
+TOTAL_FEE = 10 * 10**18
+FEE_PRECISION_POINTS = 100 * 10**18
+
+
+def _state(max_positive_token_rebase=750_000, total_fee=TOTAL_FEE):
+    return AccountingState(
+        depositedValidators=1_010,
+        beaconValidators=1_000,
+        beaconBalance=ETH(32_000),
+        bufferedEther=ETH(100),
+        totalShares=ETH(30_000),
+        maxPositiveTokenRebase=max_positive_token_rebase,
+        totalFee=total_fee,
+        feePrecisionPoints=FEE_PRECISION_POINTS,
+    )
+
+
+def _simulate(state, cl_diff=0, appeared_validators=0, withdrawals=0, el_rewards=0, shares_to_burn=0):
+    return simulate_report_offline(
+        state,
+        beaconValidators=state.beaconValidators + appeared_validators,
+        postCLBalance=state.beaconBalance + appeared_validators * DEPOSIT_SIZE + cl_diff,
+        withdrawalVaultBalance=withdrawals,
+        elRewardsVaultBalance=el_rewards,
+        sharesRequestedToBurn=shares_to_burn,
+    )
+
+
+def test_total_pooled_ether():
+    assert _state().totalPooledEther == ETH(100) + ETH(32_000) + 10 * DEPOSIT_SIZE
+
+
+def test_simulate_report_rewards():
+    state = _state()
+    rewards = ETH(5) + ETH(1) + ETH(2)
+    fee_shares = (
+        rewards
+        * TOTAL_FEE
+        * state.totalShares
+        // ((state.totalPooledEther + rewards) * FEE_PRECISION_POINTS - rewards * TOTAL_FEE)
+    )
+
+    # the appeared validators deposits are not rewards
+    assert _simulate(state, cl_diff=ETH(5), appeared_validators=2, withdrawals=ETH(1), el_rewards=ETH(2)) == (
+        state.totalPooledEther + rewards,
+        state.totalShares + fee_shares,
+        ETH(1),
+        ETH(2),
+    )
+    assert _simulate(_state(total_fee=0), cl_diff=ETH(5))[1] == state.totalShares
+
+
+def test_simulate_report_negative_rebase():
+    state = _state()
+    # no fee on the CL balance decrease even with the EL rewards
+    assert _simulate(state, cl_diff=-ETH(3), el_rewards=ETH(1)) == (
+        state.totalPooledEther - ETH(2),
+        state.totalShares,
+        0,
+        ETH(1),
+    )
+
+
+def test_simulate_report_rebase_limit():
+    state = _state()
+    limit = state.totalPooledEther * 750_000 // 10**9
+
+    (post_total_pooled_ether, _, withdrawals, el_rewards) = _simulate(
+        state, cl_diff=limit - ETH(1), withdrawals=ETH(3), el_rewards=ETH(2)
+    )
+    # the vaults are withdrawn only up to the rebase limit
+    assert (withdrawals, el_rewards) == (ETH(1), 0)
+    assert post_total_pooled_ether == state.totalPooledEther + limit
+
+    assert _simulate(_state(UNLIMITED_REBASE), cl_diff=limit, withdrawals=ETH(3), el_rewards=ETH(2))[2:] == (
+        ETH(3),
+        ETH(2),
+    )
+
+
+@pytest.mark.parametrize("cl_diff,burnt", [(0, ETH(10)), (ETH(30), 0)])
+def test_simulate_report_shares_to_burn(cl_diff, burnt):
+    # nothing is burnt once the rebase limit is reached
+    state = _state(total_fee=0)
+    assert _simulate(state, cl_diff=cl_diff, shares_to_burn=ETH(10))[1] == state.totalShares - burnt
+
+
+class _ConsensusContract:
+    address = "0x" + "11" * 20
+    SLOTS_PER_EPOCH, SECONDS_PER_SLOT, GENESIS_TIME = 32, 12, 1_606_824_023
+    INITIAL_EPOCH, EPOCHS_PER_FRAME = 201_600, 225
+
+    def __init__(self, chain):
+        self.chain = chain
+        self.calls = 0
+
+    def getChainConfig(self):
+        self.calls += 1
+        return (self.SLOTS_PER_EPOCH, self.SECONDS_PER_SLOT, self.GENESIS_TIME)
+
+    def getFrameConfig(self):
+        self.calls += 1
+        return (self.INITIAL_EPOCH, self.EPOCHS_PER_FRAME, 10)
+
+    def getCurrentFrame(self):
+        return (self.ref_slot(self.chain.time()), 0)
+
+    def ref_slot(self, timestamp):
+        # HashConsensus._getCurrentFrame()
+        epoch = (timestamp - self.GENESIS_TIME) // self.SECONDS_PER_SLOT // self.SLOTS_PER_EPOCH
+        frame_index = (epoch - self.INITIAL_EPOCH) // self.EPOCHS_PER_FRAME
+        return (self.INITIAL_EPOCH + frame_index * self.EPOCHS_PER_FRAME) * self.SLOTS_PER_EPOCH - 1
+
+
+class _Chain:
+    def __init__(self, time):
+        self._time = time
+        self.mined = 0
+
+    def time(self):
+        return self._time
+
+    def sleep(self, seconds):
+        assert seconds > 0
+        self._time += seconds
+
+    def mine(self, blocks):
+        self.mined += blocks
+
+
+def test_report_scheduler(monkeypatch):
+    fake_chain = _Chain(1_700_000_000)
+    consensus = _ConsensusContract(fake_chain)
+    monkeypatch.setattr(oracle_report_helpers, "chain", fake_chain)
+    oracle_report_helpers.reset_report_schedulers()
+
+    scheduler = oracle_report_helpers.get_report_scheduler(consensus)
+    frame_slots = consensus.SLOTS_PER_EPOCH * consensus.EPOCHS_PER_FRAME
+    ref_slot = consensus.ref_slot(fake_chain.time())
+    assert scheduler.current_ref_slot() == ref_slot
+
+    assert scheduler.advance_frames(3) == ref_slot + 3 * frame_slots == consensus.ref_slot(fake_chain.time())
+    assert fake_chain.mined == 1
+    assert list(scheduler.iter_frames(2)) == [ref_slot + 4 * frame_slots, ref_slot + 5 * frame_slots]
+    assert consensus.ref_slot(fake_chain.time()) == ref_slot + 5 * frame_slots
+
+    oracle_report_helpers.wait_to_next_available_report_time(consensus)
+    assert consensus.ref_slot(fake_chain.time()) == ref_slot + 6 * frame_slots
+    # the configs are read once
+    assert consensus.calls == 2
+
+    # the frame config changed since read is detected
+    consensus.EPOCHS_PER_FRAME *= 2
+    with pytest.raises(AssertionError, match="should be next frame"):
+        oracle_report_helpers.wait_to_next_available_report_time(consensus)
+    oracle_report_helpers.reset_report_schedulers()
+    oracle_report_helpers.wait_to_next_available_report_time(consensus)
+
+
+class _SubmissionTx:
+    """Ganache automine receipt: mined in its own block and confirmed by the next submissions"""
+
+    def __init__(self, txid, confirmations, status):
+        self.txid = txid
+        self.confirmations = confirmations
+        # brownie's background confirmation sets the status after the block number
+        self.status = status
+
+    def wait(self, required_confs):
+        if self.confirmations > required_confs:
+            print(f"This transaction already has {self.confirmations} confirmations.")
+
+
+class _HashConsensus:
+    MEMBERS = ["0x" + f"{i:02x}" * 20 for i in range(1, 4)]
+
+    def __init__(self):
+        self.submissions = []
+        self.receipts = {}
+        self.report = None
+        self.failing_member = None
+
+    def getFastLaneMembers(self):
+        return (self.MEMBERS, [])
+
+    def submitReport(self, slot, report, version, tx_params):
+        txid = "0x" + f"{len(self.submissions):064x}"
+        pending = tx_params.get("required_confs") == 0
+        tx = _SubmissionTx(txid, len(self.MEMBERS) - len(self.submissions), -1 if pending else 1)
+        self.submissions.append((tx_params, tx))
+        self.receipts[txid] = {"transactionHash": txid, "status": int(tx_params["from"] != self.failing_member)}
+        self.report = report
+        return tx
+
+    def getConsensusState(self):
+        return (0, self.report.hex(), True)
+
+
+class _Eth:
+    def __init__(self, consensus):
+        self.consensus = consensus
+        self.receipt_requests = []
+
+    def wait_for_transaction_receipt(self, txid):
+        self.receipt_requests.append(txid)
+        return self.consensus.receipts[txid]
+
+
+@pytest.fixture
+def consensus(monkeypatch):
+    consensus = _HashConsensus()
+    eth = _Eth(consensus)
+    monkeypatch.setattr(oracle_report_helpers.web3, "eth", eth)
+    consensus.eth = eth
+    return consensus
+
+
+@pytest.mark.parametrize("pipelined", [True, False])
+def test_reach_consensus(consensus, pipelined):
+    report = HexBytes("0x" + "ab" * 32)
+
+    stats = oracle_report_helpers.ConsensusSubmissionStats()
+    submitter = oracle_report_helpers.reach_consensus(
+        100, report, 1, consensus, silent=True, pipelined=pipelined, stats=stats
+    )
+
+    assert submitter == consensus.MEMBERS[0]
+    assert [tx_params["from"] for tx_params, _ in consensus.submissions] == consensus.MEMBERS
+    assert all(("required_confs" in tx_params) == pipelined for tx_params, _ in consensus.submissions)
+    # the pending receipts are fetched from the node
+    assert consensus.eth.receipt_requests == ([tx.txid for _, tx in consensus.submissions] if pipelined else [])
+    assert (stats.ref_slot, stats.pipelined) == (100, pipelined)
+    assert [submission.member for submission in stats.members] == consensus.MEMBERS
+    assert all(0 <= s.broadcast_time <= s.receipt_time <= stats.duration for s in stats.members)
+
+
+def test_reach_consensus_failed_receipt(consensus):
+    consensus.failing_member = consensus.MEMBERS[-1]
+
+    with pytest.raises(AssertionError, match=f"Member {consensus.failing_member} report submission failed"):
+        oracle_report_helpers.reach_consensus(
+            100, HexBytes("0x" + "ab" * 32), 1, consensus, silent=True, pipelined=True
+        )
+
+
+@pytest.mark.parametrize("pipelined", [None, True])
+def test_reach_consensus_default_output(consensus, capsys, pipelined):
+    report = HexBytes("0x" + "ab" * 32)
+
+    oracle_report_helpers.reach_consensus(100, report, 1, consensus, pipelined=pipelined)
+
+    assert capsys.readouterr().out.splitlines() == [
+        f"Member ${member} submitting report to hashConsensus" for member in consensus.MEMBERS
+    ]
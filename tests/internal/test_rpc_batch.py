@@ -0,0 +1,44 @@
+import pytest
+
+from utils.rpc_batch import RPCBatch
+
+
+class _StubbedBatch(RPCBatch):
+    def __init__(self, reply):
+        super().__init__(provider=object())
+        self._reply = reply
+
+    def _send(self, requests):
+        self.round_trips += 1
+        return self._reply(requests)
+
+
+def test_rpc_batch_matches_responses_by_id():
+    batch = _StubbedBatch(lambda requests: [{"id": r["id"], "result": r["params"][0]} for r in reversed(requests)])
+    responses = [batch.request("eth_getCode", [f"0x{i:040x}", "latest"]) for i in range(3)]
+    batch.flush()
+
+    assert [response.result() for response in responses] == [f"0x{i:040x}" for i in range(3)]
+    assert batch.round_trips == 1
+
+
+def test_rpc_batch_missing_response():
+    batch = _StubbedBatch(lambda requests: [{"id": requests[0]["id"], "result": "0x"}])
+    answered, missing = batch.request("eth_getCode", ["0x0", "latest"]), batch.request("eth_getCode", ["0x1", "latest"])
+    batch.flush()
+
+    assert answered.result() == "0x"
+    assert missing.done()
+    with pytest.raises(ValueError, match="No response"):
+        missing.result()
+
+
+def test_rpc_batch_rejected_batch():
+    error = {"code": -32600, "message": "batch requests are not supported"}
+    batch = _StubbedBatch(lambda requests: {"jsonrpc": "2.0", "id": None, "error": error})
+    responses = [batch.request("eth_getCode", [f"0x{i:040x}", "latest"]) for i in range(2)]
+    batch.flush()
+
+    for response in responses:
+        with pytest.raises(ValueError, match="batch requests are not supported"):
+            response.result()
@@ -0,0 +1,629 @@
+import copy
+import json
+import random
+import tracemalloc
+from contextlib import contextmanager
+
+import pytest
+from brownie.convert.normalize import format_event
+from brownie.exceptions import EventLookupError
+from brownie.network.event import EventDict, _topics
+from brownie.network.transaction import TransactionReceipt, _step_compare, _step_external, _step_internal
+from brownie.utils import color
+from brownie.utils.output import build_tree
+from eth_event import StructLogError, decode_logs, decode_traceTransaction
+
+import utils.contract_name_cache
+import utils.trace_artifact_store
+import utils.tx_tracing
+from utils.contract_name_cache import ContractNameCache
+from utils.rpc_batch import RPCBatch
+from utils.trace_artifact_store import TraceArtifactStore, get_trace_artifact_store
+from utils.tx_tracing import (
+    CompactEventDict,
+    GroupBy,
+    display_filtered_tx_call,
+    group_tx_events,
+    _EventStepsFilter,
+    _collect_frame_logs,
+    _iter_struct_logs,
+    _trace_logs,
+)
+
+INITIAL_ADDRESS = "0x" + "11" * 20
+CALLED_ADDRESS = 0x55032650B14DF07B85BF18A3A3EC8E0AF2E028D5
+CREATED_ADDRESS = 0xABCDEF
+MEMORY = [f"{word:02x}" * 32 for word in range(1, 9)]
+
+
+def _legacy_align_logdata_len(trace):
+    for trace_item in trace:
+        if not trace_item["op"].startswith("LOG"):
+            continue
+        length = int(trace_item["stack"][-2], 16)
+        proper_length = length + (-length) % 32
+        if proper_length > length:
+            trace_item["stack"][-2] = hex(proper_length)
+            offset = int(trace_item["stack"][-1], 16)
+            memory_word_id = (offset + length) // 32
+            internal_offset = 2 * ((offset + length) % 32)
+            memory_word = trace_item["memory"][memory_word_id]
+            trace_item["memory"][memory_word_id] = (
+                memory_word[:internal_offset] + "00" * (proper_length - length) + memory_word[internal_offset:]
+            )
+    return trace
+
+
+def _legacy_decode(trace):
+    return decode_traceTransaction(
+        _legacy_align_logdata_len(trace), {}, allow_undecoded=True, initial_address=INITIAL_ADDRESS
+    )
+
+
+def _word(value: int) -> str:
+    return f"{value:064x}"
+
+
+def _step(op, depth, *stack):
+    return {"op": op, "depth": depth, "stack": [_word(value) for value in stack], "memory": list(MEMORY)}
+
+
+def _struct_logs():
+    return (
+        [_step("PUSH1", 1, 1) for _ in range(5)]
+        + [_step("CALL", 1, 0, CALLED_ADDRESS, 5)]
+        + [_step("PUSH1", 2, 2, 2) for _ in range(5)]
+        + [_step("LOG2", 2, 7, 0xDEAD, 0xBEEF, 30, 70), _step("CREATE", 2, 1, 2, 3)]
+        + [_step("PUSH1", 3, 2), _step("LOG0", 3, 20, 33)]
+        + [_step("STOP", 2, CREATED_ADDRESS), _step("RETURN", 2, 0, 0), _step("POP", 1, 1, 0)]
+        + [_step("LOG1", 1, 9, 64, 64), _step("STOP", 1)]
+    )
+
+
+def _response_chunks(struct_logs, chunk_size):
+    text = json.dumps({"jsonrpc": "2.0", "id": 1, "result": {"gas": 1, "failed": False, "structLogs": struct_logs}})
+    return [text[offset : offset + chunk_size] for offset in range(0, len(text), chunk_size)]
+
+
+def _decode(trace):
+    return decode_logs(_trace_logs(trace, INITIAL_ADDRESS), {}, allow_undecoded=True)
+
+
+@pytest.mark.parametrize("chunk_size", [7, 64, 1 << 20])
+def test_iter_struct_logs_chunked(chunk_size):
+    struct_logs = _struct_logs()
+    assert list(_iter_struct_logs(_response_chunks(struct_logs, chunk_size))) == struct_logs
+
+
+def test_iter_struct_logs_errors():
+    with pytest.raises(ValueError):
+        list(_iter_struct_logs([json.dumps({"jsonrpc": "2.0", "id": 1, "error": {"message": "no tracer"}})]))
+    with pytest.raises(StructLogError):
+        list(_iter_struct_logs(_response_chunks(_struct_logs(), 64)[:-2]))
+
+
+def test_event_steps_filter_matches_full_trace():
+    struct_logs = _struct_logs()
+    steps_filter = _EventStepsFilter()
+    for step in copy.deepcopy(struct_logs):
+        steps_filter.feed(step)
+
+    assert len(steps_filter.steps) < len(struct_logs)
+    assert all(len(step.get("memory", [])) <= 3 for step in steps_filter.steps)
+
+    events = _decode(steps_filter.steps)
+    assert events == _decode(copy.deepcopy(struct_logs))
+    assert events == _legacy_decode(struct_logs)
+    assert [event["address"][-6:].lower() for event in events] == ["e028d5", "abcdef", "111111"]
+
+
+def _log(address, topic, position):
+    return {"address": address, "topics": [f"0x{_word(topic)}"], "data": f"0x{_word(topic) * 2}", "position": position}
+
+
+def test_collect_frame_logs_order():
+    frame = {
+        "to": "0x01",
+        "logs": [_log("0x01", 1, "0x0"), _log("0x01", 4, "0x2")],
+        "calls": [
+            {"to": "0x02", "logs": [_log("0x02", 2, "0x0")]},
+            {"to": "0x03", "calls": [{"to": "0x04", "logs": [_log("0x04", 3, "0x0")]}]},
+        ],
+    }
+    logs = []
+    assert _collect_frame_logs(frame, logs)
+    assert [int(log["topics"][0], 16) for log in logs] == [1, 2, 3, 4]
+
+
+def test_collect_frame_logs_fallback_cases():
+    reverted = {"to": "0x01", "calls": [{"to": "0x02", "error": "execution reverted"}]}
+    assert not _collect_frame_logs(reverted, [])
+
+    without_position = {"to": "0x01", "logs": [{"address": "0x01", "topics": [], "data": "0x"}]}
+    assert not _collect_frame_logs(without_position, [])
+
+
+def _omnibus_traces(items_count, steps_per_item):
+    """The struct logs and callTracer responses of the vote execution making a call with a log per item."""
+    struct_logs = [_step("PUSH1", 1, 1)]
+    frame = {"to": INITIAL_ADDRESS, "calls": [], "logs": []}
+    for item in range(items_count):
+        address = CALLED_ADDRESS + item
+        memory = [_word(item)] * 2 + MEMORY
+        struct_logs.append(_step("CALL", 1, 0, address, 5))
+        struct_logs += [{**_step("MSTORE", 2, 2, 2), "memory": memory} for _ in range(steps_per_item)]
+        struct_logs += [{**_step("LOG1", 2, item, 64, 0), "memory": memory}, _step("RETURN", 2, 0, 0)]
+        struct_logs.append(_step("POP", 1, 1))
+        frame["calls"].append({"to": f"0x{address:040x}", "logs": [_log(f"0x{address:040x}", item, "0x0")]})
+    struct_logs.append(_step("STOP", 1))
+    return json.dumps({"jsonrpc": "2.0", "id": 1, "result": {"structLogs": struct_logs}}), json.dumps(frame)
+
+
+def _struct_logs_backend(struct_logs_response):
+    steps_filter = _EventStepsFilter()
+    chunks = [struct_logs_response[i : i + (1 << 20)] for i in range(0, len(struct_logs_response), 1 << 20)]
+    for step in _iter_struct_logs(chunks):
+        steps_filter.feed(step)
+    return _decode(steps_filter.steps)
+
+
+def _call_tracer_backend(call_tracer_response):
+    logs = []
+    assert _collect_frame_logs(json.loads(call_tracer_response), logs)
+    return decode_logs(logs, {}, allow_undecoded=True)
+
+
+def test_trace_backends_match():
+    struct_logs_response, call_tracer_response = _omnibus_traces(items_count=20, steps_per_item=100)
+    assert _struct_logs_backend(struct_logs_response) == _call_tracer_backend(call_tracer_response)
+
+
+def test_trace_backends_match_delegatecall():
+    proxy, implementation = f"0x{CALLED_ADDRESS:040x}", f"0x{CREATED_ADDRESS:040x}"
+    struct_logs = [
+        _step("CALL", 1, 0, CALLED_ADDRESS, 5),
+        _step("DELEGATECALL", 2, 0, CREATED_ADDRESS, 5),
+        _step("LOG1", 3, 7, 64, 0),
+        _step("RETURN", 3, 0, 0),
+        _step("LOG1", 2, 8, 64, 0),
+        _step("RETURN", 2, 0, 0),
+        _step("STOP", 1),
+    ]
+    frame = {
+        "type": "CALL",
+        "to": INITIAL_ADDRESS,
+        "calls": [
+            {
+                "type": "CALL",
+                "to": proxy,
+                "logs": [{**_log(proxy, 8, "0x1"), "data": f"0x{MEMORY[0]}{MEMORY[1]}"}],
+                "calls": [
+                    {
+                        "type": "DELEGATECALL",
+                        "to": implementation,
+                        # callTracer reports the proxy as the emitting address
+                        "logs": [{**_log(proxy, 7, "0x0"), "data": f"0x{MEMORY[0]}{MEMORY[1]}"}],
+                    }
+                ],
+            }
+        ],
+    }
+    struct_logs_response = json.dumps({"jsonrpc": "2.0", "id": 1, "result": {"structLogs": struct_logs}})
+
+    events = _call_tracer_backend(json.dumps(frame))
+    assert events == _struct_logs_backend(struct_logs_response)
+    assert [event["address"].lower() for event in events] == [implementation, proxy]
+
+
+def test_trace_logs_matches_legacy_decode():
+    struct_logs = json.loads(_omnibus_traces(items_count=20, steps_per_item=10)[0])["result"]["structLogs"]
+    for index, step in enumerate(struct_logs):
+        if step["op"] == "LOG1":
+            # unaligned data length as reported by Ganache sometimes
+            step["stack"][-2] = _word(50)
+    legacy_trace = copy.deepcopy(struct_logs)
+
+    assert _decode(struct_logs) == _legacy_decode(legacy_trace)
+
+
+def _formatted_event(name, address):
+    return {
+        "name": name,
+        "address": address,
+        "data": [{"name": "value", "type": "uint256", "value": 1, "decoded": True}],
+        "decoded": True,
+    }
+
+
+def _decoded_events(count):
+    token, registry = ("0x" + f"{byte:02x}" * 20 for byte in range(1, 3))
+    events = []
+    for i in range(count):
+        transfer = {
+            "name": "Transfer",
+            "address": token,
+            "decoded": True,
+            "data": [
+                {"name": "from", "type": "address", "value": registry, "decoded": True},
+                {"name": "to", "type": "address", "value": "0x" + f"{i:040x}", "decoded": True},
+                {"name": "value", "type": "uint256", "value": i * 10**18, "decoded": True},
+            ],
+        }
+        key_added = {
+            "name": "SigningKeyAdded",
+            "address": registry,
+            "decoded": True,
+            "data": [
+                {"name": "operatorId", "type": "uint256", "value": i, "decoded": True},
+                {"name": "pubkey", "type": "bytes", "value": "0x" + "ab" * 32, "decoded": False},
+                {
+                    "name": "limits",
+                    "type": "tuple",
+                    "components": [{"name": "limit", "type": "uint64"}, {"name": "id", "type": "bytes32"}],
+                    "value": [i, "0x" + "cd" * 32],
+                    "decoded": True,
+                },
+            ],
+        }
+        unknown = {"name": None, "address": registry, "decoded": False, "topics": ["0x" + "01" * 32], "data": "0x02"}
+        events += [transfer, key_added, unknown]
+    return events
+
+
+def test_compact_event_dict_matches_event_dict():
+    events = _decoded_events(3)
+    legacy = EventDict([format_event(event) for event in copy.deepcopy(events)])
+    compact = CompactEventDict(events)
+
+    assert len(compact) == len(legacy)
+    assert [e.name for e in compact] == [e.name for e in legacy]
+    assert [e.address for e in compact] == [e.address for e in legacy]
+    assert compact.keys() == legacy.keys()
+    assert str(compact) == str(legacy)
+    for name in ["Transfer", "SigningKeyAdded", "(unknown)", "Missing"]:
+        assert (name in compact) == (name in legacy)
+        assert compact.count(name) == legacy.count(name)
+    for i in range(len(legacy)):
+        assert compact[i].items() == legacy[i].items()
+        assert compact[i] == legacy[i]
+        assert dict(compact[i][0]) == dict(legacy[i][0])
+    assert compact["Transfer"]["to"] == legacy["Transfer"]["to"]
+    assert compact["SigningKeyAdded"][2]["limits"] == legacy["SigningKeyAdded"][2]["limits"]
+    assert compact[1]["pubkey"] == legacy[1]["pubkey"]
+    assert [x["value"] for x in compact["Transfer"]] == [x["value"] for x in legacy["Transfer"]]
+    with pytest.raises(EventLookupError):
+        compact["Missing"]
+    with pytest.raises(EventLookupError):
+        compact[0]["missing"]
+
+
+def test_compact_event_dict_memory():
+    events = _decoded_events(2_000)
+    formatted = [format_event(event) for event in copy.deepcopy(events)]
+
+    def traced_size(build):
+        tracemalloc.start()
+        result = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return result, size
+
+    legacy, legacy_size = traced_size(lambda: EventDict(formatted))
+    compact, compact_size = traced_size(lambda: CompactEventDict(events))
+    # the validators look up a few names only
+    _, lookup_size = traced_size(lambda: compact["SigningKeyAdded"])
+
+    assert compact_size + lookup_size < legacy_size / 2
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_group_tx_events_single_pass(monkeypatch, tmp_path, compact):
+    voting, executor, registry, token = ("0x" + f"{byte:02x}" * 20 for byte in range(1, 5))
+    resolved = []
+    names = {voting: "Voting", executor: "CallsScript", registry: "NodeOperatorsRegistry", token: "StETH"}
+    monkeypatch.setattr(utils.tx_tracing, "resolve_contract", lambda addr: resolved.append(addr) or names[addr])
+    cache = _OfflineContractNameCache(str(tmp_path / "contract_names.json"), {})
+    cache.seed({voting: "Voting", executor: "CallsScript"})
+    monkeypatch.setattr(utils.tx_tracing, "get_contract_name_cache", lambda: cache)
+
+    items_count = 1_000
+    events = [_formatted_event("ExecuteVote", voting)]
+    for _ in range(items_count):
+        events += [_formatted_event("LogScriptCall", executor), _formatted_event("NodeOperatorAdded", registry)]
+        events += [_formatted_event("Transfer", token)] * 2
+    events.append(_formatted_event("ScriptResult", voting))
+
+    vote_item = GroupBy("CallsScript", "LogScriptCall", "Vote item #", True, "magenta")
+    service = GroupBy("Voting", "ScriptResult", "Service events", False, "bright yellow")
+    dict_events = CompactEventDict(events) if compact else EventDict(events)
+    groups = group_tx_events(events, dict_events, [vote_item, service])
+
+    assert [group for group, _ in groups] == [None] + [vote_item] * items_count + [service]
+    assert all(len(group_events) == 4 for _, group_events in groups[1:-1])
+    assert all(type(group_events) is type(dict_events) for _, group_events in groups)
+    # the seeded contracts are never resolved, the rest are resolved once
+    assert sorted(resolved) == sorted([registry, token])
+
+
+class _OfflineContractNameCache(ContractNameCache):
+    def __init__(self, path, code_hashes):
+        super().__init__(path)
+        self.code_hashes = code_hashes
+
+    def _chain_id(self):
+        return 1
+
+    def _code_hashes(self, addresses):
+        return {address: self.code_hashes.get(address, "0x") for address in addresses}
+
+
+def test_contract_name_cache_persistence(tmp_path):
+    path = str(tmp_path / "contract_names.json")
+    registry, token, unknown = ("0x" + f"{byte:02x}" * 20 for byte in range(1, 4))
+    code_hashes = {registry: "0x01", token: "0x02", unknown: "0x03"}
+    resolved = []
+
+    def resolve(address):
+        resolved.append(address)
+        return {registry: "NodeOperatorsRegistry", token: "StETH"}.get(address, "")
+
+    names = _OfflineContractNameCache(path, code_hashes).resolve_many([registry, token, unknown, registry], resolve)
+    assert names == {registry: "NodeOperatorsRegistry", token: "StETH", unknown: ""}
+    assert resolved == [registry, token, unknown]
+
+    # the next run resolves only the unknown contract and the one with the changed code
+    resolved.clear()
+    code_hashes[token] = "0x04"
+    names = _OfflineContractNameCache(path, code_hashes).resolve_many([registry, token, unknown], resolve)
+    assert names == {registry: "NodeOperatorsRegistry", token: "StETH", unknown: ""}
+    assert resolved == [token, unknown]
+
+
+def test_contract_name_cache_proxy_upgrade(monkeypatch, tmp_path):
+    proxy, implementation = "0x" + "01" * 20, {"slot": "0x" + "00" * 32, "call": "0x" + "00" * 12 + "02" * 20}
+
+    class ProxyNode(RPCBatch):
+        def __init__(self):
+            super().__init__(provider=object())
+
+        def _send(self, requests):
+            results = {
+                "eth_getCode": "0x6001",
+                "eth_getStorageAt": implementation["slot"],
+                "eth_call": implementation["call"],
+            }
+            return [
+                {"id": request["id"], "result": results[request["method"]]}
+                if results[request["method"]] is not None
+                else {"id": request["id"], "error": {"message": "execution reverted"}}
+                for request in requests
+            ]
+
+    @contextmanager
+    def proxy_node_batch():
+        batch = ProxyNode()
+        yield batch
+        batch.flush()
+
+    class Cache(ContractNameCache):
+        def _chain_id(self):
+            return 1
+
+    monkeypatch.setattr(utils.contract_name_cache, "rpc_batch", proxy_node_batch)
+    path = str(tmp_path / "contract_names.json")
+    resolved = []
+
+    def resolve(address):
+        resolved.append(address)
+        return f"Implementation{len(resolved)}"
+
+    assert Cache(path).resolve_many([proxy], resolve) == {proxy: "Implementation1"}
+    assert Cache(path).resolve_many([proxy], resolve) == {proxy: "Implementation1"}
+
+    # ERCProxy (Aragon) implementation upgrade with the same proxy code
+    implementation["call"] = "0x" + "00" * 12 + "03" * 20
+    assert Cache(path).resolve_many([proxy], resolve) == {proxy: "Implementation2"}
+
+    # EIP-1967 proxy not implementing `implementation()`
+    implementation["call"] = None
+    implementation["slot"] = "0x" + "00" * 12 + "04" * 20
+    assert Cache(path).resolve_many([proxy], resolve) == {proxy: "Implementation3"}
+    assert Cache(path).resolve_many([proxy], resolve) == {proxy: "Implementation3"}
+    assert len(resolved) == 3
+
+
+class _OfflineTraceArtifactStore(TraceArtifactStore):
+    def _chain_id(self):
+        return 1
+
+
+class _ExecutedTx:
+    txid = "0x" + "ab" * 32
+    block_number = 100
+    gas_used = 21000
+    logs = [{"address": INITIAL_ADDRESS, "topics": ["0x" + "01" * 32], "data": "0x" + "02" * 32}]
+
+
+def test_trace_artifact_store_replay(tmp_path):
+    tx = _ExecutedTx()
+    events = [
+        {
+            "name": "ScriptResult",
+            "address": INITIAL_ADDRESS,
+            "decoded": True,
+            "data": [{"name": "script", "type": "(bytes,uint256)", "value": (b"\x01\x02", 1), "decoded": True}],
+        }
+    ]
+    decoded, rendered = [], []
+
+    def decode(tx):
+        decoded.append(tx.txid)
+        return copy.deepcopy(events)
+
+    def render(tx):
+        rendered.append(tx.txid)
+        return "Call trace"
+
+    store = _OfflineTraceArtifactStore(str(tmp_path))
+    first = store.events(tx, decode)
+    assert first[0]["data"][0]["value"] == ["0x0102", 1]
+    # the returned events are formatted in place by the callers
+    first[0]["name"] = "Formatted"
+    assert store.events(tx, decode)[0]["name"] == "ScriptResult"
+    assert store.call_trace(tx, "voting", render) == "Call trace"
+
+    # the next run replays the stored artifact
+    store = _OfflineTraceArtifactStore(str(tmp_path))
+    assert store.events(tx, decode)[0]["data"] == first[0]["data"]
+    assert store.call_trace(tx, "voting", render) == "Call trace"
+    assert decoded == rendered == [tx.txid]
+
+    # the same tx hash on top of another fork state is traced again
+    tx.gas_used += 1
+    store = _OfflineTraceArtifactStore(str(tmp_path))
+    store.events(tx, decode)
+    assert decoded == [tx.txid] * 2
+
+
+def test_trace_artifact_store_decoding_context(monkeypatch, tmp_path):
+    tx = _ExecutedTx()
+    undecoded = {
+        "name": None,
+        "address": INITIAL_ADDRESS,
+        "decoded": False,
+        "topics": tx.logs[0]["topics"],
+        "data": "0x",
+    }
+    decoded_event = {"name": "ScriptResult", "address": INITIAL_ADDRESS, "decoded": True, "data": []}
+    decode_results = [[undecoded], [undecoded], [decoded_event]]
+
+    def decode(tx):
+        return decode_results.pop(0)
+
+    # the events with undecoded entries aren't stored
+    assert not _OfflineTraceArtifactStore(str(tmp_path)).events(tx, decode)[0]["decoded"]
+    assert not _OfflineTraceArtifactStore(str(tmp_path)).events(tx, decode)[0]["decoded"]
+    assert _OfflineTraceArtifactStore(str(tmp_path)).events(tx, decode)[0]["decoded"]
+    assert _OfflineTraceArtifactStore(str(tmp_path)).events(tx, decode) == [decoded_event]
+
+    # the stored events are decoded again once a new ABI is loaded
+    monkeypatch.setitem(_topics, "0x" + "01" * 32, {})
+    decode_results.append([{**decoded_event, "name": "Renamed"}])
+    assert _OfflineTraceArtifactStore(str(tmp_path)).events(tx, decode)[0]["name"] == "Renamed"
+    assert not decode_results
+
+
+def test_trace_artifact_store_is_opt_in(monkeypatch, tmp_path):
+    monkeypatch.setattr(utils.trace_artifact_store, "_trace_artifact_store", None)
+    monkeypatch.delenv("TRACE_ARTIFACTS_DIR", raising=False)
+    assert get_trace_artifact_store() is None
+
+    monkeypatch.setenv("TRACE_ARTIFACTS_DIR", str(tmp_path))
+    assert isinstance(get_trace_artifact_store(), TraceArtifactStore)
+
+
+def _legacy_display_filtered_tx_call(tx, filter_func=lambda _: False):
+    trace = tx.trace
+    key = _step_internal(trace[0], trace[-1], 0, len(trace), tx._get_trace_gas(0, len(tx.trace)))
+    call_tree = [[key]]
+    active_tree = [call_tree[0]]
+    trace_index = [(0, 0, 0)] + [
+        (i, trace[i]["depth"], trace[i]["jumpDepth"])
+        for i in range(1, len(trace))
+        if not _step_compare(trace[i], trace[i - 1])
+    ]
+    subcalls = tx.subcalls[::-1]
+    is_filter_active = False
+    filter_index = trace_index[0]
+    for i, (idx, depth, jump_depth) in enumerate(trace_index[1:], start=1):
+        last = trace_index[i - 1]
+        if is_filter_active:
+            if depth < filter_index[1]:
+                last = filter_index
+                is_filter_active = False
+            elif depth == filter_index[1] and jump_depth < filter_index[2]:
+                last = filter_index
+                is_filter_active = False
+        if depth == last[1] and jump_depth < last[2]:
+            if not is_filter_active:
+                active_tree.pop()
+            continue
+        elif depth < last[1]:
+            if not is_filter_active:
+                active_tree = active_tree[: -(last[2] + 1)]
+            continue
+        need_filtering = filter_func(trace[idx])
+        if depth > last[1]:
+            end = next((x[0] for x in trace_index[i + 1 :] if x[1] < depth), len(trace))
+            total_gas, internal_gas = tx._get_trace_gas(idx, end)
+            key = _step_external(
+                trace[idx], trace[end - 1], idx, end, (total_gas, internal_gas), subcalls.pop(), not need_filtering
+            )
+        elif depth == last[1] and jump_depth > last[2]:
+            end = next(
+                (x[0] for x in trace_index[i + 1 :] if x[1] < depth or (x[1] == depth and x[2] < jump_depth)),
+                len(trace),
+            )
+            total_gas, internal_gas = tx._get_trace_gas(idx, end)
+            key = _step_internal(trace[idx], trace[end - 1], idx, end, (total_gas, internal_gas))
+        if need_filtering:
+            key += f"{color('magenta')} [collapsed]{color}"
+        if not is_filter_active:
+            active_tree[-1].append([key])
+            active_tree.append(active_tree[-1][-1])
+            if need_filtering:
+                is_filter_active = True
+                filter_index = trace_index[i]
+    print(
+        f"Call trace for '{color('bright blue')}{tx.txid}{color}':\n"
+        f"Initial call cost  [{color('bright yellow')}{tx._call_cost} gas{color}]"
+    )
+    print(build_tree(call_tree).rstrip())
+
+
+class _TracedTx:
+    txid = "0x" + "ab" * 32
+    _call_cost = 21_000
+    _get_trace_gas = TransactionReceipt._get_trace_gas
+
+    def __init__(self, steps_count, seed=1):
+        self._rng = random.Random(seed)
+        self.trace, self.subcalls = [], []
+        self._frame(0, 0, "Voting._executeVote", steps_count)
+
+    def _step(self, op, depth, jump_depth, fn):
+        stack = [_word(self._rng.choice([0, 1]))] * 2
+        self.trace.append(
+            {"op": op, "depth": depth, "jumpDepth": jump_depth, "fn": fn, "gasCost": 3, "stack": stack, "address": fn}
+        )
+
+    def _frame(self, depth, jump_depth, fn, steps_count):
+        for _ in range(steps_count):
+            roll = self._rng.random()
+            if roll < 0.02 and depth < 6:
+                self._step("CALL", depth, jump_depth, fn)
+                self.subcalls.append({"op": "CALL", "calldata": "0x"})
+                self._frame(depth + 1, 0, f"KernelProxy{depth + 1}.fallback", steps_count // 10)
+            elif roll < 0.06 and jump_depth < 6:
+                self._step("JUMP", depth, jump_depth, fn)
+                self._frame(depth, jump_depth + 1, f"{fn.split('.')[0]}.internal{jump_depth + 1}", steps_count // 10)
+            else:
+                self._step(
+                    self._rng.choice(["PUSH1"] * 10 + ["SSTORE", "MSTORE", "SELFDESTRUCT"]), depth, jump_depth, fn
+                )
+        self._step("RETURN", depth, jump_depth, fn)
+
+
+def _display_output(capsys, display, tx, filter_func):
+    display(tx, filter_func)
+    return capsys.readouterr().out
+
+
+@pytest.mark.parametrize("filtered", [None, "KernelProxy2.", "internal1"])
+def test_display_filtered_tx_call_matches_legacy(capsys, filtered):
+    tx = _TracedTx(steps_count=300)
+    filter_func = (lambda step: filtered in step["fn"]) if filtered else (lambda _: False)
+
+    output = _display_output(capsys, display_filtered_tx_call, tx, filter_func)
+    assert output == _display_output(capsys, _legacy_display_filtered_tx_call, tx, filter_func)
+    assert ("[collapsed]" in output) == bool(filtered)
@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+
+import pytest
+from brownie.network.contract import ContractCall
+from brownie.network.multicall import Multicall
+from eth_abi.abi import encode
+
+from utils.test.view_call_cache import is_constant_call, view_call_cache
+
+ADDRESS = "0x" + "11" * 20
+
+
+def _contract_call(name, inputs=(), state_mutability="view"):
+    abi = {
+        "name": name,
+        "type": "function",
+        "stateMutability": state_mutability,
+        "inputs": [{"name": f"arg{index}", "type": type_} for index, type_ in enumerate(inputs)],
+        "outputs": [{"name": "", "type": "uint256"}],
+    }
+    return ContractCall(ADDRESS, abi, name, None)
+
+
+@pytest.fixture
+def node(monkeypatch):
+    """Stubbed `ContractCall.call` and `Multicall._call_contract` recording the calls made to the node"""
+    node = SimpleNamespace(calls=[], multicalls=[])
+
+    def call(self, *args, block_identifier=None, override=None):
+        node.calls.append((self.abi["name"], args, block_identifier))
+        return len(node.calls)
+
+    def call_contract(self, call, *args, **kwargs):
+        node.multicalls.append((call, self.block_number))
+        # the result is decoded once the multicall is flushed
+        return lambda value: call.decode_output(encode(["uint256"], [value]).hex())
+
+    monkeypatch.setattr(ContractCall, "call", call)
+    monkeypatch.setattr(Multicall, "_call_contract", call_contract)
+    return node
+
+
+def test_is_constant_call():
+    assert is_constant_call(_contract_call("MANAGE_MEMBERS_ROLE"))
+    assert is_constant_call(_contract_call("decimals"))
+    assert is_constant_call(_contract_call("getSharesByPooledEth", ["uint256"], "pure"))
+    assert not is_constant_call(_contract_call("getTotalShares"))
+    assert not is_constant_call(_contract_call("ROLE", ["uint256"]))
+
+
+def test_view_call_cache_keying(node):
+    constant, view = _contract_call("MANAGE_MEMBERS_ROLE"), _contract_call("getTotalShares")
+
+    with view_call_cache() as cache:
+        # constants are served across blocks
+        assert constant.call(block_identifier=10) == constant.call(block_identifier=11) == constant.call() == 1
+        # views are cached for the pinned block only
+        assert view.call(block_identifier=10) == view.call(block_identifier=10) == 2
+        assert view.call(block_identifier=11) == 3
+        assert view.call() == 4
+        assert view.call(block_identifier="latest") == 5
+        assert view.call(block_identifier=10, override={ADDRESS: {}}) == 6
+
+    # the unpinned and overridden calls bypass the cache
+    assert (cache.hits, cache.misses) == (3, 3)
+    assert [block for _, _, block in node.calls] == [10, 10, 11, None, "latest", 10]
+
+
+def test_view_call_cache_multicall_store_on_decode(node):
+    view = _contract_call("getTotalShares")
+    multicall = SimpleNamespace(block_number=10)
+
+    with view_call_cache() as cache:
+        decode = Multicall._call_contract(multicall, view)
+        # nothing is stored until the result is decoded
+        assert not cache.lookup(cache.key_for(view, view.encode_input(), 10))[0]
+        assert decode(42) == 42
+
+        assert Multicall._call_contract(multicall, view) == 42
+        assert view.call(block_identifier=10) == 42
+        # the multicall out of the pinned block is not cached
+        assert callable(Multicall._call_contract(SimpleNamespace(block_number=None), view))
+
+    assert [block for _, block in node.multicalls] == [10, None]
+    assert node.calls == []
+
+
+def test_view_call_cache_revert(node):
+    constant, view = _contract_call("MANAGE_MEMBERS_ROLE"), _contract_call("getTotalShares")
+
+    with view_call_cache() as cache:
+        constant.call()
+        view.call(block_identifier=10)
+        view.call(block_identifier=12)
+
+        cache._revert(11)
+
+        constant.call()
+        view.call(block_identifier=10)
+        view.call(block_identifier=12)
+
+    # the constants and the views above the reverted height are fetched again
+    assert [(name, block) for name, _, block in node.calls] == [
+        ("MANAGE_MEMBERS_ROLE", None),
+        ("getTotalShares", 10),
+        ("getTotalShares", 12),
+        ("MANAGE_MEMBERS_ROLE", None),
+        ("getTotalShares", 12),
+    ]
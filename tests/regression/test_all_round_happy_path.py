@@ -4,6 +4,7 @@ from brownie import ZERO_ADDRESS, chain
 from utils.test.oracle_report_helpers import oracle_report
 from utils.test.helpers import ETH, almostEqEth
 from utils.config import contracts
+from utils.node_operators import NodeOperatorsSnapshot
 
 
 def test_all_round_happy_path(accounts, stranger, steth_holder, eth_whale):
@@ -108,16 +109,16 @@ def test_all_round_happy_path(accounts, stranger, steth_holder, eth_whale):
 
     treasury = contracts.lido_locator.treasury()
     nor = contracts.node_operators_registry.address
-    nor_operators_count = contracts.node_operators_registry.getNodeOperatorsCount()
+    nor_snapshot = NodeOperatorsSnapshot.read(contracts.node_operators_registry)
+    nor_operators_count = len(nor_snapshot)
 
     penalized_node_operator_ids = []
 
-    for i in range(nor_operators_count):
-        no = contracts.node_operators_registry.getNodeOperator(i, True)
+    for i in range(len(nor_snapshot)):
         is_node_operator_penalized = contracts.node_operators_registry.isOperatorPenalized(i)
         if is_node_operator_penalized:
             penalized_node_operator_ids.append(i)
-        if not no["totalDepositedValidators"] or no["totalDepositedValidators"] == no["totalExitedValidators"]:
+        if not nor_snapshot.total_deposited[i] or nor_snapshot.total_deposited[i] == nor_snapshot.total_exited[i]:
             nor_operators_count = nor_operators_count - 1
     treasury_balance_before_rebase = contracts.lido.sharesOf(treasury)
 
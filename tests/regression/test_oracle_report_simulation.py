@@ -0,0 +1,63 @@
+"""
+The offline `handleOracleReport` model checked against the `eth_call` simulation on the fork state.
+`simulate_report` asserts both give the same result in the `check` mode.
+"""
+import pytest
+from brownie import web3
+from brownie.network.account import Account
+
+from utils.config import contracts
+from utils.test.helpers import ETH
+from utils.test.oracle_report_helpers import (
+    ENV_ORACLE_REPORT_SIMULATION,
+    LIMITER_PRECISION_BASE,
+    SIMULATION_CHECK,
+    oracle_report,
+)
+
+
+@pytest.fixture(autouse=True)
+def check_simulation(monkeypatch):
+    monkeypatch.setenv(ENV_ORACLE_REPORT_SIMULATION, SIMULATION_CHECK)
+
+
+def _set_balance(address: str, balance: int):
+    web3.provider.make_request("evm_setAccountBalance", [address, hex(balance)])  # type: ignore
+
+
+def _rebase_limit_wei() -> int:
+    return (
+        contracts.oracle_report_sanity_checker.getMaxPositiveTokenRebase()
+        * contracts.lido.getTotalPooledEther()
+        // LIMITER_PRECISION_BASE
+    )
+
+
+def test_simulation_rewards():
+    _set_balance(contracts.execution_layer_rewards_vault.address, ETH(10))
+    _set_balance(contracts.withdrawal_vault.address, ETH(20))
+
+    oracle_report(cl_diff=ETH(100))
+
+
+def test_simulation_negative_rebase():
+    oracle_report(cl_diff=ETH(-1_000), exclude_vaults_balances=True)
+
+
+def test_simulation_rebase_limit():
+    # the vaults are drained only partially as the rewards are above the rebase limit
+    rebase_limit = _rebase_limit_wei()
+    _set_balance(contracts.execution_layer_rewards_vault.address, rebase_limit)
+    _set_balance(contracts.withdrawal_vault.address, rebase_limit)
+
+    oracle_report(cl_diff=0)
+
+
+def test_simulation_shares_burn(steth_whale: Account):
+    burner, lido = contracts.burner, contracts.lido
+    shares = lido.sharesOf(steth_whale.address) // 100
+    lido.approve(burner.address, lido.getPooledEthByShares(shares), {"from": steth_whale.address})
+    burner.requestBurnShares(steth_whale.address, shares // 2, {"from": lido.address})
+    burner.requestBurnSharesForCover(steth_whale.address, shares - shares // 2, {"from": lido.address})
+
+    oracle_report(cl_diff=ETH(10))
@@ -12,6 +12,7 @@ from tests.conftest import Helpers
 from utils.config import contracts
 from utils.import_current_votes import start_and_execute_votes, is_there_any_vote_scripts
 from utils.test.snapshot_helpers import _chain_snapshot
+from utils.test.view_call_cache import view_call_cache
 
 
 class Frame(TypedDict):
@@ -209,7 +210,7 @@ def sandwich_upgrade(
                     func=desc,
                 )
 
-        with _chain_snapshot():
+        with _chain_snapshot(), view_call_cache():
             v1_frames = tuple(_actions_snaps(dsm))
 
         if vote_ids_from_env:
@@ -225,7 +226,8 @@ def sandwich_upgrade(
         )
 
         # do not call _chain_snapshot here to be able to interact with the environment in the test
-        v2_frames = tuple(_actions_snaps(dsm))
+        with view_call_cache():
+            v2_frames = tuple(_actions_snaps(dsm))
 
         return v1_frames, v2_frames
 
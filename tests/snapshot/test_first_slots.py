@@ -2,7 +2,7 @@ from contextlib import contextmanager
 from typing import Any, Callable, Sequence, TypedDict
 
 import pytest
-from brownie import Contract, chain, web3, accounts
+from brownie import chain, web3, accounts
 from hexbytes import HexBytes
 from pytest_check import check
 from typing_extensions import Protocol
@@ -13,7 +13,7 @@ from utils.config import contracts
 from utils.import_current_votes import start_and_execute_votes, is_there_any_vote_scripts
 from utils.test.snapshot_helpers import _chain_snapshot
 
-from .utils import get_slot
+from .utils import array_slots, read_slots_batch
 
 SLOTS_COUNT_TO_CHECK = 16
 MAX_ARRAY_SIZE = 2**5
@@ -65,59 +65,52 @@ def skip_slots() -> Sequence[tuple[str, int]]:
 
 @pytest.fixture(scope="module")
 def do_snapshot(skip_slots: Sequence[tuple[str, int]]) -> SnapshotFn:
-    def _get_slots(contract: Contract, block: int) -> dict:
-        res = {}
-
-        for slot in range(0, SLOTS_COUNT_TO_CHECK):
-            if (contract.address, slot) in skip_slots:
-                continue
-
-            slot_in_hex = HexBytes(slot).hex()
-            # try plain 32 bits value first
-            slot_value = get_slot(
-                Web3.toChecksumAddress(contract.address),
-                pos=slot,
-                block=block,
-            )
-            res[f"{contract.address}_slot_{slot_in_hex}"] = slot_value
-
-            # if the slot stores relativelly small integer, try to read as an array
-            int_value = Web3.toInt(slot_value)
-            if 0 < int_value < MAX_ARRAY_SIZE:
-                slot_value_as_list = get_slot(
-                    Web3.toChecksumAddress(contract.address),
-                    pos=slot,
-                    as_list=True,
-                    block=block,
-                )
-                res[f"{contract.address}_slot_{slot_in_hex}_as_list"] = slot_value_as_list
-
-        return res
-
     def _snap():
         block = chain.height
         res = {}
 
-        for contract in (
-            contracts.lido,
-            contracts.node_operators_registry,
-            contracts.legacy_oracle,
-            contracts.deposit_security_module,
-            contracts.execution_layer_rewards_vault,
-            contracts.withdrawal_vault,
-            contracts.oracle_daemon_config,
-            contracts.burner,
-            contracts.relay_allowed_list,
-            contracts.ldo_token,
-            contracts.token_manager,
-            contracts.finance,
-            contracts.acl,
-            contracts.agent,
-            contracts.kernel,
-            contracts.easy_track,
-            contracts.wsteth,
-        ):
-            res |= _get_slots(contract, block)
+        slots = [
+            (Web3.toChecksumAddress(contract.address), slot)
+            for contract in (
+                contracts.lido,
+                contracts.node_operators_registry,
+                contracts.legacy_oracle,
+                contracts.deposit_security_module,
+                contracts.execution_layer_rewards_vault,
+                contracts.withdrawal_vault,
+                contracts.oracle_daemon_config,
+                contracts.burner,
+                contracts.relay_allowed_list,
+                contracts.ldo_token,
+                contracts.token_manager,
+                contracts.finance,
+                contracts.acl,
+                contracts.agent,
+                contracts.kernel,
+                contracts.easy_track,
+                contracts.wsteth,
+            )
+            for slot in range(0, SLOTS_COUNT_TO_CHECK)
+            if (contract.address, slot) not in skip_slots
+        ]
+
+        # try plain 32 bits values first
+        slot_values = read_slots_batch(slots, block)
+
+        # if the slot stores relativelly small integer, try to read as an array
+        arrays = [
+            (address, slot, array_slots(slot, Web3.toInt(slot_value)))
+            for (address, slot), slot_value in zip(slots, slot_values)
+            if 0 < Web3.toInt(slot_value) < MAX_ARRAY_SIZE
+        ]
+        array_values = iter(
+            read_slots_batch([(address, pos) for address, _, positions in arrays for pos in positions], block)
+        )
+
+        for (address, slot), slot_value in zip(slots, slot_values):
+            res[f"{address}_slot_{HexBytes(slot).hex()}"] = slot_value
+        for address, slot, positions in arrays:
+            res[f"{address}_slot_{HexBytes(slot).hex()}_as_list"] = [next(array_values) for _ in positions]
 
         return res
 
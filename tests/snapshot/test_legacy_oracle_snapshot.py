@@ -13,6 +13,7 @@ from utils.config import contracts, LDO_TOKEN
 from utils.evm_script import EMPTY_CALLSCRIPT
 from utils.import_current_votes import start_and_execute_votes, is_there_any_vote_scripts
 from utils.test.snapshot_helpers import _chain_snapshot
+from utils.test.view_call_cache import view_call_cache
 
 from .utils import get_slot
 
@@ -152,7 +153,7 @@ def sandwich_upgrade(
                     func=repr(action_fn),
                 )
 
-        with _chain_snapshot():
+        with _chain_snapshot(), view_call_cache():
             before = tuple(_actions_snaps())
 
         if vote_ids_from_env:
@@ -161,7 +162,8 @@ def sandwich_upgrade(
             start_and_execute_votes(contracts.voting, helpers)
 
         # do not call _chain_snapshot here to be able to interact with the environment in the test
-        after = tuple(_actions_snaps())
+        with view_call_cache():
+            after = tuple(_actions_snaps())
 
         return before, after
 
@@ -14,6 +14,7 @@ from utils.config import contracts, LDO_TOKEN, VOTING
 from utils.evm_script import EMPTY_CALLSCRIPT
 from utils.import_current_votes import start_and_execute_votes, is_there_any_vote_scripts
 from utils.test.snapshot_helpers import _chain_snapshot
+from utils.test.view_call_cache import view_call_cache
 
 from .utils import get_slot
 
@@ -394,7 +395,7 @@ def sandwich_upgrade(
                     func=repr(action_fn),
                 )
 
-        with _chain_snapshot():
+        with _chain_snapshot(), view_call_cache():
             v1_frames = tuple(_actions_snaps())
 
         if vote_ids_from_env:
@@ -403,7 +404,8 @@ def sandwich_upgrade(
             start_and_execute_votes(contracts.voting, helpers)
 
         # do not call _chain_snapshot here to be able to interact with the environment in the test
-        v2_frames = tuple(_actions_snaps())
+        with view_call_cache():
+            v2_frames = tuple(_actions_snaps())
 
         return v1_frames, v2_frames
 
@@ -1,10 +1,15 @@
-from typing import Literal, overload
+from typing import Literal, Sequence, overload
 
 from brownie import web3
 from eth_typing.evm import ChecksumAddress
 from hexbytes import HexBytes
 from web3 import Web3
 
+from utils.rpc_batch import RPCBatch
+
+# (address, slot, block hash) -> value, the block hash keeps the cache valid after chain.revert()
+_slots_cache: dict[tuple[str, int, HexBytes], HexBytes] = {}
+
 
 @overload
 def get_slot(
@@ -72,20 +77,47 @@ def get_slot(
     if not length:
         return []
 
-    res = []
+    return read_slots(address, array_slots(idx, length), block)
 
-    buf = Web3.toBytes(idx)
-    while len(buf) < 32:
-        buf = b"\x00" + buf
 
-    p = Web3.toInt(Web3.keccak(buf))
-    for i in range(length):
-        res.append(
-            web3.eth.get_storage_at(
-                address,
-                p + i,
-                block_identifier=block,
-            )
-        )
+def array_slots(pos: int, length: int) -> range:
+    """Positions of the dynamic array elements stored at `pos`."""
+    start = Web3.toInt(Web3.keccak(pos.to_bytes(32, "big")))
+    return range(start, start + length)
+
+
+def mapping_slot(pos: int, key: int | str | bytes) -> int:
+    """Position of the mapping value stored at `pos` for the value type `key`."""
+    if isinstance(key, str):
+        key = HexBytes(key)
+    if isinstance(key, bytes):
+        key = Web3.toInt(key)
+    return Web3.toInt(Web3.keccak(key.to_bytes(32, "big") + pos.to_bytes(32, "big")))
+
+
+def read_slots(address: ChecksumAddress, positions: Sequence[int], block: int | None = None) -> list[HexBytes]:
+    """Read the storage slots of the contract with a single batched request."""
+    return read_slots_batch([(address, pos) for pos in positions], block)
+
+
+def read_slots_batch(slots: Sequence[tuple[ChecksumAddress, int]], block: int | None = None) -> list[HexBytes]:
+    """
+    Read the (address, position) storage slots of several contracts with a single batched request.
+
+    Values are memoized per (address, slot, block hash).
+    """
+    block_data = web3.eth.get_block(block if block is not None else "latest")
+    block_hash = block_data.hash
+
+    batch = RPCBatch(max_batch_size=max(len(slots), 1))
+    pending = {
+        (address, pos): batch.get_storage_at(address, pos, block_data.number)
+        for address, pos in slots
+        if (address, pos, block_hash) not in _slots_cache
+    }
+    batch.flush()
+
+    for (address, pos), response in pending.items():
+        _slots_cache[(address, pos, block_hash)] = HexBytes(response.result())
 
-    return res
+    return [_slots_cache[(address, pos, block_hash)] for address, pos in slots]
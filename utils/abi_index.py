@@ -0,0 +1,230 @@
+"""
+Persistent ABI index used to decode EVM scripts without re-reading `interfaces/`
+and re-querying Etherscan on every run.
+
+The index is a single sqlite file which stores:
+- raw ABIs, deduplicated by content hash;
+- method id -> ABI entries built from the local interfaces directory,
+  rebuilt incrementally for the files whose mtime or size changed;
+- address -> ABI entries resolved through Etherscan (including the
+  "not verified" answers to avoid asking again) with the time they were fetched.
+"""
+import glob
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from avotes_parser.core.ABI.provider import ABIProviderEtherscanAPI
+from avotes_parser.core.ABI.storage import ABI, ABIKey, CachedStorage
+from avotes_parser.core.ABI.utilities.processing import index_function_description
+from avotes_parser.core.ABI.utilities.exceptions import (
+    ABIResolvingError,
+    ABIEtherscanStatusCode,
+    ABIEtherscanNetworkError,
+)
+
+ABI_INDEX_SCHEMA_VERSION = "2"
+DEFAULT_ABI_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".cache", "lido-scripts", "abi_index.sqlite3")
+# the stored Etherscan ABI lacking a called selector is re-fetched not more often than this (seconds)
+ABI_REFETCH_INTERVAL = 24 * 60 * 60
+
+_TABLES = ("meta", "abis", "interfaces", "selectors", "addresses")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS abis (id INTEGER PRIMARY KEY, hash TEXT NOT NULL UNIQUE, raw TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS interfaces (
+    path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, abi_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS selectors (
+    selector TEXT NOT NULL, path TEXT NOT NULL, abi_id INTEGER NOT NULL, PRIMARY KEY (selector, path)
+);
+CREATE TABLE IF NOT EXISTS addresses (
+    net TEXT NOT NULL, address TEXT NOT NULL, abi_id INTEGER, fetched_at INTEGER NOT NULL,
+    PRIMARY KEY (net, address)
+);
+"""
+
+
+def get_abi_index_path() -> str:
+    return os.getenv("ABI_INDEX_PATH", DEFAULT_ABI_INDEX_PATH)
+
+
+class ABIProviderIndexed(ABIProviderEtherscanAPI):
+    """
+    ABI provider backed by the persistent sqlite index.
+
+    Resolution order is the same as for `avotes_parser` combined provider
+    (Etherscan first, local interfaces as a fallback), but every Etherscan
+    answer is stored in the index, so warm runs make no network calls.
+    An Etherscan ABI which lacks the called selector (e.g. a proxy ABI) gives
+    way to the local interface having it. Without one the stored ABI is
+    re-fetched if it was fetched more than `ABI_REFETCH_INTERVAL` seconds ago.
+    """
+
+    def __init__(self, api_key: str, net: str, interfaces_directory: str, index_path: Optional[str] = None):
+        ABIProviderEtherscanAPI.__init__(self, api_key, net)
+        self._interfaces_directory = interfaces_directory
+        self._index_path = index_path or get_abi_index_path()
+        self._lock = threading.Lock()
+        self._parsed: Dict[int, ABI] = {}
+        self._refreshed: Set[str] = set()
+
+        if self._index_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self._index_path)), exist_ok=True)
+        self._db = sqlite3.connect(self._index_path, check_same_thread=False)
+        self._open_index()
+        self.sync_interfaces()
+
+    def _open_index(self) -> None:
+        with self._db:
+            self._db.executescript(_SCHEMA)
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+            if row is not None and row[0] == ABI_INDEX_SCHEMA_VERSION:
+                return
+            logging.debug(f"ABI index at {self._index_path} has an outdated schema, rebuilding")
+            # the tables of the outdated schema can lack the columns, so they are re-created
+            for table in _TABLES:
+                self._db.execute(f"DROP TABLE {table}")
+            self._db.executescript(_SCHEMA)
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)", (ABI_INDEX_SCHEMA_VERSION,)
+            )
+
+    def _store_abi(self, raw_abi) -> int:
+        raw = json.dumps(raw_abi, sort_keys=True, separators=(",", ":"))
+        digest = hashlib.sha256(raw.encode()).hexdigest()
+        self._db.execute("INSERT OR IGNORE INTO abis (hash, raw) VALUES (?, ?)", (digest, raw))
+        return self._db.execute("SELECT id FROM abis WHERE hash = ?", (digest,)).fetchone()[0]
+
+    def _load_abi(self, abi_id: int) -> ABI:
+        if abi_id not in self._parsed:
+            (raw,) = self._db.execute("SELECT raw FROM abis WHERE id = ?", (abi_id,)).fetchone()
+            raw_abi = json.loads(raw)
+            self._parsed[abi_id] = ABI(raw=raw_abi, func_storage=index_function_description(raw_abi))
+        return self._parsed[abi_id]
+
+    def sync_interfaces(self) -> None:
+        """Re-index the interface files which were added, changed or removed since the last run."""
+        files = {
+            os.path.abspath(path): os.stat(path)
+            for path in glob.glob(os.path.join(self._interfaces_directory, "*.json"))
+        }
+        with self._lock, self._db:
+            indexed = {
+                path: (mtime_ns, size)
+                for path, mtime_ns, size in self._db.execute("SELECT path, mtime_ns, size FROM interfaces")
+            }
+            for path in indexed.keys() - files.keys():
+                self._db.execute("DELETE FROM interfaces WHERE path = ?", (path,))
+                self._db.execute("DELETE FROM selectors WHERE path = ?", (path,))
+
+            for path, stat in files.items():
+                if indexed.get(path) == (stat.st_mtime_ns, stat.st_size):
+                    continue
+                logging.debug(f"Indexing ABI interface file {path}")
+                with open(path, "r") as fp:
+                    raw_abi = json.load(fp)
+                abi_id = self._store_abi(raw_abi)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO interfaces (path, mtime_ns, size, abi_id) VALUES (?, ?, ?, ?)",
+                    (path, stat.st_mtime_ns, stat.st_size, abi_id),
+                )
+                self._db.execute("DELETE FROM selectors WHERE path = ?", (path,))
+                self._db.executemany(
+                    "INSERT INTO selectors (selector, path, abi_id) VALUES (?, ?, ?)",
+                    [(selector, path, abi_id) for selector in index_function_description(raw_abi)],
+                )
+
+    def _get_local_abi(self, key: ABIKey) -> Optional[ABI]:
+        # the last file in the lexicographical order wins, as with the local directory provider
+        with self._lock:
+            row = self._db.execute(
+                "SELECT abi_id FROM selectors WHERE selector = ? ORDER BY path DESC LIMIT 1", (key.FunctionSignature,)
+            ).fetchone()
+            return self._load_abi(row[0]) if row is not None else None
+
+    def _get_indexed_address(self, address: str) -> Tuple[Optional[int], Optional[ABI]]:
+        """Return the time the address ABI was fetched at (None if it never was) and the ABI."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fetched_at, abi_id FROM addresses WHERE net = ? AND address = ?", (self._net, address)
+            ).fetchone()
+            if row is None:
+                return None, None
+            return row[0], self._load_abi(row[1]) if row[1] is not None else None
+
+    def _store_address(self, address: str, abi_id: Optional[int]) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO addresses (net, address, abi_id, fetched_at) VALUES (?, ?, ?, ?)",
+            (self._net, address, abi_id, int(time.time())),
+        )
+
+    def _fetch_etherscan_abi(self, key: ABIKey, address: str, refetch: bool = False) -> Optional[ABI]:
+        # the network call is made without holding the lock to allow concurrent resolving
+        try:
+            abi = ABIProviderEtherscanAPI.get_abi(self, key)
+        except ABIEtherscanStatusCode as err:
+            logging.debug(f"Fail on resolving ABI trough API: {str(err)}")
+            with self._lock, self._db:
+                if refetch:
+                    # keep the stored ABI, but don't ask again until the next refetch interval
+                    self._db.execute(
+                        "UPDATE addresses SET fetched_at = ? WHERE net = ? AND address = ?",
+                        (int(time.time()), self._net, address),
+                    )
+                elif "not verified" in str(err):
+                    self._store_address(address, None)
+            return None
+        except ABIEtherscanNetworkError as err:
+            logging.debug(f"Fail on resolving ABI trough API: {str(err)}")
+            return None
+
+        with self._lock, self._db:
+            abi_id = self._store_abi(abi.raw)
+            self._store_address(address, abi_id)
+            self._parsed[abi_id] = abi
+        return abi
+
+    def get_abi(self, key: ABIKey) -> ABI:
+        """
+        Return ABI from the index, falling back to Etherscan and local interfaces.
+
+        :exception ABIResolvingError in case of resolving through all ways is failed.
+        """
+        address = key.ContractAddress.lower()
+        fetched_at, abi = self._get_indexed_address(address)
+        if fetched_at is None:
+            abi = self._fetch_etherscan_abi(key, address)
+        if abi is not None and key.FunctionSignature in abi.func_storage:
+            return abi
+
+        local_abi = self._get_local_abi(key)
+        if local_abi is not None:
+            return local_abi
+
+        if (
+            abi is not None
+            and fetched_at is not None
+            and address not in self._refreshed
+            and time.time() - fetched_at > ABI_REFETCH_INTERVAL
+        ):
+            # the contract could have been upgraded since the ABI was stored
+            self._refreshed.add(address)
+            abi = self._fetch_etherscan_abi(key, address, refetch=True) or abi
+        if abi is not None:
+            return abi
+
+        raise ABIResolvingError()
+
+
+def get_cached_indexed(
+    api_key: str, net: str, interfaces_directory: str, index_path: Optional[str] = None
+) -> CachedStorage[ABIKey, ABI]:
+    """Return CachedStorage backed by the persistent ABI index."""
+    return CachedStorage(ABIProviderIndexed(api_key, net, interfaces_directory, index_path))
@@ -1,7 +1,7 @@
 import os
 import sys
 
-from typing import Any, Union, Optional, Dict, Tuple
+from typing import Any, Union, Optional, Dict, List, Tuple
 
 from utils.brownie_prelude import *
 
@@ -95,6 +95,38 @@ def get_config_params() -> Dict[str, str]:
     return ret
 
 
+# config addresses of the contracts by their names, used to resolve the contracts without the explorer requests
+CONTRACT_CONFIG_KEYS: Dict[str, List[str]] = {
+    "AccountingOracle": ["ACCOUNTING_ORACLE", "ACCOUNTING_ORACLE_IMPL"],
+    "ACL": ["ACL_IMPL"],
+    "Burner": ["BURNER"],
+    "CallsScript": ["ARAGON_CALLS_SCRIPT"],
+    "DepositSecurityModule": ["DEPOSIT_SECURITY_MODULE"],
+    "EIP712StETH": ["EIP712_STETH"],
+    "HashConsensus": ["HASH_CONSENSUS_FOR_AO", "HASH_CONSENSUS_FOR_VEBO"],
+    "LegacyOracle": ["LEGACY_ORACLE", "LEGACY_ORACLE_IMPL"],
+    "Lido": ["LIDO", "LIDO_IMPL"],
+    "LidoLocator": ["LIDO_LOCATOR"],
+    "LidoExecutionLayerRewardsVault": ["EXECUTION_LAYER_REWARDS_VAULT"],
+    "Kernel": ["ARAGON_KERNEL_IMPL"],
+    "NodeOperatorsRegistry": ["NODE_OPERATORS_REGISTRY", "NODE_OPERATORS_REGISTRY_IMPL"],
+    "OracleDaemonConfig": ["ORACLE_DAEMON_CONFIG"],
+    "OracleReportSanityChecker": ["ORACLE_REPORT_SANITY_CHECKER"],
+    "Repo": ["ARAGON_COMMON_REPO_IMPL"],
+    "StakingRouter": ["STAKING_ROUTER", "STAKING_ROUTER_IMPL"],
+    "ValidatorsExitBusOracle": ["VALIDATORS_EXIT_BUS_ORACLE", "VALIDATORS_EXIT_BUS_ORACLE_IMPL"],
+    "Voting": ["VOTING_IMPL"],
+    "WithdrawalQueueERC721": ["WITHDRAWAL_QUEUE", "WITHDRAWAL_QUEUE_IMPL"],
+    "WithdrawalVault": ["WITHDRAWAL_VAULT", "WITHDRAWAL_VAULT_IMPL"],
+}
+
+
+def get_contract_address_mapping() -> Dict[str, List[str]]:
+    """Return contract name -> addresses mapping for the addresses present in the current network config"""
+    params = get_config_params()
+    return {name: [params[key] for key in keys if key in params] for name, keys in CONTRACT_CONFIG_KEYS.items()}
+
+
 class ContractsLazyLoader:
     @property
     def lido_v1(self) -> interface.LidoV1:
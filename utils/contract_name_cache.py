@@ -0,0 +1,121 @@
+"""
+Persistent address -> contract name cache used to display and group transaction events
+without resolving the names through the contract calls on every run.
+
+The resolved names are stored per chain together with the hash of the contract code and
+its proxy implementation (most of the Lido and Aragon contracts are proxies), and are resolved
+again once the code or the implementation at the address changes. The names seeded from
+the config addresses are trusted as is.
+"""
+import json
+import os
+from typing import Callable, Dict, Iterable, Optional
+
+from brownie import chain, web3
+from hexbytes import HexBytes
+
+from utils.rpc_batch import BatchedResponse, rpc_batch
+
+DEFAULT_CONTRACT_NAMES_PATH = os.path.join(os.path.expanduser("~"), ".cache", "lido-scripts", "contract_names.json")
+
+# bytes32(uint256(keccak256("eip1967.proxy.implementation")) - 1), used by OssifiableProxy
+EIP1967_IMPLEMENTATION_SLOT = 0x360894A13BA1A3210667C828492DB98DCA3E2076CC3735A920A3CA505D382BBC
+# ERCProxy (EIP-897) `implementation()`, the Aragon AppProxy resolves it through the Kernel app bases
+ERC897_IMPLEMENTATION_SELECTOR = "0x5c60da1b"
+
+
+def get_contract_names_path() -> str:
+    return os.getenv("CONTRACT_NAMES_CACHE_PATH", DEFAULT_CONTRACT_NAMES_PATH)
+
+
+class ContractNameCache:
+    def __init__(self, path: Optional[str] = None):
+        self._path = path or get_contract_names_path()
+        self._seeded: Dict[str, str] = {}
+        # "<chain id>:<address>" -> {"name": ..., "code_hash": ...}
+        self._entries: Dict[str, Dict[str, str]] = {}
+        if os.path.exists(self._path):
+            with open(self._path, "r") as fp:
+                self._entries = json.load(fp)
+
+    def seed(self, names: Dict[str, str]) -> None:
+        """Add the known names (e.g. from the config), they are used without checking the code."""
+        self._seeded.update({address.lower(): name for address, name in names.items()})
+
+    def _chain_id(self) -> int:
+        return chain.id
+
+    def _code_hashes(self, addresses: Iterable[str]) -> Dict[str, str]:
+        """Hash of the code and the proxy implementation of each address"""
+        with rpc_batch() as batch:
+            requests = {
+                address: (
+                    batch.get_code(address),
+                    batch.get_storage_at(address, EIP1967_IMPLEMENTATION_SLOT),
+                    batch.request("eth_call", [{"to": address, "data": ERC897_IMPLEMENTATION_SELECTOR}, "latest"]),
+                )
+                for address in addresses
+            }
+        return {
+            address: web3.keccak(b"".join(_result_bytes(response) for response in responses)).hex()
+            for address, responses in requests.items()
+        }
+
+    def resolve_many(self, addresses: Iterable[str], resolve: Callable[[str], str]) -> Dict[str, str]:
+        """
+        Return names of the addresses, the code of the not seeded ones is checked with a single batch request,
+        `resolve` is called for the addresses missing in the cache or having the code or the implementation changed.
+        """
+        names = {}
+        unseeded = []
+        for address in dict.fromkeys(addresses):
+            if address.lower() in self._seeded:
+                names[address] = self._seeded[address.lower()]
+            else:
+                unseeded.append(address)
+        if not unseeded:
+            return names
+
+        is_changed = False
+        chain_id = self._chain_id()
+        for address, code_hash in self._code_hashes(unseeded).items():
+            key = f"{chain_id}:{address.lower()}"
+            entry = self._entries.get(key)
+            if entry is not None and entry["code_hash"] == code_hash:
+                names[address] = entry["name"]
+                continue
+
+            names[address] = resolve(address)
+            # unresolved names aren't stored to retry once the ABI is available
+            if names[address]:
+                self._entries[key] = {"name": names[address], "code_hash": code_hash}
+                is_changed = True
+
+        if is_changed:
+            self.save()
+        return names
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self._path)), exist_ok=True)
+        tmp_path = f"{self._path}.tmp"
+        with open(tmp_path, "w") as fp:
+            json.dump(self._entries, fp, indent=1, sort_keys=True)
+        os.replace(tmp_path, self._path)
+
+
+def _result_bytes(response: BatchedResponse) -> bytes:
+    # the contracts which aren't ERCProxy revert the `implementation()` call
+    try:
+        return bytes(HexBytes(response.result()))
+    except ValueError:
+        return b""
+
+
+_contract_name_cache: Optional[ContractNameCache] = None
+
+
+def get_contract_name_cache() -> ContractNameCache:
+    global _contract_name_cache
+    if _contract_name_cache is None:
+        _contract_name_cache = ContractNameCache()
+    return _contract_name_cache
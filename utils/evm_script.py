@@ -1,21 +1,24 @@
+import hashlib
 import logging
 import os
+import struct
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
-from typing import List, Union, Optional, Callable
+from typing import Dict, Iterable, Iterator, List, Set, Tuple, Union, Optional, Callable
 
-import eth_abi
 from brownie.utils import color
-from eth_typing.evm import HexAddress
 from eth_utils import keccak
 from hexbytes import HexBytes
-from web3 import Web3
 
 from avotes_parser.core import parse_script, EncodedCall, Call, FuncInput, decode_function_call
-from avotes_parser.core.ABI import get_cached_combined
+from avotes_parser.core.ABI import ABIKey
+
+from utils.abi_index import get_cached_indexed
 
 from avotes_parser.core.parsing import ParseStructureError
 from avotes_parser.core.ABI.utilities.exceptions import (
+    ABIResolvingError,
     ABILocalNotFound,
     ABIEtherscanStatusCode,
     ABIEtherscanNetworkError,
@@ -23,6 +26,7 @@ from avotes_parser.core.ABI.utilities.exceptions import (
 
 EMPTY_CALLSCRIPT = "0x00000001"
 ETHERSCAN_API_KEY = os.getenv("ETHERSCAN_API_KEY", "TGXU5WGVTVYRDDV2MY71R5JYB7147M13FC")
+ABI_PREFETCH_MAX_WORKERS = 8
 
 
 def create_executor_id(id) -> str:
@@ -33,19 +37,121 @@ def strip_byte_prefix(hexstr):
     return hexstr[2:] if hexstr[0:2] == "0x" else hexstr
 
 
+class EVMScriptBuilder:
+    """
+    Incremental builder of the Aragon callscript.
+
+    Actions are appended into a single bytearray, so building a script
+    with thousands of actions doesn't re-copy the already encoded part.
+    """
+
+    def __init__(self, spec_id=1):
+        self._buffer = bytearray.fromhex(strip_byte_prefix(create_executor_id(spec_id)))
+        self._actions_count = 0
+
+    def add(self, to: str, calldata: Union[str, bytes]) -> "EVMScriptBuilder":
+        address = bytes.fromhex(strip_byte_prefix(to))
+        if len(address) != 20:
+            raise ValueError(f"invalid call target address: {to}")
+        if isinstance(calldata, str):
+            calldata = bytes.fromhex(strip_byte_prefix(calldata))
+
+        self._buffer += address
+        self._buffer += struct.pack(">I", len(calldata))
+        self._buffer += calldata
+        self._actions_count += 1
+        return self
+
+    def extend(self, actions: Iterable[Tuple[str, Union[str, bytes]]]) -> "EVMScriptBuilder":
+        for to, calldata in actions:
+            self.add(to, calldata)
+        return self
+
+    def __len__(self) -> int:
+        return self._actions_count
+
+    def to_bytes(self) -> bytes:
+        return bytes(self._buffer)
+
+    def to_hex(self) -> str:
+        return "0x" + self._buffer.hex()
+
+
 def encode_call_script(actions, spec_id=1) -> str:
-    result = create_executor_id(spec_id)
-    for to, calldata in actions:
-        addr_bytes = Web3.toBytes(hexstr=HexAddress(to)).hex()
-        calldata_bytes = strip_byte_prefix(calldata)
-        length = eth_abi.encode_single("int256", len(calldata_bytes) // 2).hex()
-        result += addr_bytes + length[56:] + calldata_bytes
-    return result
+    return EVMScriptBuilder(spec_id).extend(actions).to_hex()
+
+
+ScriptCallView = Tuple[int, str, str, memoryview]
+
+
+class EVMScriptView:
+    """
+    Lazy read-only view of the encoded Aragon callscript.
+
+    Only the call headers are scanned on creation to build the offset table,
+    the calldata is exposed as memoryview slices without copying. Items are
+    `(index, address, selector, calldata)` tuples where `calldata` excludes
+    the selector, as `EncodedCall.encoded_call_data` does. Calls with calldata
+    shorter than a selector (e.g. plain ETH transfers encoded with "0x") have
+    the empty "0x" selector and the whole calldata as `calldata`.
+    """
+
+    _SPEC_ID_LENGTH = 4
+    _ADDRESS_LENGTH = 20
+    _DATA_LENGTH_LENGTH = 4
+    _SELECTOR_LENGTH = 4
+
+    def __init__(self, script: Union[str, bytes]):
+        if isinstance(script, str):
+            script = bytes.fromhex(strip_byte_prefix(script))
+        self._script = memoryview(script)
+        if len(self._script) < self._SPEC_ID_LENGTH:
+            raise ParseStructureError("EVM script is shorter than spec id")
+        self.spec_id = "0x" + self._script[: self._SPEC_ID_LENGTH].hex()
+        self._offsets = self._build_offsets()
+
+    def _build_offsets(self) -> List[Tuple[int, int]]:
+        # (call start, calldata end) pairs
+        offsets = []
+        header_length = self._ADDRESS_LENGTH + self._DATA_LENGTH_LENGTH
+        position = self._SPEC_ID_LENGTH
+        while position < len(self._script):
+            data_start = position + header_length
+            if data_start > len(self._script):
+                raise ParseStructureError(f"Truncated call header at byte {position}")
+            (data_length,) = struct.unpack_from(">I", self._script, position + self._ADDRESS_LENGTH)
+            if data_start + data_length > len(self._script):
+                raise ParseStructureError(f"Malformed calldata of call at byte {position}")
+            offsets.append((position, data_start + data_length))
+            position = data_start + data_length
+        return offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, index: int) -> ScriptCallView:
+        if index < 0:
+            index += len(self._offsets)
+        start, end = self._offsets[index]
+        address_end = start + self._ADDRESS_LENGTH
+        selector_start = address_end + self._DATA_LENGTH_LENGTH
+        selector_end = selector_start + self._SELECTOR_LENGTH
+        if selector_end > end:
+            selector_end = selector_start
+        return (
+            index,
+            "0x" + self._script[start:address_end].hex(),
+            "0x" + self._script[selector_start:selector_end].hex(),
+            self._script[selector_end:end],
+        )
+
+    def __iter__(self) -> Iterator[ScriptCallView]:
+        return (self[index] for index in range(len(self._offsets)))
 
 
 @lru_cache
 def get_abi_cache(api_key: str, net: str):
-    return get_cached_combined(
+    return get_cached_indexed(
         api_key,
         net,
         os.getenv("INTERFACES_DIRECTORY", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "interfaces")),
@@ -56,60 +162,148 @@ def _is_encoded_script(data: FuncInput) -> bool:
     return data.type == "bytes" and data.name == "_evmScript"
 
 
-def decode_evm_script(
+def _resolve_abis(abi_storage, keys: Iterable[Tuple[str, str]], max_workers: int) -> None:
+    # keys of the same contract are resolved by a single worker to query Etherscan only once per address
+    keys_by_address = defaultdict(list)
+    for address, method_id in keys:
+        keys_by_address[address].append(ABIKey(address, method_id))
+
+    def resolve(address_keys: List[ABIKey]) -> None:
+        for key in address_keys:
+            try:
+                abi_storage[key]
+            except ABIResolvingError:
+                # will be reported on decoding
+                pass
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(resolve, keys_by_address.values()))
+
+
+# (call, decoded call or None if the ABI lacks the method, ABI resolving error) of the script calls
+DecodedScriptCalls = List[Tuple[EncodedCall, Optional[Call], Optional[ABIResolvingError]]]
+
+
+def _decode_calls(calls: List[EncodedCall], abi_storage) -> DecodedScriptCalls:
+    # the ABI errors are kept to be reported in the order of calls
+    decoded = []
+    for call in calls:
+        try:
+            decoded.append(
+                (call, decode_function_call(call.address, call.method_id, call.encoded_call_data, abi_storage), None)
+            )
+        except ABIResolvingError as err:
+            decoded.append((call, None, err))
+    return decoded
+
+
+def prefetch_evm_script_abis(
     script: str,
-    verbose: bool = True,
     specific_net: str = "mainnet",
-    repeat_is_error: bool = True,
     is_encoded_script: Optional[Callable[[FuncInput], bool]] = None,
-) -> List[Union[str, Call, EncodedCall]]:
-    """Decode EVM script to human-readable format."""
-    if verbose:
-        # Switch-on debug messages from evmscript-parser package.
-        logging.basicConfig(format="%(levelname)s:%(message)s", level=logging.DEBUG)
-
+    max_workers: int = ABI_PREFETCH_MAX_WORKERS,
+) -> Dict[Union[str, bytes], DecodedScriptCalls]:
+    """
+    Warm up the ABI cache for every call of the script, including the nested scripts.
+
+    All distinct (address, method id) pairs of a nesting level are resolved concurrently,
+    then the level is decoded to discover the scripts of the next one.
+    Return the decoded calls of every parsed script to be reused by `decode_evm_script`.
+    """
     if is_encoded_script is None:
         is_encoded_script = _is_encoded_script
 
-    try:
-        parsed = parse_script(script)
-    except ParseStructureError as err:
-        if verbose:
-            logging.basicConfig(level=logging.INFO)
-        return [repr(err)]
-
     abi_storage = get_abi_cache(ETHERSCAN_API_KEY, specific_net)
 
+    decoded_scripts: Dict[Union[str, bytes], DecodedScriptCalls] = {}
+    resolved: Set[Tuple[str, str]] = set()
+    scripts = [script]
+    while scripts:
+        parsed = {}
+        for level_script in scripts:
+            try:
+                parsed[level_script] = parse_script(level_script).calls
+            except ParseStructureError:
+                continue
+
+        keys = {(call.address, call.method_id) for calls in parsed.values() for call in calls} - resolved
+        _resolve_abis(abi_storage, keys, max_workers)
+        resolved |= keys
+
+        scripts = []
+        for level_script, calls in parsed.items():
+            decoded_scripts[level_script] = _decode_calls(calls, abi_storage)
+            for _, call_info, _ in decoded_scripts[level_script]:
+                if call_info is not None:
+                    scripts.extend(inp.value for inp in filter(is_encoded_script, call_info.inputs))
+    return decoded_scripts
+
+
+CallPath = Tuple[Tuple[int, int], ...]
+
+
+def _call_digest(call: EncodedCall) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(call.address.lower().encode())
+    digest.update(call.method_id.encode())
+    digest.update(call.encoded_call_data.encode())
+    return digest.digest()
+
+
+def _format_call_path(path: CallPath) -> str:
+    return " -> ".join(f"{ind + 1}/{total}" for ind, total in path)
+
+
+def _decode_script_calls(
+    script: str,
+    abi_storage,
+    repeat_is_error: bool,
+    is_encoded_script: Callable[[FuncInput], bool],
+    seen_calls: Dict[bytes, Tuple[CallPath, Union[str, Call, None]]],
+    path: CallPath,
+    decoded_scripts: Dict[Union[str, bytes], DecodedScriptCalls],
+) -> List[Union[str, Call, EncodedCall]]:
+    # seen_calls is shared across the nesting levels and keeps only fixed-size digests of the calls,
+    # decoded_scripts are the calls decoded beforehand, each is taken once as the nested inputs are replaced
+    decoded = decoded_scripts.pop(script, None)
+    if decoded is None:
+        try:
+            decoded = _decode_calls(parse_script(script).calls, abi_storage)
+        except ParseStructureError as err:
+            return [repr(err)]
+
     calls = []
-    called_contracts = defaultdict(lambda: defaultdict(dict))
-    for ind, call in enumerate(parsed.calls):
+    total = len(decoded)
+    for ind, (call, call_info, error) in enumerate(decoded):
+        call_path = path + ((ind, total),)
         try:
-            call_info = decode_function_call(call.address, call.method_id, call.encoded_call_data, abi_storage)
+            if error is not None:
+                raise error
 
             if call_info is not None:
                 for inp in filter(is_encoded_script, call_info.inputs):
-                    script = inp.value
-                    inp.value = decode_evm_script(
-                        script,
-                        verbose=verbose,
-                        specific_net=specific_net,
-                        repeat_is_error=repeat_is_error,
-                        is_encoded_script=is_encoded_script,
+                    inp.value = _decode_script_calls(
+                        inp.value,
+                        abi_storage,
+                        repeat_is_error,
+                        is_encoded_script,
+                        seen_calls,
+                        call_path,
+                        decoded_scripts,
                     )
 
         except (ABIEtherscanNetworkError, ABIEtherscanStatusCode, ABILocalNotFound) as err:
             call_info = repr(err)
 
-        contract_calls = called_contracts[call.address][call.method_id]
-        if call.encoded_call_data in contract_calls:
-            (jnd, prev_call_info) = contract_calls[call.encoded_call_data]
-            total = len(parsed.calls)
+        call_digest = _call_digest(call)
+        if call_digest in seen_calls:
+            (prev_path, prev_call_info) = seen_calls[call_digest]
             message = (
                 f"!!! REPEATED SCRIPTS !!!:\n"
-                f"Previous is {jnd + 1}/{total}:\n"
+                f"Previous is {_format_call_path(prev_path)}:\n"
                 f"{calls_info_pretty_print(prev_call_info)}\n"
                 f"-----------------------------------------\n"
-                f"Current is {ind + 1}/{total}\n"
+                f"Current is {_format_call_path(call_path)}\n"
                 f"{calls_info_pretty_print(call_info)}"
             )
 
@@ -123,7 +317,44 @@ def decode_evm_script(
             calls.append(call_info)
         else:
             calls.append(call)
-        contract_calls[call.encoded_call_data] = (ind, call_info)
+        seen_calls[call_digest] = (call_path, call_info)
+
+    return calls
+
+
+def decode_evm_script(
+    script: str,
+    verbose: bool = True,
+    specific_net: str = "mainnet",
+    repeat_is_error: bool = True,
+    is_encoded_script: Optional[Callable[[FuncInput], bool]] = None,
+    batched: bool = False,
+) -> List[Union[str, Call, EncodedCall]]:
+    """
+    Decode EVM script to human-readable format.
+
+    Repeated calls are reported across all nesting levels, e.g. the same call
+    made both directly and via `agent_forward`.
+    If `batched` is set, the ABIs of all calls across the nesting levels
+    are resolved concurrently and the calls are decoded once, level by level.
+    """
+    if verbose:
+        # Switch-on debug messages from evmscript-parser package.
+        logging.basicConfig(format="%(levelname)s:%(message)s", level=logging.DEBUG)
+
+    if is_encoded_script is None:
+        is_encoded_script = _is_encoded_script
+
+    decoded_scripts = {}
+    if batched:
+        decoded_scripts = prefetch_evm_script_abis(
+            script, specific_net=specific_net, is_encoded_script=is_encoded_script
+        )
+
+    abi_storage = get_abi_cache(ETHERSCAN_API_KEY, specific_net)
+    calls = _decode_script_calls(
+        script, abi_storage, repeat_is_error, is_encoded_script, seen_calls={}, path=(), decoded_scripts=decoded_scripts
+    )
 
     if verbose:
         logging.basicConfig(level=logging.INFO)
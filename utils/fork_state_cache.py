@@ -0,0 +1,227 @@
+"""
+Local stand-in JSON-RPC for Ganache forks which persists the remote state fetched during a session.
+
+Every `eth_getStorageAt`, `eth_getCode`, `eth_getBalance` (and the few other immutable
+at a given block requests Ganache makes on forking) is recorded for the pinned fork block
+and saved to the cache directory. The next run pinned to the same block replays them
+without going to the upstream node.
+
+Usage:
+
+    python -m utils.fork_state_cache --upstream https://mainnet.infura.io/v3/$WEB3_INFURA_PROJECT_ID
+    brownie test --network local-fork
+"""
+import argparse
+import glob
+import gzip
+import json
+import os
+import signal
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+import requests
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "lido-scripts", "fork-state")
+DEFAULT_PORT = 7777
+# reuse the latest cached block if it's not older than this number of blocks,
+# forking from a non-recent block needs an archive upstream node
+DEFAULT_MAX_BLOCK_AGE = 0
+SAVE_EVERY_NEW_ENTRIES = 1000
+
+# methods whose results are immutable for the pinned block
+CACHED_METHODS = (
+    "eth_getStorageAt",
+    "eth_getCode",
+    "eth_getBalance",
+    "eth_getTransactionCount",
+    "eth_getBlockByNumber",
+    "eth_chainId",
+    "net_version",
+)
+BLOCK_TAGS = ("latest", "pending", "safe", "finalized")
+# cache miss marker, `null` is a valid result (e.g. an unknown block) to be replayed as well
+MISSING = object()
+
+
+class ForkStateCache:
+    """Persistent (method, params) -> result storage for the single fork block."""
+
+    def __init__(self, cache_dir: str, chain_id: int, block: int):
+        self.block = block
+        self._path = os.path.join(cache_dir, f"{chain_id}-{block}.json.gz")
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Any] = {}
+        self._unsaved = 0
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        if os.path.exists(self._path):
+            with gzip.open(self._path, "rt") as fp:
+                self._entries = json.load(fp)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(method: str, params: List[Any]) -> str:
+        return json.dumps([method, params], sort_keys=True).lower()
+
+    def get(self, key: str) -> Any:
+        """Return the cached result or `MISSING`"""
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return MISSING
+
+    def put(self, key: str, result: Any) -> None:
+        with self._lock:
+            self._entries[key] = result
+            self._unsaved += 1
+            should_save = self._unsaved >= SAVE_EVERY_NEW_ENTRIES
+        if should_save:
+            self.save()
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._unsaved:
+                return
+            tmp_path = f"{self._path}.tmp"
+            with gzip.open(tmp_path, "wt") as fp:
+                json.dump(self._entries, fp)
+            os.replace(tmp_path, self._path)
+            self._unsaved = 0
+
+
+def _upstream_request(session: requests.Session, upstream: str, payload: Any) -> Any:
+    response = session.post(upstream, json=payload, timeout=120)
+    response.raise_for_status()
+    return response.json()
+
+
+def _cached_blocks(cache_dir: str, chain_id: int) -> Dict[int, str]:
+    return {
+        int(os.path.basename(path)[len(f"{chain_id}-") : -len(".json.gz")]): path
+        for path in glob.glob(os.path.join(cache_dir, f"{chain_id}-*.json.gz"))
+    }
+
+
+def find_cached_block(cache_dir: str, chain_id: int, latest_block: int, max_age: int) -> Optional[int]:
+    """Return the most recent cached block not older than `max_age` blocks."""
+    blocks = [block for block in _cached_blocks(cache_dir, chain_id) if 0 <= latest_block - block <= max_age]
+    return max(blocks, default=None)
+
+
+def prune_cached_blocks(cache_dir: str, chain_id: int, latest_block: int, max_age: int) -> List[int]:
+    """Remove the cached blocks older than `max_age` blocks, as they are never reused. Return the removed blocks."""
+    removed = []
+    for block, path in _cached_blocks(cache_dir, chain_id).items():
+        if latest_block - block > max_age:
+            os.remove(path)
+            removed.append(block)
+    return sorted(removed)
+
+
+def make_handler(cache: ForkStateCache, upstream: str):
+    session = requests.Session()
+    pinned_block = hex(cache.block)
+
+    def pin(params: List[Any]) -> List[Any]:
+        # requests for the moving tags are answered for the fork block
+        return [pinned_block if param in BLOCK_TAGS else param for param in params]
+
+    def handle(request: Dict) -> Dict:
+        method, params = request.get("method"), pin(request.get("params") or [])
+
+        if method == "eth_blockNumber":
+            return {"jsonrpc": "2.0", "id": request.get("id"), "result": pinned_block}
+
+        if method not in CACHED_METHODS:
+            return _upstream_request(session, upstream, {**request, "params": params})
+
+        key = ForkStateCache.key(method, params)
+        result = cache.get(key)
+        if result is MISSING:
+            response = _upstream_request(session, upstream, {**request, "params": params})
+            if "error" in response:
+                return response
+            result = response["result"]
+            cache.put(key, result)
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if isinstance(payload, list):
+                response = [handle(request) for request in payload]
+            else:
+                response = handle(payload)
+
+            body = json.dumps(response).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_):
+            pass
+
+    return Handler
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Caching JSON-RPC stand-in for Ganache forks")
+    parser.add_argument(
+        "--upstream", default=os.getenv("FORK_STATE_UPSTREAM"), required=not os.getenv("FORK_STATE_UPSTREAM")
+    )
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-dir", default=os.getenv("FORK_STATE_CACHE_DIR", DEFAULT_CACHE_DIR))
+    parser.add_argument("--block", type=int, help="fork block, the latest suitable cached block by default")
+    parser.add_argument(
+        "--max-block-age",
+        type=int,
+        default=DEFAULT_MAX_BLOCK_AGE,
+        help="reuse the latest cached block not older than this number of blocks, the upstream must be an archive node;"
+        " the older cached blocks are removed unless --block is set",
+    )
+    args = parser.parse_args(argv)
+
+    session = requests.Session()
+    chain_id = int(
+        _upstream_request(session, args.upstream, {"jsonrpc": "2.0", "id": 1, "method": "eth_chainId"})["result"], 16
+    )
+    block = args.block
+    if block is None:
+        latest_block = int(
+            _upstream_request(session, args.upstream, {"jsonrpc": "2.0", "id": 1, "method": "eth_blockNumber"})[
+                "result"
+            ],
+            16,
+        )
+        block = find_cached_block(args.cache_dir, chain_id, latest_block, args.max_block_age) or latest_block
+        # the state of the blocks out of the reuse window would pile up otherwise
+        prune_cached_blocks(args.cache_dir, chain_id, latest_block, args.max_block_age)
+
+    cache = ForkStateCache(args.cache_dir, chain_id, block)
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(cache, args.upstream))
+
+    def shutdown(*_):
+        cache.save()
+        print(f"Fork state cache: {cache.hits} hits, {cache.misses} misses, {len(cache)} entries saved")
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    print(f"Serving fork of chain {chain_id} at block {block} on port {args.port} ({len(cache)} cached entries)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
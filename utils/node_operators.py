@@ -1,7 +1,17 @@
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from brownie import chain
+from brownie.network.contract import ContractCall
+
 from utils.evm_script import encode_call_script
+from utils.rpc_batch import rpc_batch
 
 from utils.config import contracts
 
+NODE_OPERATORS_SNAPSHOT_CHUNK_SIZE = 100
+
 
 def encode_set_node_operator_staking_limit(id, limit, registry):
     return (
@@ -33,8 +43,109 @@ def encode_set_node_operator_reward_address(id, rewardAddress, registry):
     )
 
 
-def get_node_operators(registry):
-    return [{**registry.getNodeOperator(i, True), **{'index': i}} for i in range(registry.getNodeOperatorsCount())]
+def get_node_operators(registry, block: Optional[int] = None):
+    block = chain.height if block is None else block
+    count = registry.getNodeOperatorsCount(block_identifier=block)
+    node_operators = _batched_calls([(registry.getNodeOperator, (i, True)) for i in range(count)], block)
+    return [{**node_operator.dict(), **{'index': i}} for i, node_operator in enumerate(node_operators)]
+
+
+def _batched_calls(
+    calls: List[Tuple[ContractCall, Tuple]], block: int, chunk_size: int = NODE_OPERATORS_SNAPSHOT_CHUNK_SIZE
+) -> List[Any]:
+    # the block-pinned eth_calls are sent as JSON-RPC batches of `chunk_size` requests
+    with rpc_batch(max_batch_size=chunk_size) as batch:
+        responses = [batch.call(call, *args, block_identifier=block) for call, args in calls]
+
+    results = []
+    for (call, args), response in zip(calls, responses):
+        try:
+            results.append(response.result())
+        except ValueError as err:
+            raise ValueError(f"Call of {call._name}{tuple(args)} failed at block {block}: {err}") from err
+    return results
+
+
+class Column(array):
+    """Array-backed integer column which also accepts a list of ids as an index."""
+
+    def __getitem__(self, index: Union[int, slice, Iterable[int]]):
+        if isinstance(index, (int, slice)):
+            return super().__getitem__(index)
+        return [super(Column, self).__getitem__(i) for i in index]
+
+
+@dataclass
+class NodeOperatorsSnapshot:
+    """
+    Columnar state of all NodeOperatorsRegistry operators read at a pinned block.
+
+    The operators and their summaries are fetched with chunked JSON-RPC batches,
+    so the whole registry takes O(N / chunk_size) round trips.
+    """
+
+    block: int
+    active: List[bool]
+    name: List[str]
+    reward_address: List[str]
+    total_vetted: Column
+    total_exited: Column
+    total_added: Column
+    total_deposited: Column
+    is_target_limit_active: List[bool]
+    target_validators_count: Column
+    stuck_validators_count: Column
+    refunded_validators_count: Column
+    stuck_penalty_end_timestamp: Column
+    depositable_validators_count: Column
+
+    @classmethod
+    def read(
+        cls, registry=None, block: Optional[int] = None, chunk_size: int = NODE_OPERATORS_SNAPSHOT_CHUNK_SIZE
+    ) -> "NodeOperatorsSnapshot":
+        registry = registry or contracts.node_operators_registry
+        block = chain.height if block is None else block
+        ids = range(registry.getNodeOperatorsCount(block_identifier=block))
+
+        calls = [(registry.getNodeOperator, (i, True)) for i in ids]
+        calls += [(registry.getNodeOperatorSummary, (i,)) for i in ids]
+        results = _batched_calls(calls, block, chunk_size)
+        operators, summaries = results[: len(ids)], results[len(ids) :]
+
+        def column(values: Iterable[int]) -> Column:
+            return Column("Q", values)
+
+        return cls(
+            block=block,
+            active=[no["active"] for no in operators],
+            name=[no["name"] for no in operators],
+            reward_address=[no["rewardAddress"] for no in operators],
+            total_vetted=column(no["totalVettedValidators"] for no in operators),
+            total_exited=column(no["totalExitedValidators"] for no in operators),
+            total_added=column(no["totalAddedValidators"] for no in operators),
+            total_deposited=column(no["totalDepositedValidators"] for no in operators),
+            is_target_limit_active=[summary["isTargetLimitActive"] for summary in summaries],
+            target_validators_count=column(summary["targetValidatorsCount"] for summary in summaries),
+            stuck_validators_count=column(summary["stuckValidatorsCount"] for summary in summaries),
+            refunded_validators_count=column(summary["refundedValidatorsCount"] for summary in summaries),
+            stuck_penalty_end_timestamp=column(summary["stuckPenaltyEndTimestamp"] for summary in summaries),
+            depositable_validators_count=column(summary["depositableValidatorsCount"] for summary in summaries),
+        )
+
+    def __len__(self) -> int:
+        return len(self.name)
+
+    def node_operator(self, id: int) -> Dict[str, Any]:
+        """Return operator in the `getNodeOperator(id, True)` format."""
+        return {
+            "active": self.active[id],
+            "name": self.name[id],
+            "rewardAddress": self.reward_address[id],
+            "totalVettedValidators": self.total_vetted[id],
+            "totalExitedValidators": self.total_exited[id],
+            "totalAddedValidators": self.total_added[id],
+            "totalDepositedValidators": self.total_deposited[id],
+        }
 
 
 def _encode_add_operator(address, name, registry):
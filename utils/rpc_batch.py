@@ -0,0 +1,180 @@
+"""
+Opt-in JSON-RPC batching for the read-only requests made by tests.
+
+Usage:
+
+    with rpc_batch() as batch:
+        operators = [batch.call(registry.getNodeOperator, i, True) for i in range(count)]
+    for operator in operators:
+        print(operator.result()["name"])
+
+The queued requests are sent as a single JSON-RPC batch array when the batch is full,
+when a pending result is requested (after the flush window passes to let concurrent
+callers join), or on the context exit.
+"""
+import itertools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from brownie import web3
+from brownie.network.contract import ContractCall
+from web3._utils.request import make_post_request
+
+DEFAULT_MAX_BATCH_SIZE = 100
+DEFAULT_FLUSH_WINDOW = 0.0
+
+BATCHED_METHODS = ("eth_call", "eth_getStorageAt", "eth_getCode", "eth_getBalance")
+
+
+class BatchedResponse:
+    """Lazy result of the batched request."""
+
+    def __init__(self, batch: "RPCBatch", decoder: Optional[Callable[[Any], Any]]):
+        self._batch = batch
+        self._decoder = decoder
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+
+    def _set(self, result: Any = None, error: Any = None) -> None:
+        try:
+            self._result = self._decoder(result) if self._decoder is not None and error is None else result
+            self._error = error
+        except Exception as err:
+            self._error = repr(err)
+        finally:
+            self._done.set()
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def result(self) -> Any:
+        if not self._done.is_set():
+            self._batch.flush(wait_window=True)
+            self._done.wait()
+        if self._error is not None:
+            raise ValueError(self._error)
+        return self._result
+
+
+class RPCBatch:
+    """Thread-safe queue of eth_call/eth_getStorageAt/eth_getCode/eth_getBalance requests sent as JSON-RPC batches."""
+
+    def __init__(
+        self,
+        provider=None,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        flush_window: float = DEFAULT_FLUSH_WINDOW,
+    ):
+        self._provider = provider or web3.provider
+        self._max_batch_size = max_batch_size
+        self._flush_window = flush_window
+        self._lock = threading.Lock()
+        self._queue: List[Dict] = []
+        self._pending: Dict[int, BatchedResponse] = {}
+        self._queued_at: Optional[float] = None
+        self._ids = itertools.count(1)
+        self.round_trips = 0
+
+    def request(
+        self, method: str, params: List[Any], decoder: Optional[Callable[[Any], Any]] = None
+    ) -> BatchedResponse:
+        if method not in BATCHED_METHODS:
+            raise ValueError(f"Method {method} can't be batched, only {BATCHED_METHODS} are supported")
+
+        response = BatchedResponse(self, decoder)
+        with self._lock:
+            request_id = next(self._ids)
+            self._queue.append({"jsonrpc": "2.0", "method": method, "params": params, "id": request_id})
+            self._pending[request_id] = response
+            if self._queued_at is None:
+                self._queued_at = time.monotonic()
+            is_full = len(self._queue) >= self._max_batch_size
+
+        if is_full:
+            self.flush()
+        return response
+
+    def call(self, contract_call: ContractCall, *args, block_identifier: Any = "latest") -> BatchedResponse:
+        """Queue a view call of the brownie contract method, the result is decoded as brownie does."""
+        tx = {"to": contract_call._address, "data": contract_call.encode_input(*args)}
+        return self.request("eth_call", [tx, _to_block_param(block_identifier)], contract_call.decode_output)
+
+    def get_storage_at(self, address: str, position: int, block_identifier: Any = "latest") -> BatchedResponse:
+        return self.request("eth_getStorageAt", [address, hex(position), _to_block_param(block_identifier)])
+
+    def get_code(self, address: str, block_identifier: Any = "latest") -> BatchedResponse:
+        return self.request("eth_getCode", [address, _to_block_param(block_identifier)])
+
+    def get_balance(self, address: str, block_identifier: Any = "latest") -> BatchedResponse:
+        return self.request(
+            "eth_getBalance", [address, _to_block_param(block_identifier)], lambda value: int(value, 16)
+        )
+
+    def flush(self, wait_window: bool = False) -> None:
+        if wait_window and self._flush_window > 0:
+            with self._lock:
+                queued_at = self._queued_at
+            if queued_at is not None:
+                time.sleep(max(0.0, queued_at + self._flush_window - time.monotonic()))
+
+        with self._lock:
+            queue, self._queue = self._queue, []
+            pending = {request["id"]: self._pending.pop(request["id"]) for request in queue}
+            self._queued_at = None
+
+        for offset in range(0, len(queue), self._max_batch_size):
+            chunk = queue[offset : offset + self._max_batch_size]
+            try:
+                responses = self._send(chunk)
+            except Exception as err:
+                for request in queue[offset:]:
+                    pending[request["id"]]._set(error=repr(err))
+                raise
+            chunk_pending = {request["id"]: pending[request["id"]] for request in chunk}
+            if isinstance(responses, dict):
+                # the whole batch is rejected with a single error object
+                error = responses.get("error", responses)
+                responses = []
+            else:
+                error = "No response for the batched request"
+            for response in responses:
+                response_pending = chunk_pending.pop(response.get("id"), None)
+                if response_pending is not None:
+                    response_pending._set(response.get("result"), response.get("error"))
+            for response_pending in chunk_pending.values():
+                response_pending._set(error=error)
+
+    def _send(self, requests: List[Dict]) -> Union[List[Dict], Dict]:
+        self.round_trips += 1
+        endpoint_uri = getattr(self._provider, "endpoint_uri", None)
+        if endpoint_uri is None:
+            # non-HTTP providers: no batching, but the same interface
+            return [
+                {**self._provider.make_request(request["method"], request["params"]), "id": request["id"]}
+                for request in requests
+            ]
+
+        raw_response = make_post_request(
+            endpoint_uri, json.dumps(requests).encode(), **self._provider.get_request_kwargs()
+        )
+        return json.loads(raw_response)
+
+
+def _to_block_param(block_identifier: Any) -> Any:
+    return hex(block_identifier) if isinstance(block_identifier, int) else block_identifier
+
+
+@contextmanager
+def rpc_batch(
+    max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, flush_window: float = DEFAULT_FLUSH_WINDOW
+) -> Iterator[RPCBatch]:
+    """Collect requests into JSON-RPC batches, the remaining ones are sent on exit."""
+    batch = RPCBatch(max_batch_size=max_batch_size, flush_window=flush_window)
+    try:
+        yield batch
+    finally:
+        batch.flush()
@@ -1,7 +1,33 @@
-from typing import List
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from brownie.exceptions import EventLookupError
+from brownie.network.event import EventDict
 
 #!/usr/bin/python3
 
+
+# Events chain compiled into an automaton: state `i` means `reference_events[:i]` are passed,
+# transitions[i][name] is the state after the first `name` occurrence in `reference_events[i:]`.
+@lru_cache(maxsize=None)
+def _compile_events_chain(reference_events: Tuple[str, ...]) -> Tuple[Dict[str, int], ...]:
+    transitions: List[Dict[str, int]] = [{}]
+    for idx in range(len(reference_events) - 1, -1, -1):
+        transitions.append({**transitions[-1], reference_events[idx]: idx + 1})
+    return tuple(reversed(transitions))
+
+
+def _events_chain_mismatch(tx_events: Sequence[str], reference_events: Tuple[str, ...]) -> Optional[str]:
+    transitions = _compile_events_chain(reference_events)
+    state = 0
+    for ev in tx_events:
+        next_state = transitions[state].get(ev)
+        if next_state is None:
+            return f"{ev} not found in the remaining {list(reference_events[state:])} events chain"
+        state = next_state
+    return None
+
+
 # Check that all tx_events contained in reference_events (with proper ordering and occurrences count).
 # Allow some of the reference_events skipped in the tx_events.
 #
@@ -14,7 +40,87 @@ from typing import List
 # tx_events: ['A', 'B', 'A', 'B'], reference_events: ['A', 'B'] => invalid // duplicated 'A', 'B' events chain
 # tx_events: ['A', 'C', 'B'], reference_events: ['A', 'B', 'C'] => invalid // wrong order
 def validate_events_chain(tx_events: List[str], reference_events: List[str]):
-    for ev in tx_events:
-        idx = next((reference_events.index(e) for e in reference_events if e == ev), len(reference_events))
-        assert idx != len(reference_events), f"{ev} not found in the remaining {reference_events} events chain"
-        reference_events = reference_events[idx + 1 :]
+    mismatch = _events_chain_mismatch(tx_events, tuple(reference_events))
+    assert mismatch is None, mismatch
+
+
+class EventsValidator:
+    """
+    Events chain, events count and fields expectations of a single vote item compiled to be checked
+    in one pass over the item events.
+
+    Example:
+
+    EventsValidator(
+        ["LogScriptCall", "NodeOperatorAdded", "ScriptResult"],
+        counts={"NodeOperatorAdded": 1},
+        fields={"NodeOperatorAdded": {"nodeOperatorId": 1, "name": "Operator"}},
+    )
+
+    `fields` values are checked against the first event with the name or, being a list,
+    against the events with the name one by one.
+    """
+
+    def __init__(
+        self,
+        events_chain: List[str],
+        counts: Optional[Dict[str, int]] = None,
+        fields: Optional[Dict[str, Union[Dict[str, Any], List[Dict[str, Any]]]]] = None,
+    ):
+        self._events_chain = tuple(events_chain)
+        _compile_events_chain(self._events_chain)
+        self._counts = counts or {}
+        self._fields = {
+            name: expected if isinstance(expected, list) else [expected] for name, expected in (fields or {}).items()
+        }
+
+    def mismatches(self, event: EventDict) -> List[str]:
+        """Return all of the found mismatches, empty if the events match"""
+        names = []
+        counts: Dict[str, int] = {}
+        # the events to check the fields of, by name
+        checked: Dict[str, List] = {name: [] for name in self._fields}
+        for item in event:
+            names.append(item.name)
+            counts[item.name] = counts.get(item.name, 0) + 1
+            if item.name in checked and len(checked[item.name]) < len(self._fields[item.name]):
+                checked[item.name].append(item)
+
+        result = []
+        chain_mismatch = _events_chain_mismatch(names, self._events_chain)
+        if chain_mismatch is not None:
+            result.append(chain_mismatch)
+        for name, count in self._counts.items():
+            if counts.get(name, 0) != count:
+                result.append(f"{name} fired {counts.get(name, 0)} times, expected {count}")
+        for name, expected_items in self._fields.items():
+            for idx, expected in enumerate(expected_items):
+                if idx >= len(checked[name]):
+                    result.append(f"{name} #{idx} not fired")
+                    continue
+                for field, value in expected.items():
+                    try:
+                        actual = checked[name][idx][field]
+                    except EventLookupError:
+                        result.append(f"{name} #{idx} has no {field} field")
+                        continue
+                    if actual != value:
+                        result.append(f"{name} #{idx} {field}: {actual} != {value}")
+        return result
+
+    def validate(self, event: EventDict) -> None:
+        mismatches = self.mismatches(event)
+        assert not mismatches, "\n".join(mismatches)
+
+
+def validate_events_groups(events_groups: List[EventDict], validators: List[EventsValidator]) -> None:
+    """
+    Validate the vote items events (e.g. `group_voting_events` result) against the validators
+    item by item and report all the found mismatches at once
+    """
+    mismatches = []
+    if len(events_groups) != len(validators):
+        mismatches.append(f"{len(events_groups)} vote items, expected {len(validators)}")
+    for idx, (event, validator) in enumerate(zip(events_groups, validators)):
+        mismatches += [f"Vote item #{idx + 1}: {mismatch}" for mismatch in validator.mismatches(event)]
+    assert not mismatches, "\n".join(mismatches)
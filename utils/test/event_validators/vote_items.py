@@ -0,0 +1,90 @@
+from typing import Callable, List, NamedTuple, Optional, Tuple, Union
+
+from brownie.exceptions import EventLookupError
+from brownie.network.event import EventDict
+
+from .common import EventsValidator
+
+
+class VoteItemExpectation(NamedTuple):
+    # 1-based vote item number as displayed by `display_voting_events`
+    item: int
+    # `validate_*_event` function called as validator(item_events, *params) or the compiled `EventsValidator`
+    validator: Union[Callable[..., None], EventsValidator]
+    params: Tuple = ()
+
+
+class VoteItemCheck(NamedTuple):
+    item: int
+    validator: str
+    error: Optional[str]
+
+
+class VoteItemsReport:
+    def __init__(self, checks: List[VoteItemCheck]):
+        self.checks = checks
+
+    @property
+    def failed(self) -> List[VoteItemCheck]:
+        return [check for check in self.checks if check.error is not None]
+
+    def __str__(self) -> str:
+        lines = [f"{len(self.checks) - len(self.failed)}/{len(self.checks)} vote item checks passed"]
+        for check in self.failed:
+            lines.append(f"Vote item #{check.item} {check.validator}: {check.error}")
+        return "\n".join(lines)
+
+    def assert_valid(self) -> None:
+        assert not self.failed, str(self)
+
+
+def _validator_name(validator: Union[Callable[..., None], EventsValidator]) -> str:
+    return getattr(validator, "__name__", type(validator).__name__)
+
+
+def _check_vote_item(event: EventDict, expectation: VoteItemExpectation) -> Optional[str]:
+    if isinstance(expectation.validator, EventsValidator):
+        return "\n".join(expectation.validator.mismatches(event)) or None
+    try:
+        expectation.validator(event, *expectation.params)
+    except (AssertionError, EventLookupError) as e:
+        return str(e) or type(e).__name__
+    return None
+
+
+def validate_vote_items(events_groups: List[EventDict], expectations: List[VoteItemExpectation]) -> VoteItemsReport:
+    """
+    Check the vote items events (`group_voting_events` result) against the expectations spec, e.g.
+
+    [
+        VoteItemExpectation(1, validate_node_operator_added_event, (node_operator_item,)),
+        VoteItemExpectation(2, EventsValidator(["LogScriptCall", "ChangeVoteTime"], counts={"ChangeVoteTime": 1})),
+    ]
+
+    The grouped events are traversed once, item by item, with all of the item expectations checked
+    and the failures collected to the report instead of stopping on the first one.
+    The vote items without expectations and the expectations for the missing items are reported as failed.
+    """
+    by_item: List[List[VoteItemExpectation]] = [[] for _ in events_groups]
+    checks = []
+    for expectation in expectations:
+        if 1 <= expectation.item <= len(events_groups):
+            by_item[expectation.item - 1].append(expectation)
+        else:
+            checks.append(
+                VoteItemCheck(
+                    expectation.item,
+                    _validator_name(expectation.validator),
+                    f"no such vote item, {len(events_groups)} items found",
+                )
+            )
+
+    for item, (event, item_expectations) in enumerate(zip(events_groups, by_item), start=1):
+        if not item_expectations:
+            checks.append(VoteItemCheck(item, "-", "no expectations for the vote item"))
+        for expectation in item_expectations:
+            checks.append(
+                VoteItemCheck(item, _validator_name(expectation.validator), _check_vote_item(event, expectation))
+            )
+
+    return VoteItemsReport(sorted(checks, key=lambda check: check.item))
@@ -1,4 +1,5 @@
-import itertools
+import struct
+from bisect import bisect_left
 from dataclasses import dataclass
 from enum import Enum
 from typing import NewType, Tuple
@@ -12,6 +13,9 @@ NodeOperatorGlobalIndex = Tuple[StakingModuleId, NodeOperatorId]
 
 ZERO_HASH = bytes([0]*32)
 
+# stuck or exited validators count is packed as two big-endian uint64 words
+UINT64_MASK = 2**64 - 1
+
 
 class ItemType(Enum):
     EXTRA_DATA_TYPE_STUCK_VALIDATORS = 1
@@ -106,18 +110,22 @@ class ExtraDataService:
     ) -> list[ItemPayload]:
         # sort by module id and node operator id
         operator_validators = sorted(validators.items(), key=lambda x: x[0])
+        operator_indexes = [global_index for global_index, _ in operator_validators]
 
         payloads = []
 
-        for module_id, operators_by_module in itertools.groupby(operator_validators, key=lambda x: x[0][0]):
-            operator_ids = []
-            vals_count = []
+        start = 0
+        while start < len(operator_validators):
+            module_id = operator_indexes[start][0]
+            # the first operator of the next module
+            end = bisect_left(operator_indexes, (module_id + 1,), start)
+            operators_by_module = operator_validators[start:end][:max_no_in_payload_count]
+            start = end
 
-            for ((_, no_id), validators_count) in list(operators_by_module)[:max_no_in_payload_count]:
-                operator_ids.append(no_id.to_bytes(
-                    ExtraDataService.Lengths.NODE_OPERATOR_IDS, byteorder='big'))
-                vals_count.append(validators_count.to_bytes(
-                    ExtraDataService.Lengths.STUCK_OR_EXITED_VALS_COUNT, byteorder='big'))
+            operator_ids = [no_id for ((_, no_id), _) in operators_by_module]
+            vals_count_words = []
+            for (_, validators_count) in operators_by_module:
+                vals_count_words += (validators_count >> 64, validators_count & UINT64_MASK)
 
             payloads.append(
                 ItemPayload(
@@ -125,8 +133,8 @@ class ExtraDataService:
                         ExtraDataService.Lengths.MODULE_ID, byteorder='big'),
                     node_ops_count=len(operator_ids).to_bytes(
                         ExtraDataService.Lengths.NODE_OPS_COUNT, byteorder='big'),
-                    node_operator_ids=b"".join(operator_ids),
-                    vals_counts=b"".join(vals_count),
+                    node_operator_ids=struct.pack(f'>{len(operator_ids)}Q', *operator_ids),
+                    vals_counts=struct.pack(f'>{len(vals_count_words)}Q', *vals_count_words),
                 )
             )
 
@@ -157,13 +165,23 @@ class ExtraDataService:
 
     @staticmethod
     def to_bytes(extra_data: list[ExtraDataItem]) -> bytes:
-        extra_data_bytes = b''
-        for item in extra_data:
-            extra_data_bytes += item.item_index
-            extra_data_bytes += item.item_type.value.to_bytes(
-                ExtraDataService.Lengths.ITEM_TYPE, byteorder='big')
-            extra_data_bytes += item.item_payload.module_id
-            extra_data_bytes += item.item_payload.node_ops_count
-            extra_data_bytes += item.item_payload.node_operator_ids
-            extra_data_bytes += item.item_payload.vals_counts
-        return extra_data_bytes
+        items_fields = [
+            (
+                item.item_index,
+                item.item_type.value.to_bytes(ExtraDataService.Lengths.ITEM_TYPE, byteorder='big'),
+                item.item_payload.module_id,
+                item.item_payload.node_ops_count,
+                item.item_payload.node_operator_ids,
+                item.item_payload.vals_counts,
+            )
+            for item in extra_data
+        ]
+
+        # the items are written into a buffer preallocated for the whole extra data
+        extra_data_bytes = bytearray(sum(len(field) for fields in items_fields for field in fields))
+        offset = 0
+        for fields in items_fields:
+            for field in fields:
+                extra_data_bytes[offset:offset + len(field)] = field
+                offset += len(field)
+        return bytes(extra_data_bytes)
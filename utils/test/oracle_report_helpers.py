@@ -1,6 +1,9 @@
+import os
+import time
 import warnings
-from dataclasses import astuple, dataclass
-from typing import Literal, overload
+from contextlib import contextmanager, nullcontext
+from dataclasses import astuple, dataclass, field
+from typing import Callable, Dict, Iterator, List, Literal, Optional, overload
 
 from brownie import chain, web3, accounts  # type: ignore
 from brownie.exceptions import VirtualMachineError
@@ -9,8 +12,9 @@ from eth_abi.abi import encode
 from hexbytes import HexBytes
 
 from utils.config import contracts
+from utils.rpc_batch import rpc_batch
 from utils.test.exit_bus_data import encode_data
-from utils.test.helpers import ETH, GWEI, eth_balance
+from utils.test.helpers import ETH, GWEI
 
 ZERO_HASH = bytes([0] * 32)
 ZERO_BYTES32 = HexBytes(ZERO_HASH)
@@ -18,6 +22,19 @@ ONE_DAY = 1 * 24 * 60 * 60
 SHARE_RATE_PRECISION = 10**27
 EXTRA_DATA_FORMAT_EMPTY = 0
 EXTRA_DATA_FORMAT_LIST = 1
+DEPOSIT_SIZE = ETH(32)
+UNLIMITED_REBASE = 2**64 - 1
+LIMITER_PRECISION_BASE = 10**9
+
+ENV_ORACLE_REPORT_SIMULATION = "ORACLE_REPORT_SIMULATION"
+# `handleOracleReport` simulation modes: the `eth_call` simulation only (default), the offline accounting
+# model verified against the `eth_call` simulation, or the offline accounting model only
+SIMULATION_OFFLINE = "offline"
+SIMULATION_CHECK = "check"
+SIMULATION_ONCHAIN = "onchain"
+
+# set to broadcast the hash consensus reports of all the members before collecting the receipts
+ENV_ORACLE_CONSENSUS_PIPELINED = "ORACLE_CONSENSUS_PIPELINED"
 
 
 @dataclass
@@ -58,7 +75,6 @@ class AccountingReport:
         return AccountingReport(*self.items)
 
 
-
 def prepare_accounting_report(
     *,
     refSlot,
@@ -70,13 +86,17 @@ def prepare_accounting_report(
     simulatedShareRate,
     stakingModuleIdsWithNewlyExitedValidators=[],
     numExitedValidatorsByStakingModule=[],
-    consensusVersion=1,
+    consensusVersion=None,
     withdrawalFinalizationBatches=[],
     isBunkerMode=False,
     extraDataFormat=EXTRA_DATA_FORMAT_EMPTY,
     extraDataHash=ZERO_BYTES32,
     extraDataItemsCount=0,
+    context: Optional["ReportContext"] = None,
 ):
+    if consensusVersion is None:
+        consensusVersion = context.consensusVersion if context is not None else 1
+
     report = AccountingReport(
         int(consensusVersion),
         int(refSlot),
@@ -121,11 +141,16 @@ def encode_data_from_abi(data, abi, func_name):
 
 
 def get_finalization_batches(
-    share_rate: int, limited_withdrawal_vault_balance, limited_el_rewards_vault_balance
+    share_rate: int,
+    limited_withdrawal_vault_balance,
+    limited_el_rewards_vault_balance,
+    context: Optional["ReportContext"] = None,
 ) -> list[int]:
-    (_, _, _, _, _, _, _, requestTimestampMargin, _) = contracts.oracle_report_sanity_checker.getOracleReportLimits()
-    buffered_ether = contracts.lido.getBufferedEther()
-    unfinalized_steth = contracts.withdrawal_queue.unfinalizedStETH()
+    if context is None:
+        context = ReportContext.read()
+    requestTimestampMargin = context.requestTimestampMargin
+    buffered_ether = context.accounting.bufferedEther
+    unfinalized_steth = context.unfinalizedStETH
     reserved_buffer = min(buffered_ether, unfinalized_steth)
     available_eth = limited_withdrawal_vault_balance + limited_el_rewards_vault_balance + reserved_buffer
     max_timestamp = chain.time() - requestTimestampMargin
@@ -146,13 +171,74 @@ def get_finalization_batches(
     return list(filter(lambda value: value > 0, batchesState[2]))
 
 
-def reach_consensus(slot, report, version, oracle_contract, silent=False):
-    (members, *_) = oracle_contract.getFastLaneMembers()
-    for member in members:
-        if not silent:
-            print(f"Member ${member} submitting report to hashConsensus")
-        oracle_contract.submitReport(slot, report, version, {"from": member})
-    (_, hash_, _) = oracle_contract.getConsensusState()
+@dataclass
+class MemberSubmission:
+    member: str
+    # seconds from the submissions start till the transaction is broadcast and till its receipt is collected
+    broadcast_time: float
+    receipt_time: float
+
+
+@dataclass
+class ConsensusSubmissionStats:
+    ref_slot: int = 0
+    pipelined: bool = False
+    members: List[MemberSubmission] = field(default_factory=list)
+    rpc_requests: int = 0
+    duration: float = 0.0
+
+
+@contextmanager
+def _count_rpc_requests(stats: ConsensusSubmissionStats) -> Iterator[None]:
+    def counting_middleware(make_request, _):
+        def middleware(method, params):
+            stats.rpc_requests += 1
+            return make_request(method, params)
+
+        return middleware
+
+    web3.middleware_onion.add(counting_middleware, "consensus_rpc_counter")
+    try:
+        yield
+    finally:
+        web3.middleware_onion.remove("consensus_rpc_counter")
+
+
+def reach_consensus(slot, report, version, oracle_contract, silent=False, pipelined=None, stats=None):
+    """
+    Submit the report hash from all of the fast lane members.
+    By default every member waits for its receipt before the next one submits. In the pipelined mode
+    (`ORACLE_CONSENSUS_PIPELINED` env var is set) the submissions are broadcast one after another
+    without waiting for the receipts, which are fetched from the node afterwards.
+    Pass `ConsensusSubmissionStats()` as `stats` to collect the submission latencies and the number of RPC requests.
+    """
+    if pipelined is None:
+        pipelined = bool(os.getenv(ENV_ORACLE_CONSENSUS_PIPELINED))
+    if stats is not None:
+        (stats.ref_slot, stats.pipelined) = (slot, pipelined)
+
+    start = time.perf_counter()
+    with _count_rpc_requests(stats) if stats is not None else nullcontext():
+        (members, *_) = oracle_contract.getFastLaneMembers()
+        txs = []
+        for member in members:
+            if not silent:
+                print(f"Member ${member} submitting report to hashConsensus")
+            tx_params = {"from": member, "required_confs": 0} if pipelined else {"from": member}
+            txs.append(oracle_contract.submitReport(slot, report, version, tx_params))
+            if stats is not None:
+                stats.members.append(MemberSubmission(member, time.perf_counter() - start, 0.0))
+        # Ganache automine keeps the broadcast order
+        for index, (member, tx) in enumerate(zip(members, txs)):
+            # brownie's `required_confs=0` receipt is synced in background and may not be final yet
+            status = web3.eth.wait_for_transaction_receipt(tx.txid)["status"] if pipelined else tx.status
+            if stats is not None:
+                stats.members[index].receipt_time = time.perf_counter() - start
+            assert status == 1, f"Member {member} report submission failed"
+        (_, hash_, _) = oracle_contract.getConsensusState()
+    if stats is not None:
+        stats.duration = time.perf_counter() - start
+
     assert hash_ == report.hex(), "HashConsensus points to unexpected report"
     return members[0]
 
@@ -175,11 +261,14 @@ def push_oracle_report(
     extraDataItemsCount=0,
     silent=False,
     extraDataList=b"",
+    context: Optional["ReportContext"] = None,
 ):
     if not silent:
         print(f"Preparing oracle report for refSlot: {refSlot}")
-    consensusVersion = contracts.accounting_oracle.getConsensusVersion()
-    oracleVersion = contracts.accounting_oracle.getContractVersion()
+    if context is None:
+        context = ReportContext.read()
+    consensusVersion = context.consensusVersion
+    oracleVersion = context.contractVersion
     (items, hash) = prepare_accounting_report(
         refSlot=refSlot,
         clBalance=clBalance,
@@ -236,7 +325,251 @@ def push_oracle_report(
     return (report_tx, extra_report_tx)
 
 
+@dataclass
+class AccountingState:
+    """Lido accounting state the `handleOracleReport` outcome depends on"""
+
+    depositedValidators: int
+    beaconValidators: int
+    beaconBalance: int
+    bufferedEther: int
+    totalShares: int
+    maxPositiveTokenRebase: int
+    totalFee: int
+    feePrecisionPoints: int
+
+    @property
+    def totalPooledEther(self) -> int:
+        transient_balance = (self.depositedValidators - self.beaconValidators) * DEPOSIT_SIZE
+        return self.bufferedEther + self.beaconBalance + transient_balance
+
+    @staticmethod
+    def read(block_identifier=None) -> "AccountingState":
+        with rpc_batch() as batch:
+            state = AccountingState.queue_read(batch, block_identifier or "latest")
+        return state()
+
+    @staticmethod
+    def queue_read(batch, block_identifier) -> Callable[[], "AccountingState"]:
+        """Queue the state requests to the batch, the returned callable builds the state from the responses"""
+        beacon_stat = batch.call(contracts.lido.getBeaconStat, block_identifier=block_identifier)
+        buffered_ether = batch.call(contracts.lido.getBufferedEther, block_identifier=block_identifier)
+        total_shares = batch.call(contracts.lido.getTotalShares, block_identifier=block_identifier)
+        max_positive_token_rebase = batch.call(
+            contracts.oracle_report_sanity_checker.getMaxPositiveTokenRebase, block_identifier=block_identifier
+        )
+        rewards_distribution = batch.call(
+            contracts.staking_router.getStakingRewardsDistribution, block_identifier=block_identifier
+        )
+
+        def build() -> AccountingState:
+            (depositedValidators, beaconValidators, beaconBalance) = beacon_stat.result()
+            (_, _, _, totalFee, precisionPoints) = rewards_distribution.result()
+            return AccountingState(
+                depositedValidators=depositedValidators,
+                beaconValidators=beaconValidators,
+                beaconBalance=beaconBalance,
+                bufferedEther=buffered_ether.result(),
+                totalShares=total_shares.result(),
+                maxPositiveTokenRebase=max_positive_token_rebase.result(),
+                totalFee=totalFee,
+                feePrecisionPoints=precisionPoints,
+            )
+
+        return build
+
+
+@dataclass
+class ReportContext:
+    """
+    Oracle report parameters read in a single batch at the pinned block.
+    The context is valid until the next state-changing transaction, `refresh` it after.
+    """
+
+    block: int
+    refSlot: int
+    accounting: AccountingState
+    withdrawalVaultBalance: int
+    elRewardsVaultBalance: int
+    sharesRequestedToBurn: int
+    consensusVersion: int
+    contractVersion: int
+    requestTimestampMargin: int
+    unfinalizedStETH: int
+
+    @staticmethod
+    def read(block_identifier=None) -> "ReportContext":
+        block = web3.eth.block_number if block_identifier in (None, "latest") else block_identifier
+        with rpc_batch() as batch:
+            accounting = AccountingState.queue_read(batch, block)
+            current_frame = batch.call(
+                contracts.hash_consensus_for_accounting_oracle.getCurrentFrame, block_identifier=block
+            )
+            withdrawal_vault_balance = batch.get_balance(contracts.withdrawal_vault.address, block)
+            el_rewards_vault_balance = batch.get_balance(contracts.execution_layer_rewards_vault.address, block)
+            shares_requested_to_burn = batch.call(contracts.burner.getSharesRequestedToBurn, block_identifier=block)
+            consensus_version = batch.call(contracts.accounting_oracle.getConsensusVersion, block_identifier=block)
+            contract_version = batch.call(contracts.accounting_oracle.getContractVersion, block_identifier=block)
+            limits = batch.call(contracts.oracle_report_sanity_checker.getOracleReportLimits, block_identifier=block)
+            unfinalized_steth = batch.call(contracts.withdrawal_queue.unfinalizedStETH, block_identifier=block)
+
+        (refSlot, _) = current_frame.result()
+        (coverShares, nonCoverShares) = shares_requested_to_burn.result()
+        (_, _, _, _, _, _, _, requestTimestampMargin, _) = limits.result()
+        return ReportContext(
+            block=block,
+            refSlot=refSlot,
+            accounting=accounting(),
+            withdrawalVaultBalance=withdrawal_vault_balance.result(),
+            elRewardsVaultBalance=el_rewards_vault_balance.result(),
+            sharesRequestedToBurn=coverShares + nonCoverShares,
+            consensusVersion=consensus_version.result(),
+            contractVersion=contract_version.result(),
+            requestTimestampMargin=requestTimestampMargin,
+            unfinalizedStETH=unfinalized_steth.result(),
+        )
+
+    def refresh(self) -> "ReportContext":
+        return ReportContext.read()
+
+
+class _TokenRebaseLimiter:
+    """PositiveTokenRebaseLimiter library of the OracleReportSanityChecker"""
+
+    def __init__(self, rebase_limit: int, pre_total_pooled_ether: int, pre_total_shares: int):
+        if pre_total_pooled_ether == 0:
+            rebase_limit = UNLIMITED_REBASE
+        self.rebase_limit = rebase_limit
+        self.pre_total_pooled_ether = pre_total_pooled_ether
+        self.pre_total_shares = pre_total_shares
+        self.current_total_pooled_ether = pre_total_pooled_ether
+        self.max_total_pooled_ether = (
+            2**256 - 1
+            if rebase_limit == UNLIMITED_REBASE
+            else pre_total_pooled_ether + rebase_limit * pre_total_pooled_ether // LIMITER_PRECISION_BASE
+        )
+
+    def decrease_ether(self, amount: int) -> None:
+        if self.rebase_limit == UNLIMITED_REBASE:
+            return
+        assert amount <= self.current_total_pooled_ether, "NegativeTotalPooledEther"
+        self.current_total_pooled_ether -= amount
+
+    def increase_ether(self, amount: int) -> int:
+        if self.rebase_limit == UNLIMITED_REBASE:
+            return amount
+        prev_total_pooled_ether = self.current_total_pooled_ether
+        self.current_total_pooled_ether = min(self.current_total_pooled_ether + amount, self.max_total_pooled_ether)
+        return self.current_total_pooled_ether - prev_total_pooled_ether
+
+    def shares_to_burn_limit(self) -> int:
+        if self.rebase_limit == UNLIMITED_REBASE:
+            return self.pre_total_shares
+        if self.current_total_pooled_ether >= self.max_total_pooled_ether:
+            return 0
+        rebase_limit_plus_1 = self.rebase_limit + LIMITER_PRECISION_BASE
+        pooled_ether_rate = self.current_total_pooled_ether * LIMITER_PRECISION_BASE // self.pre_total_pooled_ether
+        return self.pre_total_shares * (rebase_limit_plus_1 - pooled_ether_rate) // rebase_limit_plus_1
+
+
+def simulate_report_offline(
+    state: AccountingState,
+    *,
+    beaconValidators,
+    postCLBalance,
+    withdrawalVaultBalance,
+    elRewardsVaultBalance,
+    sharesRequestedToBurn=0,
+):
+    """
+    Compute the `handleOracleReport` outcome (postTotalPooledEther, postTotalShares, withdrawals, elRewards)
+    for the report without withdrawals finalization (as `simulate_report` does) from the accounting state.
+    The sanity checks are not modeled, the reverting reports are caught on the report submission.
+    """
+    pre_total_pooled_ether = state.totalPooledEther
+    appeared_validators = beaconValidators - state.beaconValidators
+    pre_cl_balance = state.beaconBalance + appeared_validators * DEPOSIT_SIZE
+
+    limiter = _TokenRebaseLimiter(state.maxPositiveTokenRebase, pre_total_pooled_ether, state.totalShares)
+    if postCLBalance < pre_cl_balance:
+        limiter.decrease_ether(pre_cl_balance - postCLBalance)
+    else:
+        limiter.increase_ether(postCLBalance - pre_cl_balance)
+    withdrawals = limiter.increase_ether(withdrawalVaultBalance)
+    el_rewards = limiter.increase_ether(elRewardsVaultBalance)
+    shares_to_burn = min(limiter.shares_to_burn_limit(), sharesRequestedToBurn)
+
+    shares_minted_as_fees = 0
+    post_cl_total_balance = postCLBalance + withdrawals
+    if post_cl_total_balance > pre_cl_balance and state.totalFee > 0:
+        total_rewards = post_cl_total_balance - pre_cl_balance + el_rewards
+        shares_minted_as_fees = (
+            total_rewards
+            * state.totalFee
+            * state.totalShares
+            // ((pre_total_pooled_ether + total_rewards) * state.feePrecisionPoints - total_rewards * state.totalFee)
+        )
+
+    post_transient_balance = (state.depositedValidators - beaconValidators) * DEPOSIT_SIZE
+    post_total_pooled_ether = state.bufferedEther + withdrawals + el_rewards + postCLBalance + post_transient_balance
+    post_total_shares = state.totalShares - shares_to_burn + shares_minted_as_fees
+    return (post_total_pooled_ether, post_total_shares, withdrawals, el_rewards)
+
+
+def get_simulation_mode() -> str:
+    mode = os.getenv(ENV_ORACLE_REPORT_SIMULATION, SIMULATION_ONCHAIN)
+    assert mode in (SIMULATION_OFFLINE, SIMULATION_CHECK, SIMULATION_ONCHAIN), f"Unknown simulation mode {mode}"
+    return mode
+
+
 def simulate_report(
+    *,
+    refSlot,
+    beaconValidators,
+    postCLBalance,
+    withdrawalVaultBalance,
+    elRewardsVaultBalance,
+    block_identifier=None,
+    state: Optional[AccountingState] = None,
+):
+    """
+    Simulate `handleOracleReport` without withdrawals finalization. Depending on the `ORACLE_REPORT_SIMULATION`
+    env var it's simulated with `eth_call` only (`onchain`, default), computed offline and checked against
+    the `eth_call` simulation (`check`) or computed offline only (`offline`).
+    The accounting `state` is read at `block_identifier` if not passed.
+    """
+    mode = get_simulation_mode()
+    if mode == SIMULATION_ONCHAIN:
+        return simulate_report_onchain(
+            refSlot=refSlot,
+            beaconValidators=beaconValidators,
+            postCLBalance=postCLBalance,
+            withdrawalVaultBalance=withdrawalVaultBalance,
+            elRewardsVaultBalance=elRewardsVaultBalance,
+            block_identifier=block_identifier,
+        )
+
+    offline = simulate_report_offline(
+        state or AccountingState.read(block_identifier),
+        beaconValidators=beaconValidators,
+        postCLBalance=postCLBalance,
+        withdrawalVaultBalance=withdrawalVaultBalance,
+        elRewardsVaultBalance=elRewardsVaultBalance,
+    )
+    if mode == SIMULATION_CHECK:
+        onchain = simulate_report_onchain(
+            refSlot=refSlot,
+            beaconValidators=beaconValidators,
+            postCLBalance=postCLBalance,
+            withdrawalVaultBalance=withdrawalVaultBalance,
+            elRewardsVaultBalance=elRewardsVaultBalance,
+            block_identifier=block_identifier,
+        )
+        assert tuple(onchain) == offline, f"Offline report simulation {offline} differs from eth_call {tuple(onchain)}"
+    return offline
+
+
+def simulate_report_onchain(
     *, refSlot, beaconValidators, postCLBalance, withdrawalVaultBalance, elRewardsVaultBalance, block_identifier=None
 ):
     (_, SECONDS_PER_SLOT, GENESIS_TIME) = contracts.hash_consensus_for_accounting_oracle.getChainConfig()
@@ -272,16 +605,64 @@ def simulate_report(
         raise  # unreachable, for static analysis only
 
 
+class ReportScheduler:
+    """
+    Report frames of the HashConsensus contract computed from its chain and frame configs read once.
+    Call `reset_report_schedulers` if the frame config is changed in the test, the schedulers are reset
+    after each test by the `tests/conftest.py` fixture.
+    """
+
+    def __init__(self, consensus_contract):
+        self._consensus_contract = consensus_contract
+        (self.slots_per_epoch, self.seconds_per_slot, self.genesis_time) = consensus_contract.getChainConfig()
+        (self.initial_epoch, self.epochs_per_frame, _) = consensus_contract.getFrameConfig()
+
+    @property
+    def frame_slots(self) -> int:
+        return self.slots_per_epoch * self.epochs_per_frame
+
+    def ref_slot_at(self, timestamp: int) -> int:
+        """HashConsensus.getCurrentFrame() refSlot at the timestamp"""
+        epoch = (timestamp - self.genesis_time) // self.seconds_per_slot // self.slots_per_epoch
+        assert epoch >= self.initial_epoch, "initial epoch is yet to arrive"
+        frame_start_epoch = epoch - (epoch - self.initial_epoch) % self.epochs_per_frame
+        return frame_start_epoch * self.slots_per_epoch - 1
+
+    def current_ref_slot(self) -> int:
+        return self.ref_slot_at(chain.time())
+
+    def advance_frames(self, frames: int = 1) -> int:
+        """Move the time to the start of the `frames`-th next frame with a single sleep and mine, return its refSlot"""
+        ref_slot = self.current_ref_slot() + frames * self.frame_slots
+        frame_start_time = self.genesis_time + (ref_slot + 1) * self.seconds_per_slot
+        chain.sleep(frame_start_time - chain.time())
+        chain.mine(1)
+        (current_ref_slot, _) = self._consensus_contract.getCurrentFrame()
+        assert current_ref_slot == ref_slot, "should be next frame, the frame config might be changed since read"
+        return ref_slot
+
+    def iter_frames(self, frames: int) -> Iterator[int]:
+        """Move through the `frames` consecutive frames yielding their refSlots to report in"""
+        for _ in range(frames):
+            yield self.advance_frames(1)
+
+
+# consensus contract address -> scheduler
+_report_schedulers: Dict[str, ReportScheduler] = {}
+
+
+def get_report_scheduler(consensus_contract) -> ReportScheduler:
+    if consensus_contract.address not in _report_schedulers:
+        _report_schedulers[consensus_contract.address] = ReportScheduler(consensus_contract)
+    return _report_schedulers[consensus_contract.address]
+
+
+def reset_report_schedulers() -> None:
+    _report_schedulers.clear()
+
+
 def wait_to_next_available_report_time(consensus_contract):
-    (SLOTS_PER_EPOCH, SECONDS_PER_SLOT, GENESIS_TIME) = consensus_contract.getChainConfig()
-    (refSlot, _) = consensus_contract.getCurrentFrame()
-    time = chain.time()
-    (_, EPOCHS_PER_FRAME, _) = consensus_contract.getFrameConfig()
-    frame_start_with_offset = GENESIS_TIME + (refSlot + SLOTS_PER_EPOCH * EPOCHS_PER_FRAME + 1) * SECONDS_PER_SLOT
-    chain.sleep(frame_start_with_offset - time)
-    chain.mine(1)
-    (nextRefSlot, _) = consensus_contract.getCurrentFrame()
-    assert nextRefSlot == refSlot + SLOTS_PER_EPOCH * EPOCHS_PER_FRAME, "should be next frame"
+    get_report_scheduler(consensus_contract).advance_frames(1)
 
 
 @overload
@@ -369,21 +750,20 @@ def oracle_report(
     if wait_to_next_report_time:
         """fast forwards time to next report, compiles report, pushes through consensus and to AccountingOracle"""
         wait_to_next_available_report_time(contracts.hash_consensus_for_accounting_oracle)
+    # all of the report parameters are read at once after the time is moved
+    context = ReportContext.read()
     if refSlot is None:
-        (refSlot, _) = contracts.hash_consensus_for_accounting_oracle.getCurrentFrame()
+        refSlot = context.refSlot
 
-    (_, beaconValidators, beaconBalance) = contracts.lido.getBeaconStat()
+    beaconValidators = context.accounting.beaconValidators
+    beaconBalance = context.accounting.beaconBalance
 
     postCLBalance = beaconBalance + cl_diff
     postBeaconValidators = beaconValidators + cl_appeared_validators
 
-    elRewardsVaultBalance = (
-        eth_balance(contracts.execution_layer_rewards_vault.address)
-        if elRewardsVaultBalance is None
-        else elRewardsVaultBalance
-    )
+    elRewardsVaultBalance = context.elRewardsVaultBalance if elRewardsVaultBalance is None else elRewardsVaultBalance
     withdrawalVaultBalance = (
-        eth_balance(contracts.withdrawal_vault.address) if withdrawalVaultBalance is None else withdrawalVaultBalance
+        context.withdrawalVaultBalance if withdrawalVaultBalance is None else withdrawalVaultBalance
     )
 
     # exclude_vaults_balances safely forces LIDO to see vault balances as empty allowing zero/negative rebase
@@ -401,8 +781,7 @@ def oracle_report(
         elRewardsVaultBalance = 0
 
     if sharesRequestedToBurn is None:
-        (coverShares, nonCoverShares) = contracts.burner.getSharesRequestedToBurn()
-        sharesRequestedToBurn = coverShares + nonCoverShares
+        sharesRequestedToBurn = context.sharesRequestedToBurn
 
     is_bunker = False
 
@@ -414,24 +793,24 @@ def oracle_report(
             withdrawalVaultBalance=withdrawalVaultBalance,
             elRewardsVaultBalance=elRewardsVaultBalance,
             block_identifier=simulation_block_identifier,
+            state=context.accounting if simulation_block_identifier is None else None,
         )
         if simulatedShareRate is None:
             simulatedShareRate = postTotalPooledEther * SHARE_RATE_PRECISION // postTotalShares
 
         withdrawalFinalizationBatches = (
-            get_finalization_batches(simulatedShareRate, withdrawals, elRewards)
+            get_finalization_batches(simulatedShareRate, withdrawals, elRewards, context)
             if withdrawalFinalizationBatches == []
             else withdrawalFinalizationBatches
         )
 
-        preTotalPooledEther = contracts.lido.getTotalPooledEther()
-        is_bunker = preTotalPooledEther > postTotalPooledEther
+        is_bunker = context.accounting.totalPooledEther > postTotalPooledEther
     elif simulatedShareRate is None:
         simulatedShareRate = 0
 
     if dry_run:
         return AccountingReport(
-            consensusVersion=contracts.accounting_oracle.getConsensusVersion(),
+            consensusVersion=context.consensusVersion,
             refSlot=refSlot,
             numValidators=postBeaconValidators,
             clBalanceGwei=postCLBalance // GWEI,
@@ -465,4 +844,14 @@ def oracle_report(
         numExitedValidatorsByStakingModule=numExitedValidatorsByStakingModule,
         silent=silent,
         isBunkerMode=is_bunker,
+        context=context,
     )
+
+
+def oracle_reports(count: int, **kwargs) -> list:
+    """Make the oracle reports in the `count` consecutive frames, see `oracle_report` for the arguments"""
+    scheduler = get_report_scheduler(contracts.hash_consensus_for_accounting_oracle)
+    return [
+        oracle_report(**kwargs, refSlot=ref_slot, wait_to_next_report_time=False)
+        for ref_slot in scheduler.iter_frames(count)
+    ]
@@ -1,4 +1,5 @@
 from utils.tx_tracing import *
+from utils.trace_artifact_store import get_trace_artifact_store
 
 _vote_item_group = GroupBy(
     contract_name="CallsScript",
@@ -17,44 +18,60 @@ _service_item_group = GroupBy(
 )
 
 
-def display_voting_call_trace(tx: TransactionReceipt) -> None:
-    display_filtered_tx_call(
-        tx,
-        lambda trace_item: any(
-            s in trace_item["fn"]
-            for s in [
-                "KernelProxy.",
-                "Voting._executeVote",
-                "EVMScriptRunner.getEVMScriptExecutor",
-                "Initializable.",
-                "TimeHelpers.",
-                "AppStorage.",
-                "ScriptHelpers.",
-            ]
-        ),
+def _voting_call_filter(trace_item: Dict) -> bool:
+    return any(
+        s in trace_item["fn"]
+        for s in [
+            "KernelProxy.",
+            "Voting._executeVote",
+            "EVMScriptRunner.getEVMScriptExecutor",
+            "Initializable.",
+            "TimeHelpers.",
+            "AppStorage.",
+            "ScriptHelpers.",
+        ]
     )
 
 
+def _voting_tx_events(tx: TransactionReceipt) -> CompactEventDict:
+    # the decoded events are stored, if enabled, to re-run the assertions without tracing the same vote execution again
+    store = get_trace_artifact_store()
+    if store is None:
+        return CompactEventDict(decode_tx_events_from_trace(tx))
+    return CompactEventDict(store.events(tx, decode_tx_events_from_trace))
+
+
+def _format_voting_call_trace(tx: TransactionReceipt) -> str:
+    return format_filtered_tx_call(tx, _voting_call_filter)
+
+
+def display_voting_call_trace(tx: TransactionReceipt) -> None:
+    store = get_trace_artifact_store()
+    if store is None:
+        print(_format_voting_call_trace(tx))
+    else:
+        print(store.call_trace(tx, "voting", _format_voting_call_trace))
+
+
 def count_vote_items_by_events(tx: TransactionReceipt, voting_addr: str) -> int:
-    events = tx_events_from_trace(tx)
-    ev_dict = EventDict(events)
+    ev_dict = _voting_tx_events(tx)
 
     calls_slice = ev_dict["LogScriptCall"]
     return sum(map(lambda x: x["src"] == voting_addr, calls_slice))
 
 
 def display_voting_events(tx: TransactionReceipt) -> None:
-    dict_events = EventDict(tx_events_from_trace(tx))
+    dict_events = _voting_tx_events(tx)
     groups = [_vote_item_group, _service_item_group]
 
     display_tx_events(dict_events, "Events registered during the vote execution", groups)
 
 
 def group_voting_events(tx: TransactionReceipt) -> List[EventDict]:
-    events = tx_events_from_trace(tx)
+    events = _voting_tx_events(tx)
     groups = [_vote_item_group, _service_item_group]
 
-    grouped_events = group_tx_events(events, EventDict(events), groups)
+    grouped_events = group_tx_events(None, events, groups)
     ret = [v for k, v in grouped_events if k == _vote_item_group]
 
     assert ret, (
@@ -0,0 +1,134 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from brownie.network.contract import ContractCall
+from brownie.network.multicall import Multicall
+from brownie.network.state import _revert_register
+
+# no-input views which are not expected to change without an upgrade
+CONSTANT_VIEW_NAMES = {"name", "symbol", "decimals", "appId", "kernel", "getLocator"}
+
+
+def is_constant_call(contract_call: ContractCall) -> bool:
+    """
+    Check if the call result depends on the contract code only (pure functions and constants).
+
+    Solidity constants and immutables are `view` in the ABI, so `stateMutability` tells only the pure
+    functions apart. The no-input views are taken for constants by name instead: upper-case ones
+    (e.g. `MANAGE_MEMBERS_ROLE`) and the ones from `CONSTANT_VIEW_NAMES`.
+    """
+    abi = contract_call.abi
+    if abi.get("stateMutability") == "pure":
+        return True
+    if abi.get("inputs"):
+        return False
+    return abi["name"].isupper() or abi["name"] in CONSTANT_VIEW_NAMES
+
+
+class ViewCallCache:
+    """
+    Read-through cache of view calls.
+
+    Constant calls are keyed by (address, calldata) and are served across blocks,
+    other views are cached only for the explicitly pinned block (block_identifier
+    or multicall block). The constants are dropped on `chain.revert()` and the
+    views of the reverted blocks are forgotten.
+    """
+
+    def __init__(self):
+        self._constants: Dict[Tuple[str, str], Any] = {}
+        self._views: Dict[Tuple[str, str, int], Any] = {}
+        self.hits = 0
+        self.misses = 0
+        _revert_register(self)
+
+    def key_for(self, contract_call: ContractCall, calldata: str, block: Any) -> Optional[Tuple]:
+        if is_constant_call(contract_call):
+            return contract_call._address, calldata
+        if isinstance(block, int):
+            return contract_call._address, calldata, block
+        return None
+
+    def _storage(self, key: Tuple) -> Dict:
+        return self._constants if len(key) == 2 else self._views
+
+    def lookup(self, key: Tuple) -> Tuple[bool, Any]:
+        storage = self._storage(key)
+        if key in storage:
+            self.hits += 1
+            return True, storage[key]
+        self.misses += 1
+        return False, None
+
+    def store(self, key: Tuple, value: Any) -> None:
+        self._storage(key)[key] = value
+
+    def invalidate(self) -> None:
+        self._constants.clear()
+        self._views.clear()
+
+    def _revert(self, height: int) -> None:
+        self._constants.clear()
+        self._views = {key: value for key, value in self._views.items() if key[2] <= height}
+
+    def _reset(self) -> None:
+        self.invalidate()
+
+
+class _StoreOnDecode:
+    """ContractCall stand-in for `Multicall._call_contract` which reports the decoded value."""
+
+    def __init__(self, call: ContractCall, on_decoded):
+        self._call = call
+        self._address = call._address
+        self._on_decoded = on_decoded
+
+    def encode_input(self, *args, **kwargs) -> str:
+        return self._call.encode_input(*args, **kwargs)
+
+    def decode_output(self, data) -> Any:
+        value = self._call.decode_output(data)
+        self._on_decoded(value)
+        return value
+
+
+@contextmanager
+def view_call_cache() -> Iterator[ViewCallCache]:
+    """Serve repeated view calls (including the ones made under `brownie.multicall`) from memory."""
+    cache = ViewCallCache()
+    original_call = ContractCall.call
+    original_call_contract = Multicall._call_contract
+
+    def _call(self: ContractCall, *args, block_identifier=None, override=None):
+        key = None
+        if override is None and not (args and isinstance(args[-1], dict)):
+            key = cache.key_for(self, self.encode_input(*args), block_identifier)
+        if key is None:
+            return original_call(self, *args, block_identifier=block_identifier, override=override)
+
+        is_cached, value = cache.lookup(key)
+        if not is_cached:
+            value = original_call(self, *args, block_identifier=block_identifier)
+            cache.store(key, value)
+        return value
+
+    def _call_contract(self: Multicall, call: ContractCall, *args, **kwargs):
+        key = cache.key_for(call, call.encode_input(*args, **kwargs), self.block_number)
+        if key is None:
+            return original_call_contract(self, call, *args, **kwargs)
+
+        is_cached, value = cache.lookup(key)
+        if is_cached:
+            return value
+        # the value is stored once the multicall is flushed and the result is decoded
+        return original_call_contract(
+            self, _StoreOnDecode(call, lambda value: cache.store(key, value)), *args, **kwargs
+        )
+
+    ContractCall.call = _call
+    Multicall._call_contract = _call_contract
+    try:
+        yield cache
+    finally:
+        ContractCall.call = original_call
+        Multicall._call_contract = original_call_contract
@@ -0,0 +1,116 @@
+"""
+Persistent store of the artifacts extracted from a transaction trace (the decoded events and
+the rendered call trace), so the event-based assertions can be re-run without tracing the transaction again.
+
+The store is enabled by setting `TRACE_ARTIFACTS_DIR`. The artifacts are stored per chain and
+transaction hash. Ganache doesn't expose the fork block and the same `executeVote` call could be sent
+on top of a different fork state, so the stored artifact is used only while the receipt (block number,
+gas used and the logs) matches the one it was made for. The decoded events are used only while
+the set of the known event topics is the same as on decoding, the events having undecoded
+entries aren't stored at all to decode them again once the missing ABI is added.
+"""
+import copy
+import gzip
+import hashlib
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+from brownie import chain
+from brownie.network.event import _topics
+from brownie.network.transaction import TransactionReceipt
+from hexbytes import HexBytes
+
+
+def get_trace_artifacts_dir() -> Optional[str]:
+    return os.getenv("TRACE_ARTIFACTS_DIR")
+
+
+def _json_default(value: Any) -> str:
+    # bytes nested into the decoded tuples and arrays
+    if isinstance(value, bytes):
+        return HexBytes(value).hex()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _receipt_digest(tx: TransactionReceipt) -> str:
+    logs = [
+        [log["address"], [HexBytes(topic).hex() for topic in log["topics"]], HexBytes(log["data"]).hex()]
+        for log in tx.logs
+    ]
+    return hashlib.sha256(json.dumps([tx.block_number, tx.gas_used, logs]).encode()).hexdigest()
+
+
+class TraceArtifactStore:
+    def __init__(self, artifacts_dir: Optional[str] = None):
+        self._dir = artifacts_dir or get_trace_artifacts_dir()
+        # txid -> artifact, to read each file once per session
+        self._artifacts: Dict[str, Dict] = {}
+
+    def _chain_id(self) -> int:
+        return chain.id
+
+    def _decoding_context(self) -> str:
+        # the events are decoded with the ABIs of the topics known to brownie at the moment
+        return hashlib.sha256("".join(sorted(_topics)).encode()).hexdigest()
+
+    def _path(self, txid: str) -> str:
+        return os.path.join(self._dir, f"{self._chain_id()}-{txid}.json.gz")
+
+    def _load(self, tx: TransactionReceipt) -> Dict:
+        digest = _receipt_digest(tx)
+        artifact = self._artifacts.get(tx.txid)
+        if artifact is None and os.path.exists(self._path(tx.txid)):
+            with gzip.open(self._path(tx.txid), "rt") as fp:
+                artifact = json.load(fp)
+        if artifact is None or artifact["digest"] != digest:
+            artifact = {"digest": digest, "events": None, "events_context": None, "call_traces": {}}
+        self._artifacts[tx.txid] = artifact
+        return artifact
+
+    def _save(self, tx: TransactionReceipt, artifact: Dict) -> None:
+        os.makedirs(self._dir, exist_ok=True)
+        path = self._path(tx.txid)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt") as fp:
+            json.dump(artifact, fp, default=_json_default)
+        os.replace(tmp_path, path)
+
+    def events(
+        self, tx: TransactionReceipt, decode: Callable[[TransactionReceipt], Optional[List[Dict]]]
+    ) -> Optional[List[Dict]]:
+        """
+        Return the decoded (not formatted) events of the transaction, `decode` is called only
+        if there are no stored events for the transaction receipt and the known event topics.
+        """
+        artifact = self._load(tx)
+        context = self._decoding_context()
+        if artifact["events"] is None or artifact.get("events_context") != context:
+            events = decode(tx)
+            if events is None or not all(event.get("decoded", True) for event in events):
+                return events
+            # stored the same way as read back on the next runs
+            artifact["events"] = json.loads(json.dumps(events, default=_json_default))
+            artifact["events_context"] = context
+            self._save(tx, artifact)
+        # the events are formatted in place by the callers
+        return copy.deepcopy(artifact["events"])
+
+    def call_trace(self, tx: TransactionReceipt, name: str, render: Callable[[TransactionReceipt], str]) -> str:
+        """Return the call trace rendered by `render` and stored under `name` for the transaction receipt."""
+        artifact = self._load(tx)
+        if name not in artifact["call_traces"]:
+            artifact["call_traces"][name] = render(tx)
+            self._save(tx, artifact)
+        return artifact["call_traces"][name]
+
+
+_trace_artifact_store: Optional[TraceArtifactStore] = None
+
+
+def get_trace_artifact_store() -> Optional[TraceArtifactStore]:
+    """Return the store, None unless `TRACE_ARTIFACTS_DIR` is set."""
+    global _trace_artifact_store
+    if _trace_artifact_store is None and get_trace_artifacts_dir():
+        _trace_artifact_store = TraceArtifactStore()
+    return _trace_artifact_store
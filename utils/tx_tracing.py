@@ -1,19 +1,31 @@
 #!/usr/bin/python3
 
-from typing import Callable, Dict, Optional, List, Annotated, Tuple
+import bisect
+import codecs
+import json
+import sys
+from collections import OrderedDict
+from itertools import compress, islice
+from operator import itemgetter, ne
+from typing import Callable, Dict, Iterable, Iterator, Optional, List, Annotated, Tuple, Union
 from dataclasses import dataclass
 
-from eth_event import StructLogError, decode_traceTransaction
+import requests
+from eth_event import StructLogError, decode_logs
 
 from brownie.network.transaction import TransactionReceipt
 from brownie.network.transaction import _step_internal, _step_external, _step_compare
-from brownie.network.event import EventDict, _topics
-from brownie.network import state
+from brownie.network.event import EventDict, _EventItem, _topics
+from brownie.network import state, web3
+from brownie.convert.datatypes import ReturnValue
 from brownie.convert.normalize import format_event
+from brownie.exceptions import EventLookupError
 
 from brownie.utils import color
 from brownie.utils.output import build_tree
 
+from utils.contract_name_cache import get_contract_name_cache
+
 
 @dataclass(eq=True, frozen=True)
 class GroupBy:
@@ -24,83 +36,534 @@ class GroupBy:
     color: str
 
 
-def _align_intval_to(val: int, multiple: int) -> int:
-    return val + (-val) % multiple
+# (name, type, decoded, components) of the event args -> args layout shared by the records
+_event_schemas: Dict[Tuple, Tuple[Dict, ...]] = {}
 
 
-def _align_logdata_len(trace: List) -> List:
-    for trace_item in trace:
-        if not trace_item["op"].startswith("LOG"):
-            continue
+def _event_schema(data: List[Dict]) -> Tuple[Dict, ...]:
+    key = tuple(
+        (i["name"], i["type"], i["decoded"], json.dumps(i["components"]) if "components" in i else None) for i in data
+    )
+    if key not in _event_schemas:
+        _event_schemas[key] = tuple({k: v for k, v in i.items() if k != "value"} for i in data)
+    return _event_schemas[key]
 
-        try:
-            length = int(trace_item["stack"][-2], 16)
-            proper_length = _align_intval_to(length, 32)
-            if proper_length > length:
-                # overwrite logdata length
-                trace_item["stack"][-2] = hex(proper_length)
-
-                offset = int(trace_item["stack"][-1], 16)
-                # determine memory word to expand
-                memory_word_id = (offset + length) // 32
-                # find the exact symbol position within the word
-                internal_offset = 2 * ((offset + length) % 32)
-
-                # expand the memory word in a factitious way
-                memory_word = trace_item["memory"][memory_word_id]
-
-                trace_item["memory"][memory_word_id] = (
-                    memory_word[:internal_offset] + "00" * (proper_length - length) + memory_word[internal_offset:]
+
+class EventRecord:
+    """
+    Compact single event, accessed the same way as the `EventDict` items.
+    The name and address are interned, the args are formatted on the first access.
+    """
+
+    __slots__ = ("name", "address", "_schema", "_values", "_args")
+
+    def __init__(self, event: Dict) -> None:
+        """
+        Arguments
+        ---------
+        event : Dict
+            Decoded (not formatted yet) event as returned by `eth_event.decode_logs`
+        """
+        self._args: Optional[OrderedDict] = None
+        self.address = sys.intern(event["address"])
+        if event["decoded"]:
+            self.name = sys.intern(event["name"])
+            self._schema = _event_schema(event["data"])
+            self._values = tuple(i["value"] for i in event["data"])
+        else:
+            self.name = "(unknown)"
+            self._schema = None
+            self._values = (tuple(event["topics"]), event["data"])
+
+    @property
+    def args(self) -> OrderedDict:
+        if self._args is None:
+            if self._schema is not None:
+                data = [{**item, "value": value} for item, value in zip(self._schema, self._values)]
+                event = {"decoded": True, "data": data}
+            else:
+                topics, data = self._values
+                event = {"decoded": False, "topics": list(topics), "data": data}
+            self._args = OrderedDict((i["name"], i["value"]) for i in format_event(event)["data"])
+            self._schema = self._values = None
+        return self._args
+
+    def __getitem__(self, key: Union[int, str]):
+        if not isinstance(key, (int, str)):
+            raise TypeError(f"Invalid key type '{type(key)}' - can only use strings or integers")
+        if isinstance(key, int):
+            if key not in (0, -1):
+                raise EventLookupError(f"Index out of range - only 1 '{self.name}' events fired")
+            return self.args
+        if key in self.args:
+            return self.args[key]
+        if f"{key} (indexed)" in self.args:
+            return self.args[f"{key} (indexed)"]
+        raise EventLookupError(
+            f"Unknown key '{key}' - the '{self.name}' event includes these keys: {', '.join(self.keys())}"
+        )
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.args
+
+    def __len__(self) -> int:
+        return 1
+
+    def __iter__(self) -> Iterator:
+        return iter([self.args])
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (tuple, list, ReturnValue)):
+            return self.args.values() == other
+        return other == self.args
+
+    def __repr__(self) -> str:
+        return str(self.args)
+
+    def items(self) -> ReturnValue:
+        return ReturnValue([(i, self[i]) for i in self.keys()])
+
+    def keys(self) -> ReturnValue:
+        return ReturnValue([i.replace(" (indexed)", "") for i in self.args.keys()])
+
+    def values(self) -> ReturnValue:
+        return ReturnValue(self.args.values())
+
+
+class CompactEventDict(EventDict):
+    """
+    `EventDict` built of `EventRecord` items. The events grouped by name are built on the first lookup
+    and only the args of the looked up events are formatted.
+    """
+
+    def __init__(self, events: Optional[List[Dict]] = None) -> None:
+        """
+        Arguments
+        ---------
+        events : Optional[List[Dict]]
+            Decoded (not formatted yet) events as returned by `eth_event.decode_logs`
+        """
+        self._set_records([EventRecord(i) for i in events or []])
+
+    @classmethod
+    def from_records(cls, records: List[EventRecord]) -> "CompactEventDict":
+        event_dict = cls.__new__(cls)
+        event_dict._set_records(records)
+        return event_dict
+
+    def _set_records(self, records: List[EventRecord]) -> None:
+        self._ordered = records
+        self._positions: Dict[str, List[int]] = {}
+        for pos, record in enumerate(records):
+            self._positions.setdefault(record.name, []).append(pos)
+        self._items: Dict[str, _EventItem] = {}
+
+    @property
+    def _dict(self) -> Dict[str, _EventItem]:
+        return {name: self[name] for name in self._positions}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._positions
+
+    def __getitem__(self, key: Union[str, int]):
+        if not isinstance(key, str):
+            return super().__getitem__(key)
+        if key not in self._items:
+            if key not in self._positions:
+                raise EventLookupError(f"Event '{key}' did not fire.")
+            positions = self._positions[key]
+            self._items[key] = _EventItem(key, None, [self._ordered[i] for i in positions], tuple(positions))
+        return self._items[key]
+
+    def count(self, name: str) -> int:
+        return len(self._positions.get(name, ()))
+
+
+LOG_OPS = frozenset(("LOG0", "LOG1", "LOG2", "LOG3", "LOG4"))
+CREATE_OPS = ("CREATE", "CREATE2")
+
+
+def _log_data(step: Dict) -> bytearray:
+    """
+    Read LOG data from the memory words referenced by the step.
+
+    Seems like Ganache sometimes provides correct data but incorrect data length
+    for the LOG traces, so the data is padded with zeros to a 32-bytes boundary.
+    """
+    try:
+        offset = int(step["stack"][-1], 16)
+        length = int(step["stack"][-2], 16)
+    except KeyError:
+        raise StructLogError("StructLog has no stack")
+    except (IndexError, TypeError):
+        raise StructLogError("Malformed stack")
+
+    first_word = offset // 32
+    try:
+        data = bytearray.fromhex("".join(step["memory"][first_word : (offset + length + 31) // 32]))
+    except (KeyError, TypeError, ValueError):
+        raise StructLogError("Malformed memory")
+    start = offset - first_word * 32
+    del data[start + length :]
+    del data[:start]
+    data.extend(bytes(-length % 32))
+    return data
+
+
+def _trace_logs(trace: List[Dict], initial_address: str) -> List[Dict]:
+    """
+    Extract logs from the struct logs in the format of `eth_getTransactionReceipt` logs.
+
+    Only the LOG steps and the steps around depth changes (to track the emitting address)
+    are visited in Python, the rest of the trace is scanned once through the op and depth arrays.
+    """
+    ops = list(map(itemgetter("op"), trace))
+    depths = list(map(itemgetter("depth"), trace))
+    # indices of the first steps at the new depth and of the LOG steps, the scans run in C
+    depth_changes = list(compress(range(1, len(depths)), map(ne, depths, islice(depths, 1, None))))
+    log_indices = compress(range(len(ops)), map(LOG_OPS.__contains__, ops))
+
+    logs = []
+    address_list = [initial_address]
+    changes = set(depth_changes)
+    for index in sorted(changes.union(log_indices)):
+        if index in changes:
+            depth, prev_depth = depths[index], depths[index - 1]
+            if depth < prev_depth:
+                address_list.pop()
+            elif ops[index - 1] in CREATE_OPS:
+                # the created address is on the stack once the execution returns to the creator
+                return_index = next(
+                    i for i in depth_changes[bisect.bisect_right(depth_changes, index) :] if depths[i] == prev_depth
                 )
+                address_list.append(f"0x{trace[return_index]['stack'][-1][-40:]}")
+            else:
+                address_list.append(f"0x{trace[index - 1]['stack'][-2][-40:]}")
+
+        op = ops[index]
+        if op in LOG_OPS:
+            step = trace[index]
+            topics_count = int(op[3:])
+            topics = step["stack"][-3 : -3 - topics_count : -1]
+            logs.append(
+                {
+                    "address": address_list[-1],
+                    "topics": [f"0x{_normalize_word(topic)}" for topic in topics],
+                    "data": f"0x{_log_data(step).hex()}",
+                }
+            )
+
+    return logs
+
+
+def _iter_address_runs(events: List) -> Iterator[Tuple[int, int]]:
+    """Yield [start, stop) index ranges of the consecutive events emitted by the same address"""
+    start = 0
+    for idx in range(1, len(events)):
+        if events[idx].address != events[start].address:
+            yield start, idx
+            start = idx
+    if events:
+        yield start, len(events)
+
+
+# Geth JS tracer keeping the same steps as `_EventStepsFilter` does for the structLogs
+_EVENT_STEPS_TRACER = """{
+    steps: [],
+    prev: null,
+    prevKept: false,
+    word: function(value) {
+        var hex = value.toString(16);
+        while (hex.length < 64) hex = "0" + hex;
+        return hex;
+    },
+    compact: function(log, size) {
+        var stack = [];
+        for (var i = Math.min(size, log.stack.length()) - 1; i >= 0; i--) stack.push(this.word(log.stack.peek(i)));
+        return {op: log.op.toString(), depth: log.getDepth(), stack: stack};
+    },
+    step: function(log, db) {
+        var op = log.op.toString();
+        var isLog = op.indexOf("LOG") === 0;
+        var current = this.compact(log, isLog ? 2 + parseInt(op.slice(3)) : 2);
+        var kept = this.prev === null;
+        if (this.prev !== null && current.depth !== this.prev.depth) {
+            if (!this.prevKept) this.steps.push(this.prev);
+            kept = true;
+        }
+        if (isLog) {
+            var offset = parseInt(current.stack[current.stack.length - 1], 16);
+            var length = parseInt(current.stack[current.stack.length - 2], 16);
+            var start = Math.floor(offset / 32) * 32;
+            var stop = Math.min(Math.ceil((offset + length) / 32) * 32, log.memory.length());
+            var memory = stop > start ? toHex(log.memory.slice(start, stop)).slice(2) : "";
+            current.memory = memory.match(/.{64}/g) || [];
+            current.stack[current.stack.length - 1] = this.word(offset - start);
+            kept = true;
+        }
+        if (kept) this.steps.push(current);
+        this.prev = current;
+        this.prevKept = kept;
+    },
+    fault: function(log, db) {},
+    result: function(ctx, db) { return {structLogs: this.steps}; }
+}"""
+
+TRACE_BACKEND_STRUCT_LOGS = "structLogs"
+TRACE_BACKEND_CALL_TRACER = "callTracer"
+# callTracer frames executing the callee code in the caller context
+DELEGATED_CALL_TYPES = ("DELEGATECALL", "CALLCODE")
+
+# endpoints known to reject the custom JS tracer and the native callTracer
+_tracer_unsupported = set()
+_call_tracer_unsupported = set()
+
+STREAM_CHUNK_SIZE = 1 << 20
+
+
+def _normalize_word(value: str) -> str:
+    # geth/nethermind return unprefixed padded words, erigon returns 0x-prefixed unpadded ones
+    return (value[2:] if value.startswith("0x") else value).zfill(64)
+
+
+class _EventStepsFilter:
+    """
+    Keep only the struct log steps needed to extract logs with `_trace_logs`:
+    LOG0-LOG4 steps with the memory words they reference, and the steps around depth changes
+    to track the emitting contract address. The rest of the stack and memory are dropped.
+    """
+
+    def __init__(self):
+        self.steps: List[Dict] = []
+        self._prev: Optional[Dict] = None
+        self._prev_kept = False
+
+    def feed(self, step: Dict) -> None:
+        op = step["op"]
+        is_log = op.startswith("LOG")
+        try:
+            stack = step["stack"][-(2 + int(op[3:])) :] if is_log else step["stack"][-2:]
         except KeyError:
             raise StructLogError("StructLog has no stack")
-        except (IndexError, TypeError):
-            raise StructLogError("Malformed stack")
+        current = {"op": op, "depth": step["depth"], "stack": [_normalize_word(value) for value in stack]}
+
+        kept = self._prev is None
+        if self._prev is not None and current["depth"] != self._prev["depth"]:
+            if not self._prev_kept:
+                self.steps.append(self._prev)
+            kept = True
+
+        if is_log:
+            try:
+                offset = int(current["stack"][-1], 16)
+                length = int(current["stack"][-2], 16)
+            except (IndexError, TypeError):
+                raise StructLogError("Malformed stack")
+            first_word = offset // 32
+            current["memory"] = step.get("memory", [])[first_word : (offset + length + 31) // 32]
+            current["stack"][-1] = f"{offset - first_word * 32:064x}"
+            kept = True
+
+        if kept:
+            self.steps.append(current)
+        self._prev = current
+        self._prev_kept = kept
+
+
+def _iter_struct_logs(chunks: Iterable[str]) -> Iterator[Dict]:
+    """
+    Incrementally parse `debug_traceTransaction` JSON response yielding `structLogs` items one by one,
+    so only the current chunk and step are kept in memory.
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+
+    # seek to the start of the structLogs array, the preceding fields are small
+    while True:
+        key = buffer.find('"structLogs"')
+        bracket = buffer.find("[", key) if key >= 0 else -1
+        if bracket >= 0:
+            pos = bracket + 1
+            break
+        chunk = next(chunks, None)
+        if chunk is None:
+            response = json.loads(buffer)
+            if "error" in response:
+                raise ValueError(response["error"])
+            raise StructLogError("Trace has no structLogs")
+        buffer += chunk
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buffer):
+            if buffer[pos] == "]":
+                return
+            try:
+                step, pos = decoder.raw_decode(buffer, pos)
+                yield step
+                continue
+            except json.JSONDecodeError:
+                # the step is split between the chunks
+                pass
+        chunk = next(chunks, None)
+        if chunk is None:
+            raise StructLogError("Unexpected end of the trace")
+        buffer, pos = buffer[pos:] + chunk, 0
+
+
+def _stream_trace_event_steps(txid: str) -> Optional[List[Dict]]:
+    """
+    Request the transaction trace and keep only the steps needed to decode its events.
+    Peak memory is bounded by the number of logs and calls instead of the number of opcodes.
+    Return None if the provider can't be streamed (non-HTTP).
+    """
+    endpoint_uri = getattr(web3.provider, "endpoint_uri", None)
+    if endpoint_uri is None:
+        return None
 
-    return trace
+    params: Dict = {"disableStorage": True, "enableMemory": True}
+    if endpoint_uri not in _tracer_unsupported:
+        params["tracer"] = _EVENT_STEPS_TRACER
 
+    payload = {"jsonrpc": "2.0", "id": 1, "method": "debug_traceTransaction", "params": [txid, params]}
+    with requests.post(endpoint_uri, json=payload, stream=True, **web3.provider.get_request_kwargs()) as response:
+        response.raise_for_status()
+        utf8 = codecs.getincrementaldecoder("utf-8")()
+        steps_filter = _EventStepsFilter()
+        try:
+            for step in _iter_struct_logs(utf8.decode(chunk) for chunk in response.iter_content(STREAM_CHUNK_SIZE)):
+                steps_filter.feed(step)
+        except ValueError:
+            if "tracer" not in params:
+                raise
+            # the node doesn't support JS tracers, the plain structLogs are streamed instead
+            _tracer_unsupported.add(endpoint_uri)
+            return _stream_trace_event_steps(txid)
 
-def _find_fist_index_of_event_with_different_from_first_event_address(events):
-    first_event_address = events[0].address
-    for idx in range(len(events)):
-        e = events[idx]
-        if e.address != first_event_address:
-            return idx
-    return len(events)
+    return steps_filter.steps
 
 
-def tx_events_from_trace(tx: TransactionReceipt) -> Optional[List]:
+def _collect_frame_logs(frame: Dict, logs: List[Dict]) -> bool:
+    """
+    Append the frame logs interleaved with the subcalls ones in the execution order.
+    Return False if the order can't be restored or the logs of the reverted frames were dropped.
     """
-    Parse and build events list from transaction receipt
+    if "error" in frame:
+        # callTracer drops the logs of the reverted frames
+        return False
+
+    calls = frame.get("calls", [])
+    # callTracer reports the context (proxy) address for the logs of the DELEGATECALL frames,
+    # the code address is taken instead as the struct logs backend does
+    is_delegated = frame.get("type", "").upper() in DELEGATED_CALL_TYPES
+    logs_by_position: Dict[int, List[Dict]] = {}
+    for log in frame.get("logs", []):
+        if "position" not in log:
+            return False
+        position = log["position"]
+        address = frame["to"] if is_delegated else log.get("address", frame["to"])
+        logs_by_position.setdefault(int(position, 16) if isinstance(position, str) else position, []).append(
+            {**log, "address": address}
+        )
+
+    for index, call in enumerate(calls):
+        logs.extend(logs_by_position.pop(index, []))
+        if not _collect_frame_logs(call, logs):
+            return False
+    logs.extend(logs_by_position.pop(len(calls), []))
+    return not logs_by_position
+
+
+def _call_tracer_logs(txid: str) -> Optional[List[Dict]]:
+    """
+    Return the ordered, address-attributed logs of the transaction using the native
+    `callTracer` with `withLog`, or None if the node doesn't support it or
+    the logs can't be fully restored from the call frames.
+    """
+    endpoint_uri = getattr(web3.provider, "endpoint_uri", None)
+    if endpoint_uri in _call_tracer_unsupported:
+        return None
+
+    response = web3.provider.make_request(
+        "debug_traceTransaction", [txid, {"tracer": "callTracer", "tracerConfig": {"withLog": True}}]
+    )
+    result = response.get("result")
+    if "error" in response or not isinstance(result, dict) or "structLogs" in result:
+        _call_tracer_unsupported.add(endpoint_uri)
+        return None
+
+    logs: List[Dict] = []
+    return logs if _collect_frame_logs(result, logs) else None
+
+
+def decode_tx_events_from_trace(
+    tx: TransactionReceipt, events_only: bool = True, backend: str = TRACE_BACKEND_STRUCT_LOGS
+) -> Optional[List[Dict]]:
+    """
+    Parse events list from transaction receipt, the events are decoded but not formatted yet
 
     Arguments
     ---------
     tx : TransactionReceipt
         Transaction receipt provided by brownie
+    events_only : bool
+        Stream the trace keeping only the steps needed to decode events
+        instead of retrieving the full brownie trace (unless it's already retrieved)
+    backend : str
+        `TRACE_BACKEND_CALL_TRACER` to take the logs from the node `callTracer`,
+        falls back to `TRACE_BACKEND_STRUCT_LOGS` (opcode trace) if it's unavailable
+        or there are reverted subcalls (their logs are dropped by `callTracer`)
     """
     if not tx.status:
         raise "Tx has reverted status (set to 0)"
 
+    if backend == TRACE_BACKEND_CALL_TRACER:
+        print(f"Parsing events from tx call trace...", end="")
+        logs = _call_tracer_logs(tx.txid)
+        if logs is not None:
+            events = decode_logs(logs, _topics, allow_undecoded=True)
+            print(f" Done")
+            return events
+        print(f" Unavailable")
+    elif backend != TRACE_BACKEND_STRUCT_LOGS:
+        raise ValueError(f"Unknown trace backend {backend}")
+
     # Parsing events from trace.
     # Brownie uses that way for the reverted transactions only.
     # Contracts resolution by addr works pretty well.
     print(f"Parsing events from tx trace...", end="")
-    tx._get_trace()
-    trace = tx._raw_trace
+    trace = None
+    if events_only and tx._raw_trace is None:
+        trace = _stream_trace_event_steps(tx.txid)
+    if trace is None:
+        tx._get_trace()
+        trace = tx._raw_trace
 
     if not trace:
         return None
 
-    # Seems like Ganache sometimes provides correct data
-    # but incorrect data length for the LOG traces.
-    # Force the length to be aligned to a 32-bytes boundary
-    trace = _align_logdata_len(trace)
-
     initial_address = str(tx.receiver or tx.contract_address)
 
-    events = decode_traceTransaction(trace, _topics, allow_undecoded=True, initial_address=initial_address)
+    events = decode_logs(_trace_logs(trace, initial_address), _topics, allow_undecoded=True)
     print(f" Done")
 
+    return events
+
+
+def tx_events_from_trace(
+    tx: TransactionReceipt, events_only: bool = True, backend: str = TRACE_BACKEND_STRUCT_LOGS
+) -> Optional[List]:
+    """
+    Parse and build events list from transaction receipt,
+    see `decode_tx_events_from_trace` for the arguments
+    """
+    events = decode_tx_events_from_trace(tx, events_only, backend)
+    if events is None:
+        return None
+
     return [format_event(i) for i in events]
 
 
@@ -122,6 +585,15 @@ def resolve_contract(addr: str) -> str:
         return contract._name
 
 
+def _resolve_contract_names(events: List) -> Dict[str, str]:
+    """Resolve names of the contracts emitted the events once per address, using the persistent cache"""
+    names = get_contract_name_cache().resolve_many((event.address for event in events), resolve_contract)
+    for addr, name in names.items():
+        if name == "":
+            print(f"WARNING: cannot resolve contract name at {addr}")
+    return names
+
+
 def get_event_group(event, contract_name, groups: List[GroupBy]) -> Optional[GroupBy]:
     for g in groups:
         if g.contract_name == contract_name and g.event_name == event.name:
@@ -129,52 +601,58 @@ def get_event_group(event, contract_name, groups: List[GroupBy]) -> Optional[Gro
     return None
 
 
-def group_tx_events(
+def iter_grouped_tx_events(
     events: Optional[List], dict_events: EventDict, groups: List[GroupBy]
-) -> List[Annotated[Tuple[GroupBy, EventDict], 2]]:
+) -> Iterator[Annotated[Tuple[GroupBy, EventDict], 2]]:
     """
-    Group events with provided markers
+    Lazily group events with provided markers in a single pass
 
     Arguments
     ---------
     events : Optional[List]
-        Raw transaction events (logs)
+        Raw transaction events (logs), not used for `CompactEventDict`
     dict_events : EventDict
         Repacked transaction events (logs)
     groups: [GroupBy]
         Event grouping markers
     """
     evs = list(dict_events)
-    all_evs = events
-    ret = []
+    names = _resolve_contract_names(evs)
+
+    def make_group(start: int, stop: int) -> EventDict:
+        if isinstance(dict_events, CompactEventDict):
+            return CompactEventDict.from_records(evs[start:stop])
+        return EventDict(events[start:stop])
 
     prev_grp: Optional[GroupBy] = None
     group_start_index = 0
-    group_stop_index = -1
-    while evs:
-        first_event = evs[0]
-        idx = _find_fist_index_of_event_with_different_from_first_event_address(evs)
-        contract_name = resolve_contract(first_event.address)
-        if contract_name == "":
-            print(f"WARNING: cannot resolve contract name at {first_event.address}")
-
-        event_names = []
-        for event in evs[:idx]:
-            event_names.append(event.name)
-
-        current_grp = get_event_group(first_event, contract_name, groups)
+    for start, _ in _iter_address_runs(evs):
+        current_grp = get_event_group(evs[start], names[evs[start].address], groups)
         if current_grp is not None:
-            if group_stop_index >= group_start_index:
-                ret.append((prev_grp, EventDict(all_evs[group_start_index : group_stop_index + 1])))
-                group_start_index = group_stop_index + 1
+            if start > group_start_index:
+                yield prev_grp, make_group(group_start_index, start)
+                group_start_index = start
             prev_grp = current_grp
 
-        evs = evs[idx:]
-        group_stop_index += idx
+    yield prev_grp, make_group(group_start_index, len(evs))
 
-    ret.append((prev_grp, EventDict(all_evs[group_start_index : group_stop_index + 1])))
 
-    return ret
+def group_tx_events(
+    events: Optional[List], dict_events: EventDict, groups: List[GroupBy]
+) -> List[Annotated[Tuple[GroupBy, EventDict], 2]]:
+    """
+    Group events with provided markers
+
+    Arguments
+    ---------
+    events : Optional[List]
+        Raw transaction events (logs), not used for `CompactEventDict`
+    dict_events : EventDict
+        Repacked transaction events (logs)
+    groups: [GroupBy]
+        Event grouping markers
+    """
+    return list(iter_grouped_tx_events(events, dict_events, groups))
 
 
 def display_tx_events(events: EventDict, title: str, groups: List[GroupBy]) -> None:
@@ -193,25 +671,22 @@ def display_tx_events(events: EventDict, title: str, groups: List[GroupBy]) -> N
         Event grouping markers
     """
     events = list(events)
+    names = _resolve_contract_names(events)
     call_tree: List = [[f'{color("bright cyan")}{title}{color}']]
     active_tree: List = [call_tree[0]]
     counters = {}
 
-    while events:
-        first_event = events[0]
-        idx = _find_fist_index_of_event_with_different_from_first_event_address(events)
+    for start, stop in _iter_address_runs(events):
+        first_event = events[start]
 
-        contract_name = resolve_contract(first_event.address)
+        contract_name = names[first_event.address]
         if contract_name:
             sub_tree: List = [f"{contract_name} ({first_event.address})"]
         else:
-            print(f"WARNING: cannot resolve contract name at {first_event.address}")
             sub_tree = [f"{first_event.address}"]
 
-        event_names = []
-        for event in events[:idx]:
+        for event in events[start:stop]:
             sub_tree.append([event.name, *(f"{k}: {v}" for k, v in event.items())])
-            event_names.append(event.name)
 
         current_grp = get_event_group(first_event, contract_name, groups)
 
@@ -230,16 +705,96 @@ def display_tx_events(events: EventDict, title: str, groups: List[GroupBy]) -> N
 
         active_tree[-1].append(sub_tree)
 
-        events = events[idx:]
-
     event_tree = build_tree(call_tree, multiline_pad=0, pad_depth=[0, 1])
     result = f"{event_tree}"
     print(f"{result}")
 
 
-def display_filtered_tx_call(tx: TransactionReceipt, filter_func: Callable[[Dict], bool] = lambda _: False) -> None:
+class _TraceGas:
+    """
+    `TransactionReceipt._get_trace_gas` answered from the prefix sums built in a single sweep over the trace:
+    the total gas of a range is a difference of the prefix sums, the internal gas is the sum over the steps
+    having the same (depth, jumpDepth) as the range start, found with bisect in the per-frame prefix sums.
+    """
+
+    def __init__(self, trace: List[Dict]):
+        self._trace = trace
+        self._total = [0]
+        self._positions: Dict[Tuple[int, int], List[int]] = {}
+        self._internal: Dict[Tuple[int, int], List[int]] = {}
+
+        for i, step in enumerate(trace):
+            cost = step["gasCost"]
+            # manually add gas refunds where they occur, as brownie does
+            if step["op"] == "SSTORE" and int(step["stack"][-2], 16) == 0:
+                cost -= 15000
+            elif step["op"] == "SELFDESTRUCT":
+                cost -= 24000
+            self._total.append(self._total[-1] + cost)
+
+            key = (step["depth"], step["jumpDepth"])
+            self._positions.setdefault(key, []).append(i)
+            internal = self._internal.setdefault(key, [0])
+            internal.append(internal[-1] + cost - self._passed_gas(i))
+
+    def _passed_gas(self, i: int) -> int:
+        # for the internal gas tracking the gas passed to an external call is ignored
+        trace = self._trace
+        return trace[i]["gasCost"] if i + 1 < len(trace) and trace[i + 1]["depth"] > trace[i]["depth"] else 0
+
+    def __call__(self, start: int, stop: int) -> Tuple[int, int]:
+        trace = self._trace
+        key = (trace[start]["depth"], trace[start]["jumpDepth"])
+        positions = self._positions[key]
+        lo, hi = bisect.bisect_left(positions, start), bisect.bisect_left(positions, stop)
+
+        total_gas = self._total[stop] - self._total[start]
+        internal_gas = self._internal[key][hi] - self._internal[key][lo]
+        if positions[hi - 1] == stop - 1:
+            # the external call made by the last step is out of the range
+            internal_gas += self._passed_gas(stop - 1)
+
+        # for external calls, add the remaining gas returned back
+        if start > 0 and trace[start]["depth"] > trace[start - 1]["depth"]:
+            total_gas += trace[start - 1]["gasCost"]
+            internal_gas += trace[start - 1]["gasCost"]
+
+        return internal_gas, total_gas
+
+
+def _index_call_frames(trace_index: List[Tuple[int, int, int]], trace_len: int) -> Tuple[List[int], List[int]]:
     """
-    Display the filtered sequence of contracts and methods called during
+    Return the end trace index and the end `trace_index` position of the frame started at every position,
+    found with a stack in a single sweep: an external frame ends at the first step with a lower depth,
+    an internal one also at the first step of the same depth and a lower jumpDepth.
+    """
+    ends = [trace_len] * len(trace_index)
+    end_positions = [len(trace_index)] * len(trace_index)
+    # (position, is_external) of the frames not ended yet
+    frames: List[Tuple[int, bool]] = []
+    for i in range(1, len(trace_index)):
+        idx, depth, jump_depth = trace_index[i]
+        while frames:
+            position, is_external = frames[-1]
+            _, frame_depth, frame_jump_depth = trace_index[position]
+            if depth < frame_depth or (not is_external and depth == frame_depth and jump_depth < frame_jump_depth):
+                ends[position], end_positions[position] = idx, i
+                frames.pop()
+            else:
+                break
+
+        _, last_depth, last_jump_depth = trace_index[i - 1]
+        if depth > last_depth:
+            frames.append((i, True))
+        elif depth == last_depth and jump_depth > last_jump_depth:
+            frames.append((i, False))
+
+    return ends, end_positions
+
+
+def format_filtered_tx_call(tx: TransactionReceipt, filter_func: Callable[[Dict], bool] = lambda _: False) -> str:
+    """
+    Format the filtered sequence of contracts and methods called during
     the transaction. The format:
     Contract.functionName  [instruction]  start:stop  [gas used]
     * start:stop are index values for the `trace` member of this object,
@@ -255,7 +810,8 @@ def display_filtered_tx_call(tx: TransactionReceipt, filter_func: Callable[[Dict
         If filter_func returns `True` on current trace item, collapse it
     """
     trace = tx.trace
-    key = _step_internal(trace[0], trace[-1], 0, len(trace), tx._get_trace_gas(0, len(tx.trace)))
+    trace_gas = _TraceGas(trace)
+    key = _step_internal(trace[0], trace[-1], 0, len(trace), trace_gas(0, len(trace)))
     call_tree: List = [[key]]
     active_tree: List = [call_tree[0]]
     # (index, depth, jumpDepth) for relevant steps in the trace
@@ -264,63 +820,62 @@ def display_filtered_tx_call(tx: TransactionReceipt, filter_func: Callable[[Dict
         for i in range(1, len(trace))
         if not _step_compare(trace[i], trace[i - 1])
     ]
-    subcalls = tx.subcalls[::-1]
-    # track filter state
-    is_filter_active = False
-    filter_index = trace_index[0]
-    for i, (idx, depth, jump_depth) in enumerate(trace_index[1:], start=1):
-        last = trace_index[i - 1]
-        # check for the filter reset
-        if is_filter_active:
-            if depth < filter_index[1]:
-                last = filter_index
-                is_filter_active = False
-            elif depth == filter_index[1] and jump_depth < filter_index[2]:
-                last = filter_index
-                is_filter_active = False
+    ends, end_positions = _index_call_frames(trace_index, len(trace))
+    # subcalls are listed in the order of the external calls, including the ones within the filtered items
+    subcall_ids = {
+        i: subcall_id
+        for subcall_id, i in enumerate(
+            i for i in range(1, len(trace_index)) if trace_index[i][1] > trace_index[i - 1][1]
+        )
+    }
+
+    last = trace_index[0]
+    i = 1
+    while i < len(trace_index):
+        idx, depth, jump_depth = trace_index[i]
         if depth == last[1] and jump_depth < last[2]:
             # returning from an internal function, reduce tree by one
-            if not is_filter_active:
-                active_tree.pop()
-            continue
+            active_tree.pop()
         elif depth < last[1]:
             # returning from an external call, return tree by jumpDepth of the previous depth
-            if not is_filter_active:
-                active_tree = active_tree[: -(last[2] + 1)]
-            continue
-        need_filtering = filter_func(trace[idx])
-        if depth > last[1]:
-            # called to a new contract
-            end = next((x[0] for x in trace_index[i + 1 :] if x[1] < depth), len(trace))
-            total_gas, internal_gas = tx._get_trace_gas(idx, end)
-            key = _step_external(
-                trace[idx],
-                trace[end - 1],
-                idx,
-                end,
-                (total_gas, internal_gas),
-                subcalls.pop(),
-                not need_filtering,  # don't expand filtered items
-            )
-        elif depth == last[1] and jump_depth > last[2]:
-            # jumped into an internal function
-            end = next(
-                (x[0] for x in trace_index[i + 1 :] if x[1] < depth or (x[1] == depth and x[2] < jump_depth)),
-                len(trace),
-            )
-            total_gas, internal_gas = tx._get_trace_gas(idx, end)
-            key = _step_internal(trace[idx], trace[end - 1], idx, end, (total_gas, internal_gas))
-        # show [collapsed] remark for the filtered tree node
-        if need_filtering:
-            key += f"{color('magenta')} [collapsed]{color}"
-        if not is_filter_active:
+            active_tree = active_tree[: -(last[2] + 1)]
+        else:
+            need_filtering = filter_func(trace[idx])
+            end = ends[i]
+            if depth > last[1]:
+                # called to a new contract
+                key = _step_external(
+                    trace[idx],
+                    trace[end - 1],
+                    idx,
+                    end,
+                    trace_gas(idx, end),
+                    tx.subcalls[subcall_ids[i]],
+                    not need_filtering,  # don't expand filtered items
+                )
+            else:
+                # jumped into an internal function
+                key = _step_internal(trace[idx], trace[end - 1], idx, end, trace_gas(idx, end))
+            # show [collapsed] remark for the filtered tree node
+            if need_filtering:
+                key += f"{color('magenta')} [collapsed]{color}"
             active_tree[-1].append([key])
             active_tree.append(active_tree[-1][-1])
             if need_filtering:
-                is_filter_active = True
-                filter_index = trace_index[i]
-    print(
+                # the filtered subtree is skipped as a whole
+                last = trace_index[i]
+                i = end_positions[i]
+                continue
+
+        last = trace_index[i]
+        i += 1
+    return (
         f"Call trace for '{color('bright blue')}{tx.txid}{color}':\n"
-        f"Initial call cost  [{color('bright yellow')}{tx._call_cost} gas{color}]"
+        f"Initial call cost  [{color('bright yellow')}{tx._call_cost} gas{color}]\n"
+        f"{build_tree(call_tree).rstrip()}"
     )
-    print(build_tree(call_tree).rstrip())
+
+
+def display_filtered_tx_call(tx: TransactionReceipt, filter_func: Callable[[Dict], bool] = lambda _: False) -> None:
+    """Display the filtered call trace, see `format_filtered_tx_call`"""
+    print(format_filtered_tx_call(tx, filter_func))
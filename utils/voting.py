@@ -198,6 +198,7 @@ def confirm_vote_script(
             verbose=False,
             specific_net=CHAIN_NETWORK_NAME,
             repeat_is_error=True,
+            batched=True,
         )
 
         vote_descriptions = list(vote_items.keys())